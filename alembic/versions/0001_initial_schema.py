@@ -0,0 +1,163 @@
+"""Esquema inicial (el que generaba Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-04-20 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('Brand',
+        sa.Column('id_brand', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id_brand')
+    )
+    op.create_index(op.f('ix_Brand_id_brand'), 'Brand', ['id_brand'], unique=False)
+
+    op.create_table('Role',
+        sa.Column('id_role', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id_role')
+    )
+    op.create_index(op.f('ix_Role_id_role'), 'Role', ['id_role'], unique=False)
+
+    op.create_table('Model',
+        sa.Column('id_model', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('id_brand_fk', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['id_brand_fk'], ['Brand.id_brand'], ),
+        sa.PrimaryKeyConstraint('id_model')
+    )
+    op.create_index(op.f('ix_Model_id_model'), 'Model', ['id_model'], unique=False)
+
+    op.create_table('Description',
+        sa.Column('id_description', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('id_model_fk', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['id_model_fk'], ['Model.id_model'], ),
+        sa.PrimaryKeyConstraint('id_description')
+    )
+    op.create_index(op.f('ix_Description_id_description'), 'Description', ['id_description'], unique=False)
+
+    op.create_table('Vehicle',
+        sa.Column('id_vehicle', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('id_model_fk', sa.Integer(), nullable=False),
+        sa.Column('id_description_fk', sa.Integer(), nullable=False),
+        sa.Column('id_brand_fk', sa.Integer(), nullable=False),
+        sa.Column('number_plate', sa.String(length=10), nullable=False),
+        sa.Column('serial_number', sa.String(length=10), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('color', sa.String(length=20), nullable=False),
+        sa.Column('km', sa.Integer(), nullable=False),
+        sa.Column('km_per_litre', sa.Integer(), nullable=False),
+        sa.Column('route_status', sa.Enum('ON_ROUTE', 'OFF_ROUTE', 'REFUELING', name='vehicleroute', native_enum=False, create_constraint=True), nullable=True),
+        sa.Column('assignment_status', sa.Enum('ASSIGNED', 'NOT_ASSIGNED', name='vehicleassignmentstatus', native_enum=False, create_constraint=True), nullable=True),
+        sa.ForeignKeyConstraint(['id_brand_fk'], ['Brand.id_brand'], ),
+        sa.ForeignKeyConstraint(['id_description_fk'], ['Description.id_description'], ),
+        sa.ForeignKeyConstraint(['id_model_fk'], ['Model.id_model'], ),
+        sa.PrimaryKeyConstraint('id_vehicle')
+    )
+    op.create_index(op.f('ix_Vehicle_id_vehicle'), 'Vehicle', ['id_vehicle'], unique=False)
+
+    op.create_table('Maintenance',
+        sa.Column('id_maintenance', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('id_vehicle_fk', sa.Integer(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('estimated_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.Enum('IN_PROGRESS', 'COMPLETED', 'CANCELLED', name='maintenancestatus', native_enum=False, create_constraint=True), nullable=False),
+        sa.ForeignKeyConstraint(['id_vehicle_fk'], ['Vehicle.id_vehicle'], ),
+        sa.PrimaryKeyConstraint('id_maintenance')
+    )
+    op.create_index(op.f('ix_Maintenance_id_maintenance'), 'Maintenance', ['id_maintenance'], unique=False)
+
+    op.create_table('User',
+        sa.Column('id_usuario', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=False),
+        sa.Column('last_name', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('id_role_fk', sa.Integer(), nullable=False),
+        sa.Column('id_vehicle_fk', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['id_role_fk'], ['Role.id_role'], ),
+        sa.ForeignKeyConstraint(['id_vehicle_fk'], ['Vehicle.id_vehicle'], ),
+        sa.PrimaryKeyConstraint('id_usuario'),
+        sa.UniqueConstraint('email')
+    )
+    op.create_index(op.f('ix_User_id_usuario'), 'User', ['id_usuario'], unique=False)
+
+    op.create_table('Route',
+        sa.Column('id_route', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('id_vehicle_fk', sa.Integer(), nullable=False),
+        sa.Column('id_user_fk', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(length=255), nullable=False),
+        sa.Column('latitude_start', sa.String(length=50), nullable=True),
+        sa.Column('longitude_start', sa.String(length=50), nullable=True),
+        sa.Column('latitude_end', sa.String(length=50), nullable=True),
+        sa.Column('longitude_end', sa.String(length=50), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=True),
+        sa.Column('end_time', sa.DateTime(), nullable=True),
+        sa.Column('estimated_time', sa.Double(), nullable=True),
+        sa.Column('total_duration', sa.Double(), nullable=True),
+        sa.Column('on_time', sa.Boolean(), nullable=True),
+        sa.Column('start_km', sa.Integer(), nullable=True),
+        sa.Column('end_km', sa.Integer(), nullable=True),
+        sa.Column('estimated_km', sa.Integer(), nullable=True),
+        sa.Column('image_start_km', sa.String(length=255), nullable=True),
+        sa.Column('image_end_km', sa.String(length=255), nullable=True),
+        sa.Column('on_distance', sa.Boolean(), nullable=True),
+        sa.Column('liters_consumed', sa.Double(), nullable=True),
+        sa.ForeignKeyConstraint(['id_user_fk'], ['User.id_usuario'], ),
+        sa.ForeignKeyConstraint(['id_vehicle_fk'], ['Vehicle.id_vehicle'], ),
+        sa.PrimaryKeyConstraint('id_route')
+    )
+    op.create_index(op.f('ix_Route_id_route'), 'Route', ['id_route'], unique=False)
+
+    op.create_table('FuelStop',
+        sa.Column('id_fuel_stop', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('id_route_fk', sa.Integer(), nullable=False),
+        sa.Column('Latitude_stop', sa.String(length=255), nullable=False),
+        sa.Column('Longitude_stop', sa.String(length=255), nullable=False),
+        sa.Column('stop_time', sa.DateTime(), nullable=False),
+        sa.Column('resume_time', sa.DateTime(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=True),
+        sa.Column('Latitude_start', sa.String(length=255), nullable=True),
+        sa.Column('Longitude_start', sa.String(length=255), nullable=True),
+        sa.Column('current_km', sa.Integer(), nullable=True),
+        sa.Column('image_km', sa.String(length=255), nullable=True),
+        sa.Column('liters_added', sa.DECIMAL(precision=5, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['id_route_fk'], ['Route.id_route'], ),
+        sa.PrimaryKeyConstraint('id_fuel_stop')
+    )
+    op.create_index(op.f('ix_FuelStop_id_fuel_stop'), 'FuelStop', ['id_fuel_stop'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_FuelStop_id_fuel_stop'), table_name='FuelStop')
+    op.drop_table('FuelStop')
+    op.drop_index(op.f('ix_Route_id_route'), table_name='Route')
+    op.drop_table('Route')
+    op.drop_index(op.f('ix_User_id_usuario'), table_name='User')
+    op.drop_table('User')
+    op.drop_index(op.f('ix_Maintenance_id_maintenance'), table_name='Maintenance')
+    op.drop_table('Maintenance')
+    op.drop_index(op.f('ix_Vehicle_id_vehicle'), table_name='Vehicle')
+    op.drop_table('Vehicle')
+    op.drop_index(op.f('ix_Description_id_description'), table_name='Description')
+    op.drop_table('Description')
+    op.drop_index(op.f('ix_Model_id_model'), table_name='Model')
+    op.drop_table('Model')
+    op.drop_index(op.f('ix_Role_id_role'), table_name='Role')
+    op.drop_table('Role')
+    op.drop_index(op.f('ix_Brand_id_brand'), table_name='Brand')
+    op.drop_table('Brand')
@@ -0,0 +1,30 @@
+"""Route.enrichment_status para el enriquecimiento diferido de rutas
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-04-27 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Las bases creadas con create_all() después de añadir la columna ya la tienen
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('Route')}
+    if 'enrichment_status' in columns:
+        return
+    with op.batch_alter_table('Route', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('enrichment_status', sa.Enum('PENDING', 'DONE', 'FAILED', name='routeenrichmentstatus', native_enum=False, create_constraint=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('Route', schema=None) as batch_op:
+        batch_op.drop_constraint('routeenrichmentstatus', type_='check')
+        batch_op.drop_column('enrichment_status')
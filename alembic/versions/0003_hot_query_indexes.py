@@ -0,0 +1,47 @@
+"""Índices para las llaves foráneas y columnas de tiempo/estado que filtran los repositorios
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-05-04 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas). Los compuestos cubren también la búsqueda por su primera columna.
+INDEXES = [
+    ('ix_Route_id_vehicle_fk_start_time', 'Route', ['id_vehicle_fk', 'start_time']),
+    ('ix_Route_id_user_fk', 'Route', ['id_user_fk']),
+    ('ix_Route_start_time', 'Route', ['start_time']),
+    ('ix_Route_enrichment_status', 'Route', ['enrichment_status']),
+    ('ix_FuelStop_id_route_fk_stop_time', 'FuelStop', ['id_route_fk', 'stop_time']),
+    ('ix_Maintenance_id_vehicle_fk_start_time', 'Maintenance', ['id_vehicle_fk', 'start_time']),
+    ('ix_Maintenance_status', 'Maintenance', ['status']),
+    ('ix_Vehicle_id_model_fk', 'Vehicle', ['id_model_fk']),
+    ('ix_Vehicle_id_description_fk', 'Vehicle', ['id_description_fk']),
+    ('ix_Vehicle_id_brand_fk', 'Vehicle', ['id_brand_fk']),
+    ('ix_Vehicle_route_status', 'Vehicle', ['route_status']),
+    ('ix_Vehicle_assignment_status', 'Vehicle', ['assignment_status']),
+    ('ix_User_id_role_fk', 'User', ['id_role_fk']),
+    ('ix_User_id_vehicle_fk', 'User', ['id_vehicle_fk']),
+    ('ix_Model_id_brand_fk', 'Model', ['id_brand_fk']),
+    ('ix_Description_id_model_fk', 'Description', ['id_model_fk']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    # En MySQL el índice de una llave foránea no se puede borrar mientras sea el único
+    # que la cubre; InnoDB vuelve a crear el suyo al eliminar el explícito.
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,118 @@
+"""Coordenadas de Route y FuelStop como DOUBLE con índices para búsquedas geográficas
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-05-11 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 1000
+
+# tabla -> (llave primaria, [(columna, tipo texto anterior, nullable)])
+COORDINATES = {
+    'Route': ('id_route', [
+        ('latitude_start', sa.String(length=50), True),
+        ('longitude_start', sa.String(length=50), True),
+        ('latitude_end', sa.String(length=50), True),
+        ('longitude_end', sa.String(length=50), True),
+    ]),
+    'FuelStop': ('id_fuel_stop', [
+        ('Latitude_stop', sa.String(length=255), False),
+        ('Longitude_stop', sa.String(length=255), False),
+        ('Latitude_start', sa.String(length=255), True),
+        ('Longitude_start', sa.String(length=255), True),
+    ]),
+}
+
+INDEXES = [
+    ('ix_Route_start_point', 'Route', ['latitude_start', 'longitude_start']),
+    ('ix_Route_end_point', 'Route', ['latitude_end', 'longitude_end']),
+    ('ix_FuelStop_stop_point', 'FuelStop', ['Latitude_stop', 'Longitude_stop']),
+]
+
+
+def _parse(value, nullable):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # Valores vacíos o basura: NULL si la columna lo permite, 0 como el placeholder de start_route
+        return None if nullable else 0.0
+
+
+def _format(value):
+    return None if value is None else str(value)
+
+
+def _copy_columns(table, pk, columns, source_suffix, target_suffix, convert):
+    """
+    Copia por bloques (ordenados por llave primaria) columna{source_suffix} -> columna{target_suffix}.
+    Cada bloque es un solo UPDATE con executemany; la conversión queda en Python porque un
+    CAST en SQL no trata igual los valores basura en SQLite (0) y en MySQL estricto (error).
+    """
+    bind = op.get_bind()
+    source = sa.table(table, sa.column(pk), *[sa.column(name + source_suffix) for name, _, _ in columns])
+    target = sa.table(table, sa.column(pk), *[sa.column(name + target_suffix) for name, _, _ in columns])
+    update = target.update().where(target.c[pk] == sa.bindparam('_pk')).values(**{
+        name + target_suffix: sa.bindparam('_' + name) for name, _, _ in columns
+    })
+    last_id = None
+    while True:
+        query = sa.select(*source.c).order_by(source.c[pk]).limit(BACKFILL_CHUNK)
+        if last_id is not None:
+            query = query.where(source.c[pk] > last_id)
+        rows = bind.execute(query).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {'_pk': row._mapping[pk], **{
+                '_' + name: convert(row._mapping[name + source_suffix], nullable)
+                for name, _, nullable in columns
+            }}
+            for row in rows
+        ])
+        last_id = rows[-1]._mapping[pk]
+
+
+def _convert(to_numeric):
+    new_suffix = '_num' if to_numeric else '_txt'
+    for table, (pk, columns) in COORDINATES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, text_type, _ in columns:
+                batch_op.add_column(sa.Column(name + new_suffix, sa.Double() if to_numeric else text_type, nullable=True))
+
+        if to_numeric:
+            _copy_columns(table, pk, columns, '', new_suffix, _parse)
+        else:
+            _copy_columns(table, pk, columns, '', new_suffix, lambda value, nullable: _format(value))
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _, _ in columns:
+                batch_op.drop_column(name)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, text_type, nullable in columns:
+                batch_op.alter_column(
+                    name + new_suffix,
+                    new_column_name=name,
+                    existing_type=sa.Double() if to_numeric else text_type,
+                    nullable=nullable,
+                )
+
+
+def upgrade() -> None:
+    _convert(to_numeric=True)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    _convert(to_numeric=False)
@@ -0,0 +1,128 @@
+"""Tablas de resumen VehicleDailyStats y DriverStats (km, litros, puntualidad)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-05-18 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+COUNTERS = [
+    ('routes_completed', sa.Integer()),
+    ('km', sa.Integer()),
+    ('liters_consumed', sa.Double()),
+    ('liters_added', sa.Double()),
+    ('total_duration', sa.Double()),
+    ('routes_evaluated', sa.Integer()),
+    ('on_time_routes', sa.Integer()),
+    ('on_distance_routes', sa.Integer()),
+]
+
+# Rutas finalizadas: end_route siempre guarda la imagen del kilometraje final
+COMPLETED = "r.end_time IS NOT NULL AND r.image_end_km IS NOT NULL AND r.image_end_km <> ''"
+# Las rutas finalizadas antes de 0002 tienen on_time/on_distance pero enrichment_status NULL
+EVALUATED = "(r.enrichment_status = 'DONE' OR (r.enrichment_status IS NULL AND (r.on_time IS NOT NULL OR r.on_distance IS NOT NULL)))"
+# Misma regla que Route.total_km: 0 si falta cualquiera de los dos kilometrajes
+TOTAL_KM = "CASE WHEN r.start_km IS NOT NULL AND r.end_km IS NOT NULL THEN r.end_km - r.start_km ELSE 0 END"
+
+ROUTE_COUNTERS = f"""
+    COUNT(*),
+    COALESCE(SUM({TOTAL_KM}), 0),
+    COALESCE(SUM(r.liters_consumed), 0),
+    0,
+    COALESCE(SUM(r.total_duration), 0),
+    SUM(CASE WHEN {EVALUATED} THEN 1 ELSE 0 END),
+    SUM(CASE WHEN {EVALUATED} AND r.on_time THEN 1 ELSE 0 END),
+    SUM(CASE WHEN {EVALUATED} AND r.on_distance THEN 1 ELSE 0 END)
+"""
+
+COUNTER_NAMES = ', '.join(name for name, _ in COUNTERS)
+
+
+def _counter_columns():
+    return [sa.Column(name, type_, nullable=False, server_default='0') for name, type_ in COUNTERS]
+
+
+def _backfill():
+    # Rutas finalizadas agrupadas por vehículo/día y por conductor
+    op.execute(f"""
+        INSERT INTO VehicleDailyStats (id_vehicle_fk, day, {COUNTER_NAMES})
+        SELECT r.id_vehicle_fk, DATE(r.end_time), {ROUTE_COUNTERS}
+        FROM Route r
+        WHERE {COMPLETED}
+        GROUP BY r.id_vehicle_fk, DATE(r.end_time)
+    """)
+    op.execute(f"""
+        INSERT INTO DriverStats (id_user_fk, {COUNTER_NAMES}, last_route_at)
+        SELECT r.id_user_fk, {ROUTE_COUNTERS}, MAX(r.end_time)
+        FROM Route r
+        WHERE {COMPLETED}
+        GROUP BY r.id_user_fk
+    """)
+
+    # Litros cargados: las recargas pueden caer en días sin ruta finalizada, así que
+    # primero se crean las filas que falten y luego se suman los litros
+    refuels = """
+        SELECT r.id_vehicle_fk AS id_vehicle, r.id_user_fk AS id_user,
+               DATE(COALESCE(f.resume_time, f.stop_time)) AS day, f.liters_added AS liters
+        FROM FuelStop f JOIN Route r ON r.id_route = f.id_route_fk
+        WHERE f.liters_added IS NOT NULL
+    """
+    op.execute(f"""
+        INSERT INTO VehicleDailyStats (id_vehicle_fk, day)
+        SELECT DISTINCT x.id_vehicle, x.day FROM ({refuels}) x
+        WHERE NOT EXISTS (
+            SELECT 1 FROM VehicleDailyStats s WHERE s.id_vehicle_fk = x.id_vehicle AND s.day = x.day
+        )
+    """)
+    op.execute(f"""
+        INSERT INTO DriverStats (id_user_fk)
+        SELECT DISTINCT x.id_user FROM ({refuels}) x
+        WHERE NOT EXISTS (SELECT 1 FROM DriverStats s WHERE s.id_user_fk = x.id_user)
+    """)
+    op.execute(f"""
+        UPDATE VehicleDailyStats SET liters_added = (
+            SELECT COALESCE(SUM(x.liters), 0) FROM ({refuels}) x
+            WHERE x.id_vehicle = VehicleDailyStats.id_vehicle_fk AND x.day = VehicleDailyStats.day
+        )
+    """)
+    op.execute(f"""
+        UPDATE DriverStats SET liters_added = (
+            SELECT COALESCE(SUM(x.liters), 0) FROM ({refuels}) x
+            WHERE x.id_user = DriverStats.id_user_fk
+        )
+    """)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'VehicleDailyStats',
+        sa.Column('id_vehicle_fk', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        *_counter_columns(),
+        sa.ForeignKeyConstraint(['id_vehicle_fk'], ['Vehicle.id_vehicle']),
+        sa.PrimaryKeyConstraint('id_vehicle_fk', 'day'),
+    )
+    op.create_index(op.f('ix_VehicleDailyStats_day'), 'VehicleDailyStats', ['day'], unique=False)
+    op.create_table(
+        'DriverStats',
+        sa.Column('id_user_fk', sa.Integer(), nullable=False),
+        *_counter_columns(),
+        sa.Column('last_route_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id_user_fk'], ['User.id_usuario']),
+        sa.PrimaryKeyConstraint('id_user_fk'),
+    )
+    _backfill()
+
+
+def downgrade() -> None:
+    op.drop_table('DriverStats')
+    op.drop_index(op.f('ix_VehicleDailyStats_day'), table_name='VehicleDailyStats')
+    op.drop_table('VehicleDailyStats')
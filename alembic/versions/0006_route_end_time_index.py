@@ -0,0 +1,23 @@
+"""Índice sobre Route.end_time para los rangos de fechas de /analytics
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-05-25 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_Route_end_time', 'Route', ['end_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Route_end_time', table_name='Route')
@@ -0,0 +1,29 @@
+"""Columnas Route.revision y FuelStop.revision (sello de cambios de los reportes)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-06-02 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('Route', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), nullable=False, server_default='1'))
+    with op.batch_alter_table('FuelStop', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('FuelStop', schema=None) as batch_op:
+        batch_op.drop_column('revision')
+    with op.batch_alter_table('Route', schema=None) as batch_op:
+        batch_op.drop_column('revision')
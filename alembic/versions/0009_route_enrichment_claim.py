@@ -0,0 +1,41 @@
+"""Estado Running y Route.enrichment_claimed_at para reclamar el enriquecimiento
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-06-03 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+OLD_STATUSES = ('PENDING', 'DONE', 'FAILED')
+NEW_STATUSES = ('PENDING', 'RUNNING', 'DONE', 'FAILED')
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('Route', schema=None) as batch_op:
+        batch_op.alter_column(
+            'enrichment_status',
+            existing_type=sa.Enum(*OLD_STATUSES, name='routeenrichmentstatus', native_enum=False, create_constraint=True),
+            type_=sa.Enum(*NEW_STATUSES, name='routeenrichmentstatus', native_enum=False, create_constraint=True),
+            existing_nullable=True
+        )
+        batch_op.add_column(sa.Column('enrichment_claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.execute("UPDATE Route SET enrichment_status = 'PENDING' WHERE enrichment_status = 'RUNNING'")
+    with op.batch_alter_table('Route', schema=None) as batch_op:
+        batch_op.drop_column('enrichment_claimed_at')
+        batch_op.alter_column(
+            'enrichment_status',
+            existing_type=sa.Enum(*NEW_STATUSES, name='routeenrichmentstatus', native_enum=False, create_constraint=True),
+            type_=sa.Enum(*OLD_STATUSES, name='routeenrichmentstatus', native_enum=False, create_constraint=True),
+            existing_nullable=True
+        )
@@ -0,0 +1,25 @@
+"""Índices (id_vehicle_fk, end_time) e (id_user_fk, end_time) para los KPIs de /analytics
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2025-06-04 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_Route_id_vehicle_fk_end_time', 'Route', ['id_vehicle_fk', 'end_time'], unique=False)
+    op.create_index('ix_Route_id_user_fk_end_time', 'Route', ['id_user_fk', 'end_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Route_id_user_fk_end_time', table_name='Route')
+    op.drop_index('ix_Route_id_vehicle_fk_end_time', table_name='Route')
@@ -0,0 +1,30 @@
+"""Marca como Done las rutas finalizadas antes de 0002 que ya tienen on_time/on_distance
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2025-06-05 00:00:00
+
+"""
+from alembic import op
+
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Antes de 0002 end_route calculaba on_time/on_distance en el mismo request: esas
+    # rutas quedaron con enrichment_status NULL y los KPIs no las contaban como evaluadas
+    op.execute("""
+        UPDATE Route SET enrichment_status = 'DONE'
+        WHERE enrichment_status IS NULL
+          AND image_end_km IS NOT NULL AND image_end_km <> ''
+          AND (on_time IS NOT NULL OR on_distance IS NOT NULL)
+    """)
+
+
+def downgrade() -> None:
+    # No se puede distinguir qué filas eran NULL antes de upgrade(): se dejan en Done
+    pass
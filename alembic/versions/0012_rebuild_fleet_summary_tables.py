@@ -0,0 +1,38 @@
+"""Recalcula VehicleDailyStats y DriverStats desde Route y FuelStop
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2025-06-06 00:00:00
+
+"""
+import importlib.util
+import os
+
+from alembic import op
+
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def _summary_tables_migration():
+    # Mismo backfill que 0005 (los nombres de las revisiones no son importables)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '0005_fleet_summary_tables.py')
+    spec = importlib.util.spec_from_file_location('fleet_summary_tables', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def upgrade() -> None:
+    # Las bases que pasaron por 0005 antes de 0011 no contaron las rutas evaluadas
+    # antiguas, y las ediciones y borrados de rutas y recargas no ajustaban los resúmenes
+    op.execute('DELETE FROM VehicleDailyStats')
+    op.execute('DELETE FROM DriverStats')
+    _summary_tables_migration()._backfill()
+
+
+def downgrade() -> None:
+    pass
@@ -14,3 +14,81 @@ MYSQL_ROOT_PASSWORD = os.getenv("MYSQL_ROOT_PASSWORD")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
+
+# Opcional: si no se define se deriva de DATABASE_URL (mysql+pymysql -> mysql+aiomysql)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Pool de conexiones (MySQL cierra conexiones inactivas tras wait_timeout)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# OpenRouteService y caché de distancias (precisión 3 decimales ~ 110 m)
+ORS_URL = os.getenv("ORS_URL", "https://api.openrouteservice.org/v2/directions/driving-car")
+ORS_TIMEOUT = float(os.getenv("ORS_TIMEOUT", "3"))
+DISTANCE_CACHE_SIZE = int(os.getenv("DISTANCE_CACHE_SIZE", "10000"))
+DISTANCE_CACHE_TTL = float(os.getenv("DISTANCE_CACHE_TTL", "86400"))
+DISTANCE_CACHE_PRECISION = int(os.getenv("DISTANCE_CACHE_PRECISION", "3"))
+
+# Enriquecimiento diferido de rutas: /routes/finish no espera a OpenRouteService
+DEFERRED_ROUTE_ENRICHMENT = os.getenv("DEFERRED_ROUTE_ENRICHMENT", "false").lower() in ("1", "true", "yes")
+ROUTE_ENRICHMENT_WORKERS = int(os.getenv("ROUTE_ENRICHMENT_WORKERS", "2"))
+# Segundos tras los que una ruta en Running (worker caído) vuelve a poder procesarse
+ROUTE_ENRICHMENT_LEASE = float(os.getenv("ROUTE_ENRICHMENT_LEASE", "300"))
+# Cada cuántos segundos cada proceso vuelve a buscar rutas en Pending o con el lease vencido
+ROUTE_ENRICHMENT_RESCAN_INTERVAL = float(os.getenv("ROUTE_ENRICHMENT_RESCAN_INTERVAL", str(ROUTE_ENRICHMENT_LEASE / 2)))
+
+# Migraciones Alembic al arrancar la API (desactivar si se ejecutan aparte con `alembic upgrade head`)
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Chat-bot: Ollama, conexión de solo lectura y límites por etapa (segundos)
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma:2b")
+# Opcional: usuario/réplica de solo lectura; si no se define se usa DATABASE_URL
+CHATBOT_DATABASE_URL = os.getenv("CHATBOT_DATABASE_URL")
+CHATBOT_DB_POOL_SIZE = int(os.getenv("CHATBOT_DB_POOL_SIZE", "2"))
+CHATBOT_MAX_CONCURRENCY = int(os.getenv("CHATBOT_MAX_CONCURRENCY", "2"))
+CHATBOT_MAX_QUEUE = int(os.getenv("CHATBOT_MAX_QUEUE", "20"))
+CHATBOT_QUEUE_TIMEOUT = float(os.getenv("CHATBOT_QUEUE_TIMEOUT", "30"))
+CHATBOT_SQL_TIMEOUT = float(os.getenv("CHATBOT_SQL_TIMEOUT", "60"))
+CHATBOT_DB_TIMEOUT = float(os.getenv("CHATBOT_DB_TIMEOUT", "10"))
+CHATBOT_ANSWER_TIMEOUT = float(os.getenv("CHATBOT_ANSWER_TIMEOUT", "60"))
+CHATBOT_MAX_ROWS = int(os.getenv("CHATBOT_MAX_ROWS", "100"))
+
+# Caché del chat-bot: pregunta normalizada -> SQL, (SQL, versión de datos) -> resultado,
+# (pregunta normalizada, resultado) -> respuesta redactada
+CHATBOT_SQL_CACHE_SIZE = int(os.getenv("CHATBOT_SQL_CACHE_SIZE", "1000"))
+CHATBOT_SQL_CACHE_TTL = float(os.getenv("CHATBOT_SQL_CACHE_TTL", "86400"))
+CHATBOT_RESULT_CACHE_SIZE = int(os.getenv("CHATBOT_RESULT_CACHE_SIZE", "1000"))
+CHATBOT_RESULT_CACHE_TTL = float(os.getenv("CHATBOT_RESULT_CACHE_TTL", "600"))
+CHATBOT_ANSWER_CACHE_SIZE = int(os.getenv("CHATBOT_ANSWER_CACHE_SIZE", "1000"))
+CHATBOT_ANSWER_CACHE_TTL = float(os.getenv("CHATBOT_ANSWER_CACHE_TTL", "86400"))
+
+# Caché de listados de catálogos (marcas, modelos, descripciones, roles) con ETag.
+# "memory" para un solo worker; "sqlite" comparte las invalidaciones entre workers
+# del mismo host a través de CATALOG_CACHE_PATH.
+CATALOG_CACHE_BACKEND = os.getenv("CATALOG_CACHE_BACKEND", "memory")
+CATALOG_CACHE_PATH = os.getenv("CATALOG_CACHE_PATH", "/tmp/catalog_cache.db")
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "3600"))
+
+# Máximo de eventos por lote en POST /routes/sync
+SYNC_MAX_EVENTS = int(os.getenv("SYNC_MAX_EVENTS", "10000"))
+
+# Reintentos cuando el UPDATE de un vehículo encuentra otra versión (escritura concurrente)
+VEHICLE_UPDATE_RETRIES = int(os.getenv("VEHICLE_UPDATE_RETRIES", "3"))
+
+# Filas por lectura del cursor del servidor en los listados con ?stream=ndjson|json
+LIST_STREAM_CHUNK_SIZE = int(os.getenv("LIST_STREAM_CHUNK_SIZE", "1000"))
+
+# Filas por bloque en app/scripts/export_data.py (CSV/Parquet/Arrow)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "50000"))
+
+# Reportes Excel en segundo plano (POST /vehicles/{id}/reports): tareas que los generan,
+# máximo de trabajos en cola, trabajos recordados para consultar su estado y carpeta
+# donde se guardan los archivos por vehículo y sello de datos
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_MAX_QUEUE = int(os.getenv("REPORT_JOB_MAX_QUEUE", "100"))
+REPORT_JOB_HISTORY = int(os.getenv("REPORT_JOB_HISTORY", "1000"))
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "/tmp/vehicle_reports")
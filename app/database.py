@@ -1,21 +1,86 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, inspect, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.config import (
+  DATABASE_URL, ASYNC_DATABASE_URL,
+  DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+  CHATBOT_DATABASE_URL, CHATBOT_DB_POOL_SIZE
+)
+from app.utils.poolMetricsUtil import pool_metrics, TimedQueuePool
 from sqlalchemy.ext.declarative import declarative_base
 
-engine = create_engine(DATABASE_URL)
+# Drivers async equivalentes a los drivers sync que usamos en DATABASE_URL
+ASYNC_DRIVERS = {
+  "mysql": "mysql+aiomysql",
+  "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str):
+  """Convierte una URL sync (mysql+pymysql://...) en su equivalente async (mysql+aiomysql://...)."""
+  sync_url = make_url(url)
+  return sync_url.set(drivername=ASYNC_DRIVERS.get(sync_url.get_backend_name(), sync_url.drivername))
+
+POOL_OPTIONS = {
+  "pool_size": DB_POOL_SIZE,
+  "max_overflow": DB_MAX_OVERFLOW,
+  "pool_timeout": DB_POOL_TIMEOUT,
+  "pool_recycle": DB_POOL_RECYCLE,
+  "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# Engine sync: lo usan las migraciones y los scripts de app/scripts
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine async: lo usan todos los routers para no bloquear el event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL or to_async_url(DATABASE_URL), poolclass=TimedQueuePool, **POOL_OPTIONS)
+pool_metrics.attach(async_engine.sync_engine.pool)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Engine de solo lectura para el SQL que genera el chat-bot: misma configuración de pool,
+# pero con pool propio (no compite con los CRUD) y sesiones en modo read-only
+readonly_engine = create_async_engine(
+  to_async_url(CHATBOT_DATABASE_URL or DATABASE_URL),
+  **{**POOL_OPTIONS, "pool_size": CHATBOT_DB_POOL_SIZE, "max_overflow": 0}
+)
+
+@event.listens_for(readonly_engine.sync_engine, "connect")
+def _set_read_only(dbapi_connection, connection_record):
+  cursor = dbapi_connection.cursor()
+  if readonly_engine.dialect.name == "mysql":
+    cursor.execute("SET SESSION TRANSACTION READ ONLY")
+  elif readonly_engine.dialect.name == "sqlite":
+    cursor.execute("PRAGMA query_only = ON")
+  cursor.close()
+
 Base = declarative_base()
 
-def get_db():
-  db = SessionLocal()
-  try:
+async def get_db():
+  async with AsyncSessionLocal() as db:
     yield db
-  finally:
-    db.close()
     
     
 # Añade esto al final de database.py
-def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+# Revisión que corresponde al esquema que generaba create_all() antes de Alembic
+BASELINE_REVISION = "0001"
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def run_migrations():
+    """
+    Aplica las migraciones pendientes (equivalente a `alembic upgrade head`).
+
+    Las bases creadas con el antiguo create_all() no tienen tabla alembic_version:
+    se marcan en la revisión base para aplicar solo los cambios posteriores.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        inspector = inspect(connection)
+        if inspector.has_table("Vehicle") and not inspector.has_table("alembic_version"):
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
@@ -1,13 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.utils.iaUtil import manejar_pregunta
-from app.database import create_tables
+from app.utils.iaUtil import close_client
+from app.database import run_migrations, readonly_engine
+from app.config import RUN_MIGRATIONS_ON_STARTUP
+from app.services.routeEnrichmentService import route_enrichment_worker
+from app.services.reportJobService import report_job_worker
 from app.routers import vehicleRoutes
 
 
-from app.routers import roleRoutes, brandRoutes, modelRoutes, descriptionRoutes, userRoutes, maintenanceRoutes, routeRoutes, fuelStopRoutes
+from app.routers import roleRoutes, brandRoutes, modelRoutes, descriptionRoutes, userRoutes, maintenanceRoutes, routeRoutes, fuelStopRoutes, metricsRoutes, chatBotRoutes, analyticsRoutes
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  # Worker que calcula en segundo plano las estimaciones de las rutas finalizadas
+  await route_enrichment_worker.start()
+  # Reportes Excel pedidos con POST /vehicles/{id}/reports
+  await report_job_worker.start()
+  yield
+  await report_job_worker.stop()
+  await route_enrichment_worker.stop()
+  await close_client()
+  await readonly_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(brandRoutes.router)
 app.include_router(modelRoutes.router)
 app.include_router(descriptionRoutes.router)
@@ -17,8 +33,12 @@ app.include_router(userRoutes.router)
 app.include_router(maintenanceRoutes.router)
 app.include_router(routeRoutes.router)
 app.include_router(fuelStopRoutes.router)
-# Llama a la función al iniciar
-create_tables()
+app.include_router(metricsRoutes.router)
+app.include_router(chatBotRoutes.router)
+app.include_router(analyticsRoutes.router)
+# Aplica las migraciones pendientes al iniciar
+if RUN_MIGRATIONS_ON_STARTUP:
+  run_migrations()
 
 app.add_middleware(
   CORSMiddleware,
@@ -32,7 +52,3 @@ app.add_middleware(
 @app.get("/")
 def root():
   return {"message": "Hello World"}
-
-@app.post("/chat-bot")
-def chat_bot(message: str):
-  return manejar_pregunta(message)
\ No newline at end of file
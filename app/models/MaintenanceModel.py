@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Time, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Time, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from app.database import Base
@@ -9,6 +9,9 @@ from app.models.MaintenanceStatus import MaintenanceStatus
 
 class Maintenance(Base):
     __tablename__ = "Maintenance"
+    __table_args__ = (
+        Index("ix_Maintenance_id_vehicle_fk_start_time", "id_vehicle_fk", "start_time"),
+    )
 
     # Campos
     id_maintenance = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -20,7 +23,7 @@ class Maintenance(Base):
     estimated_time = Column(Time, nullable=False)
     end_time = Column(DateTime, nullable=True)
     
-    status = Column(Enum(MaintenanceStatus, create_constraint=True, native_enum=False), nullable=False)
+    status = Column(Enum(MaintenanceStatus, create_constraint=True, native_enum=False), nullable=False, index=True)
 
     #Model usuario faltante 
    
@@ -0,0 +1,7 @@
+from enum import Enum as PyEnum
+
+class RouteEnrichmentStatus(str, PyEnum):
+    PENDING = "Pending"
+    RUNNING = "Running"
+    DONE = "Done"
+    FAILED = "Failed"
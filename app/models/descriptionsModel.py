@@ -9,7 +9,7 @@ class Description(Base):
     id_description = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(100), nullable=False)
     
-    id_model_fk = Column(Integer, ForeignKey("Model.id_model"), nullable=False)
+    id_model_fk = Column(Integer, ForeignKey("Model.id_model"), nullable=False, index=True)
     
     model = relationship("Model", back_populates="descriptions")
     vehicles = relationship("Vehicle", back_populates="description")
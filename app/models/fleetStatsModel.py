@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Date, DateTime, Double, ForeignKey
+from app.database import Base
+
+# Tablas de resumen mantenidas de forma incremental al crear, cerrar, editar o borrar
+# rutas y recargas (FleetStatsRepository). Las consultas del chat-bot las usan en lugar de agregar
+# sobre Route/FuelStop completas.
+
+
+class VehicleDailyStats(Base):
+    __tablename__ = "VehicleDailyStats"
+
+    id_vehicle_fk = Column(Integer, ForeignKey("Vehicle.id_vehicle"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+
+    routes_completed = Column(Integer, nullable=False, server_default="0")
+    km = Column(Integer, nullable=False, server_default="0")
+    liters_consumed = Column(Double, nullable=False, server_default="0")
+    liters_added = Column(Double, nullable=False, server_default="0")
+    total_duration = Column(Double, nullable=False, server_default="0")  # horas
+    # Rutas ya evaluadas por OpenRouteService y cuántas llegaron a tiempo / en distancia
+    routes_evaluated = Column(Integer, nullable=False, server_default="0")
+    on_time_routes = Column(Integer, nullable=False, server_default="0")
+    on_distance_routes = Column(Integer, nullable=False, server_default="0")
+
+
+class DriverStats(Base):
+    __tablename__ = "DriverStats"
+
+    id_user_fk = Column(Integer, ForeignKey("User.id_usuario"), primary_key=True)
+
+    routes_completed = Column(Integer, nullable=False, server_default="0")
+    km = Column(Integer, nullable=False, server_default="0")
+    liters_consumed = Column(Double, nullable=False, server_default="0")
+    liters_added = Column(Double, nullable=False, server_default="0")
+    total_duration = Column(Double, nullable=False, server_default="0")  # horas
+    routes_evaluated = Column(Integer, nullable=False, server_default="0")
+    on_time_routes = Column(Integer, nullable=False, server_default="0")
+    on_distance_routes = Column(Integer, nullable=False, server_default="0")
+    last_route_at = Column(DateTime, nullable=True)
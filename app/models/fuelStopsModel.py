@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, DECIMAL, Double, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from app.database import Base
@@ -6,25 +6,35 @@ from datetime import datetime
 
 class FuelStop(Base):
     __tablename__ = "FuelStop"
+    __table_args__ = (
+        # Paradas de una ruta ordenadas por hora (finish_refueling, reportes)
+        Index("ix_FuelStop_id_route_fk_stop_time", "id_route_fk", "stop_time"),
+        # Búsquedas por radio / bounding box sobre el punto de la parada
+        Index("ix_FuelStop_stop_point", "Latitude_stop", "Longitude_stop"),
+    )
 
     id_fuel_stop = Column(Integer, primary_key=True, index=True, autoincrement=True)
     id_route_fk = Column(Integer, ForeignKey("Route.id_route"), nullable=False)
     
-    Latitude_stop = Column(String(255), nullable=False)
-    Longitude_stop = Column(String(255), nullable=False)
+    # Coordenadas en grados decimales
+    Latitude_stop = Column(Double, nullable=False)
+    Longitude_stop = Column(Double, nullable=False)
     stop_time = Column(DateTime, nullable=False)
     
     resume_time = Column(DateTime, nullable=True)
     
     start_time = Column(DateTime, nullable=True)
-    Latitude_start = Column(String(255), nullable=True)
-    Longitude_start = Column(String(255), nullable=True)
+    Latitude_start = Column(Double, nullable=True)
+    Longitude_start = Column(Double, nullable=True)
     
     current_km = Column(Integer, nullable=True)
     image_km = Column(String(255), nullable=True)
     
     liters_added = Column(DECIMAL(5, 2), nullable=False)
 
+    # Sube en cada UPDATE (ver Route.revision)
+    revision = Column(Integer, nullable=False, server_default="1", onupdate=text("revision + 1"))
+
     # Relación con la tabla Route
     route = relationship("Route", back_populates="fuel_stops")
 
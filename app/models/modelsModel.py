@@ -8,7 +8,7 @@ class Model(Base):
     id_model = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(50), nullable=False)
     
-    id_brand_fk = Column(Integer, ForeignKey("Brand.id_brand"), nullable=False)
+    id_brand_fk = Column(Integer, ForeignKey("Brand.id_brand"), nullable=False, index=True)
     
     brand = relationship("Brand", back_populates="models")
     descriptions = relationship("Description", back_populates="model")
@@ -1,24 +1,36 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Double
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Double, Enum, Index, case, and_, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from app.database import Base
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
 
 class Route(Base):
     __tablename__ = "Route"
+    __table_args__ = (
+        # Historial de rutas por vehículo (reportes, filtros por rango de fechas)
+        Index("ix_Route_id_vehicle_fk_start_time", "id_vehicle_fk", "start_time"),
+        # KPIs de /analytics por vehículo o conductor en un rango de fechas de fin
+        Index("ix_Route_id_vehicle_fk_end_time", "id_vehicle_fk", "end_time"),
+        Index("ix_Route_id_user_fk_end_time", "id_user_fk", "end_time"),
+        # Búsquedas por radio / bounding box (rango sobre latitud, filtro de longitud en el índice)
+        Index("ix_Route_start_point", "latitude_start", "longitude_start"),
+        Index("ix_Route_end_point", "latitude_end", "longitude_end"),
+    )
 
     id_route = Column(Integer, primary_key=True, index=True, autoincrement=True)
     id_vehicle_fk = Column(Integer, ForeignKey("Vehicle.id_vehicle"), nullable=False)
-    id_user_fk = Column(Integer, ForeignKey("User.id_usuario"), nullable=False)
+    id_user_fk = Column(Integer, ForeignKey("User.id_usuario"), nullable=False, index=True)
     description = Column(String(255), nullable=False)
    
-    latitude_start = Column(String(50), nullable=True)
-    longitude_start = Column(String(50), nullable=True)
+    # Coordenadas en grados decimales
+    latitude_start = Column(Double, nullable=True)
+    longitude_start = Column(Double, nullable=True)
     
-    latitude_end = Column(String(50), nullable=True)
-    longitude_end = Column(String(50), nullable=True)
+    latitude_end = Column(Double, nullable=True)
+    longitude_end = Column(Double, nullable=True)
     
-    start_time = Column(DateTime, nullable=True)
-    end_time = Column(DateTime, nullable=True)
+    start_time = Column(DateTime, nullable=True, index=True)
+    end_time = Column(DateTime, nullable=True, index=True)  # rangos de fechas de /analytics
     estimated_time = Column(Double, nullable=True)
     total_duration = Column(Double, nullable=True)
     on_time = Column(Boolean)
@@ -33,6 +45,16 @@ class Route(Base):
     
     liters_consumed = Column(Double, nullable=True)
     
+    # Estado del cálculo de estimated_km/estimated_time/on_time/on_distance
+    # (Pending mientras el worker de enriquecimiento no lo haya procesado)
+    enrichment_status = Column(Enum(RouteEnrichmentStatus, create_constraint=True, native_enum=False), nullable=True, index=True)
+    # Cuándo un worker la pasó a Running; pasado ROUTE_ENRICHMENT_LEASE otro la puede retomar
+    enrichment_claimed_at = Column(DateTime, nullable=True)
+
+    # Sube en cada UPDATE (ORM o update()); con el número de filas es el sello de cambios
+    # de la caché de reportes (VehicleRepository.get_report_watermark)
+    revision = Column(Integer, nullable=False, server_default="1", onupdate=text("revision + 1"))
+    
     
     
     
@@ -51,6 +73,23 @@ class Route(Base):
         if self.start_km is not None and self.end_km is not None:
             return self.end_km - self.start_km
         return 0
+
+    @total_km.expression
+    def total_km(cls):
+        """Misma regla en SQL para poder sumar y agrupar en la base de datos."""
+        return case(
+            (and_(cls.start_km.isnot(None), cls.end_km.isnot(None)), cls.end_km - cls.start_km),
+            else_=0
+        )
+
+    @hybrid_property
+    def is_completed(self):
+        """end_route siempre guarda la imagen del kilometraje final; start_route la deja vacía."""
+        return bool(self.image_end_km)
+
+    @is_completed.expression
+    def is_completed(cls):
+        return and_(cls.image_end_km.isnot(None), cls.image_end_km != "")
     
 
     
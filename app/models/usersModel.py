@@ -12,8 +12,8 @@ class User(Base):
   email = Column(String(100), nullable=False, unique=True)
   password = Column(String(255), nullable=False)
   
-  id_role_fk = Column(Integer, ForeignKey("Role.id_role"), nullable=False)
-  id_vehicle_fk = Column(Integer, ForeignKey("Vehicle.id_vehicle"), nullable=True)
+  id_role_fk = Column(Integer, ForeignKey("Role.id_role"), nullable=False, index=True)
+  id_vehicle_fk = Column(Integer, ForeignKey("Vehicle.id_vehicle"), nullable=True, index=True)
   
   routes = relationship("Route", back_populates="user")
   
\ No newline at end of file
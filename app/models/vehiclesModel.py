@@ -15,9 +15,9 @@ class Vehicle(Base):
 
     id_vehicle = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
-    id_model_fk = Column(Integer, ForeignKey("Model.id_model"), nullable=False)
-    id_description_fk = Column(Integer, ForeignKey("Description.id_description"), nullable=False)
-    id_brand_fk = Column(Integer, ForeignKey("Brand.id_brand"), nullable=False)
+    id_model_fk = Column(Integer, ForeignKey("Model.id_model"), nullable=False, index=True)
+    id_description_fk = Column(Integer, ForeignKey("Description.id_description"), nullable=False, index=True)
+    id_brand_fk = Column(Integer, ForeignKey("Brand.id_brand"), nullable=False, index=True)
     
     number_plate = Column(String(10), nullable=False)
     serial_number = Column(String(10), nullable=False)
@@ -33,8 +33,13 @@ class Vehicle(Base):
     brand = relationship("Brand", back_populates="vehicles")
     routes = relationship("Route", back_populates="vehicle")
     
-    route_status = Column(Enum(vehicleRoute, create_constraint=True, native_enum=False), default=vehicleRoute.OFF_ROUTE)
-    assignment_status = Column(Enum(VehicleAssignmentStatus, create_constraint=True, native_enum=False), default=VehicleAssignmentStatus.NOT_ASSIGNED)
+    route_status = Column(Enum(vehicleRoute, create_constraint=True, native_enum=False), default=vehicleRoute.OFF_ROUTE, index=True)
+    assignment_status = Column(Enum(VehicleAssignmentStatus, create_constraint=True, native_enum=False), default=VehicleAssignmentStatus.NOT_ASSIGNED, index=True)
+
+    # Control de concurrencia optimista: cada UPDATE del ORM lleva WHERE version = <leída>
+    # y la incrementa; si otro request escribió antes, el flush lanza StaleDataError
+    version = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
     
     
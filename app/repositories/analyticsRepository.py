@@ -0,0 +1,99 @@
+from sqlalchemy import select, func, case, cast, Integer, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from datetime import date, datetime, time, timedelta
+from app.models.routesModel import Route
+from app.models.vehiclesModel import Vehicle
+from app.models.usersModel import User
+from app.models.brandsModel import Brand
+from app.models.modelsModel import Model
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
+
+# strftime de SQLite / DATE_FORMAT de MySQL para cada cubeta de tiempo. Las semanas son
+# ISO 8601 (año ISO-Wnn); el strftime de SQLite no tiene %G/%V, ver iso_week_sqlite
+BUCKET_FORMATS = {
+    "sqlite": {"day": "%Y-%m-%d", "month": "%Y-%m"},
+    "mysql": {"day": "%Y-%m-%d", "week": "%x-W%v", "month": "%Y-%m"},
+}
+
+
+def iso_week_sqlite(column):
+    """
+    Semana ISO en SQLite, igual que DATE_FORMAT('%x-W%v') de MySQL: año y número de
+    semana del jueves de esa semana (lunes a domingo).
+    """
+    thursday = func.date(column, "-3 days", "weekday 4")
+    week = (cast(func.strftime("%j", thursday), Integer) - 1) // 7 + 1
+    return func.strftime("%Y", thursday, type_=String).concat("-W").concat(func.printf("%02d", week))
+
+
+class AnalyticsRepository:
+    """
+    KPIs de la flota agregados en la base de datos (GROUP BY sobre Route, con las
+    expresiones SQL de Route.total_km y Route.is_completed).
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _bucket(self, column, group_by: str):
+        dialect = self.db.bind.dialect.name
+        if dialect == "sqlite" and group_by == "week":
+            return iso_week_sqlite(column)
+        fmt = BUCKET_FORMATS.get(dialect, BUCKET_FORMATS["mysql"])[group_by]
+        if dialect == "sqlite":
+            return func.strftime(fmt, column)
+        return func.date_format(column, fmt)
+
+    def _group_columns(self, group_by: str, vehicle_id, day_column):
+        """(columna de grupo, columna de etiqueta, joins necesarios) para cada agrupación."""
+        if group_by == "vehicle":
+            return Vehicle.id_vehicle, Vehicle.number_plate, [(Vehicle, Vehicle.id_vehicle == vehicle_id)]
+        if group_by == "brand":
+            return Brand.id_brand, Brand.name, [(Vehicle, Vehicle.id_vehicle == vehicle_id), (Brand, Brand.id_brand == Vehicle.id_brand_fk)]
+        if group_by == "model":
+            return Model.id_model, Model.name, [(Vehicle, Vehicle.id_vehicle == vehicle_id), (Model, Model.id_model == Vehicle.id_model_fk)]
+        bucket = self._bucket(day_column, group_by)
+        return bucket, bucket, []
+
+    @staticmethod
+    def _range(from_date: date = None, to_date: date = None):
+        start = datetime.combine(from_date, time.min) if from_date else None
+        end = datetime.combine(to_date + timedelta(days=1), time.min) if to_date else None
+        return start, end
+
+    async def get_route_kpis(self, group_by: str, from_date: date = None, to_date: date = None, id_vehicle_fk: int = None, id_user_fk: int = None) -> List:
+        if group_by == "driver":
+            group, label, joins = User.id_usuario, User.first_name + " " + User.last_name, [(User, User.id_usuario == Route.id_user_fk)]
+        else:
+            group, label, joins = self._group_columns(group_by, Route.id_vehicle_fk, Route.end_time)
+
+        evaluated = Route.enrichment_status == RouteEnrichmentStatus.DONE
+        stmt = select(
+            group.label("group"),
+            label.label("label"),
+            func.count().label("routes_completed"),
+            func.sum(Route.total_km).label("km"),
+            func.sum(func.coalesce(Route.liters_consumed, 0)).label("liters_consumed"),
+            func.sum(func.coalesce(Route.total_duration, 0)).label("total_duration"),
+            func.sum(case((evaluated, 1), else_=0)).label("routes_evaluated"),
+            func.sum(case((evaluated & Route.on_time, 1), else_=0)).label("on_time_routes"),
+            func.sum(case((evaluated & Route.on_distance, 1), else_=0)).label("on_distance_routes"),
+        ).select_from(Route)
+        for target, onclause in joins:
+            stmt = stmt.join(target, onclause)
+
+        start, end = self._range(from_date, to_date)
+        stmt = stmt.where(Route.is_completed)
+        if start is not None:
+            stmt = stmt.where(Route.end_time >= start)
+        if end is not None:
+            stmt = stmt.where(Route.end_time < end)
+        if id_vehicle_fk is not None:
+            stmt = stmt.where(Route.id_vehicle_fk == id_vehicle_fk)
+        if id_user_fk is not None:
+            stmt = stmt.where(Route.id_user_fk == id_user_fk)
+
+        stmt = stmt.group_by(group, label).order_by(group)
+        result = await self.db.execute(stmt)
+        return result.all()
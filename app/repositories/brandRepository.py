@@ -1,34 +1,45 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.brandsModel import Brand
+from app.models.modelsModel import Model
+from app.utils.updateUtil import commit_changes
 
 class BrandRepository:
-  def __init__(self, db: Session) -> None:
+  def __init__(self, db: AsyncSession) -> None:
     self.db = db
     
     
     
-  def create_brand(self, brand: Brand) -> Brand:
+  async def create_brand(self, brand: Brand) -> Brand:
       self.db.add(brand)
-      self.db.commit()
-      self.db.refresh(brand)
+      await self.db.commit()
+      await self.db.refresh(brand)
       return brand
 
-  def get_brand_by_id(self, brand_id: int) -> Brand:
-     result = self.db.query(Brand).filter(Brand.id_brand == brand_id)
-     return result.first()
+  async def get_brand_by_id(self, brand_id: int) -> Brand:
+     result = await self.db.execute(select(Brand).filter(Brand.id_brand == brand_id))
+     return result.scalars().first()
   
-  def get_all_brands(self) -> list[Brand]:
-     return self.db.query(Brand).all()
+  async def get_all_brands(self) -> list[Brand]:
+     result = await self.db.execute(select(Brand))
+     return result.scalars().all()
 
-  def update_brand(self, brand: Brand) -> Brand:
-     self.db.merge(brand)
-     self.db.commit()
-     self.db.refresh(brand)
-     return brand
+  async def get_catalog_tree(self) -> list[Brand]:
+     # Marcas, modelos y descripciones en tres consultas fijas (una por nivel), sin importar el tamaño del catálogo
+     result = await self.db.execute(
+        select(Brand)
+        .options(selectinload(Brand.models).selectinload(Model.descriptions))
+        .order_by(Brand.id_brand)
+     )
+     return result.scalars().all()
+
+  async def update_brand(self, brand: Brand) -> Brand:
+     return await commit_changes(self.db, brand)
   
-  def delete_brand(self, brand: Brand) -> bool:
-     self.db.delete(brand)
-     self.db.commit()
+  async def delete_brand(self, brand: Brand) -> bool:
+     await self.db.delete(brand)
+     await self.db.commit()
      return True
     
     
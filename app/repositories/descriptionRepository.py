@@ -1,39 +1,39 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.descriptionsModel import Description
 from app.models.modelsModel import Model
+from app.utils.updateUtil import commit_changes
 
 class DescriptionRepository:
-  def __init__(self, db: Session) -> None:
+  def __init__(self, db: AsyncSession) -> None:
     self.db = db    
     
-  def create_description(self, description: Description) -> Description:
+  async def create_description(self, description: Description) -> Description:
     self.db.add(description)
-    self.db.commit()
-    self.db.refresh(description)
-    self.db.refresh(description, attribute_names=['model'])
+    await self.db.commit()
+    await self.db.refresh(description)
+    await self.db.refresh(description, attribute_names=['model'])
     return description
   
-  def get_description_by_id(self, description_id: int) -> Description:
-    result = self.db.query(Description).options(joinedload(Description.model)).filter(Description.id_description == description_id)
-    return result.first()
+  async def get_description_by_id(self, description_id: int) -> Description:
+    result = await self.db.execute(select(Description).options(joinedload(Description.model)).filter(Description.id_description == description_id))
+    return result.scalars().first()
 
-  def get_descriptions_by_model_id(self, description_id: int) -> list[Description]:
-    return self.db.query(Description).options(joinedload(Description.model)).filter(Description.id_model_fk == description_id).all()
+  async def get_descriptions_by_model_id(self, description_id: int) -> list[Description]:
+    result = await self.db.execute(select(Description).options(joinedload(Description.model)).filter(Description.id_model_fk == description_id))
+    return result.scalars().all()
   
-  def get_all_descriptions(self) -> list[Description]:
-    return self.db.query(Description).options(joinedload(Description.model)).all()
+  async def get_all_descriptions(self) -> list[Description]:
+    result = await self.db.execute(select(Description).options(joinedload(Description.model)))
+    return result.scalars().all()
 
-  def update_description(self, description: Description) -> Description:
-    self.db.merge(description)
-    self.db.commit()
-    self.db.refresh(description)
-    
-    self.db.refresh(description, attribute_names=['model'])
-    return description
+  async def update_description(self, description: Description) -> Description:
+    return await commit_changes(self.db, description, ['model'])
 
-  def delete_description(self, description: Description) -> bool:
-    self.db.delete(description)
-    self.db.commit()
+  async def delete_description(self, description: Description) -> bool:
+    await self.db.delete(description)
+    await self.db.commit()
     return True
   
   
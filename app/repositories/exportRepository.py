@@ -0,0 +1,64 @@
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, List, Optional
+from sqlalchemy import select, type_coerce, Enum, String, Row
+from sqlalchemy.orm import Session
+from app.models.routesModel import Route
+from app.models.fuelStopsModel import FuelStop
+
+
+def export_columns(table) -> list:
+    """
+    Columnas de la tabla tal como están guardadas. Los Enum se leen como texto (el
+    valor guardado) para no crear un objeto enum por fila.
+    """
+    return [
+        type_coerce(column, String).label(column.name) if isinstance(column.type, Enum) else column
+        for column in table.c
+    ]
+
+
+class ExportRepository:
+    """
+    Lecturas de las tablas completas para las exportaciones de app/scripts/export_data.py.
+
+    Usa el engine sync (como el resto de app/scripts) y yield_per, que en MySQL abre un
+    cursor del servidor: en memoria solo queda el bloque actual.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def _date_range(self, stmt, column, from_date: Optional[date], to_date: Optional[date]):
+        if from_date is not None:
+            stmt = stmt.filter(column >= datetime.combine(from_date, time.min))
+        if to_date is not None:
+            stmt = stmt.filter(column < datetime.combine(to_date + timedelta(days=1), time.min))
+        return stmt
+
+    def _partitions(self, stmt, chunk_size: int) -> Iterator[List[Row]]:
+        result = self.db.execute(stmt.execution_options(yield_per=chunk_size))
+        try:
+            for rows in result.partitions():
+                yield rows
+        finally:
+            result.close()
+
+    def route_columns(self) -> list:
+        return list(Route.__table__.c)
+
+    def fuel_stop_columns(self) -> list:
+        return list(FuelStop.__table__.c)
+
+    def iter_routes(self, from_date: Optional[date] = None, to_date: Optional[date] = None, id_vehicle_fk: Optional[int] = None, chunk_size: int = 50000) -> Iterator[List[Row]]:
+        stmt = select(*export_columns(Route.__table__))
+        stmt = self._date_range(stmt, Route.start_time, from_date, to_date)
+        if id_vehicle_fk is not None:
+            stmt = stmt.filter(Route.id_vehicle_fk == id_vehicle_fk)
+        return self._partitions(stmt.order_by(Route.id_route), chunk_size)
+
+    def iter_fuel_stops(self, from_date: Optional[date] = None, to_date: Optional[date] = None, id_vehicle_fk: Optional[int] = None, chunk_size: int = 50000) -> Iterator[List[Row]]:
+        stmt = select(*export_columns(FuelStop.__table__))
+        stmt = self._date_range(stmt, FuelStop.stop_time, from_date, to_date)
+        if id_vehicle_fk is not None:
+            stmt = stmt.join(Route, FuelStop.id_route_fk == Route.id_route).filter(Route.id_vehicle_fk == id_vehicle_fk)
+        return self._partitions(stmt.order_by(FuelStop.id_fuel_stop), chunk_size)
@@ -0,0 +1,167 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Iterable, NamedTuple, Optional, Tuple
+from sqlalchemy import update, select, func, case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.fleetStatsModel import VehicleDailyStats, DriverStats
+from app.models.routesModel import Route
+from app.models.fuelStopsModel import FuelStop
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
+
+
+class Contribution(NamedTuple):
+    """Lo que suma una ruta finalizada o una recarga a VehicleDailyStats y DriverStats."""
+    id_vehicle: int
+    id_user: int
+    day: date
+    deltas: dict
+    # Solo las rutas: para recalcular DriverStats.last_route_at al quitarlas
+    id_route: Optional[int] = None
+    end_time: Optional[datetime] = None
+
+
+def _route_finished_deltas(route: Route) -> dict:
+    return {
+        "routes_completed": 1,
+        "km": route.total_km,
+        "liters_consumed": route.liters_consumed or 0,
+        "total_duration": route.total_duration or 0,
+    }
+
+
+def _route_evaluated_deltas(route: Route) -> dict:
+    return {
+        "routes_evaluated": 1,
+        "on_time_routes": 1 if route.on_time else 0,
+        "on_distance_routes": 1 if route.on_distance else 0,
+    }
+
+
+def route_contribution(route: Route) -> Optional[Contribution]:
+    """Aporte de la ruta con sus valores actuales; None si no está finalizada."""
+    if not route.is_completed or route.end_time is None:
+        return None
+    deltas = _route_finished_deltas(route)
+    if route.enrichment_status == RouteEnrichmentStatus.DONE:
+        deltas.update(_route_evaluated_deltas(route))
+    return Contribution(route.id_vehicle_fk, route.id_user_fk, route.end_time.date(), deltas, route.id_route, route.end_time)
+
+
+def refuel_contribution(fuel_stop: FuelStop, route: Route) -> Optional[Contribution]:
+    """Litros cargados en la parada, al vehículo y conductor de su ruta."""
+    if route is None or fuel_stop.liters_added is None:
+        return None
+    day = (fuel_stop.resume_time or fuel_stop.stop_time).date()
+    return Contribution(route.id_vehicle_fk, route.id_user_fk, day, {"liters_added": float(fuel_stop.liters_added)})
+
+
+class FleetStatsRepository:
+    """
+    Incrementos de VehicleDailyStats/DriverStats. No hace commit: los servicios lo
+    llaman antes de guardar la ruta o el vehículo para que ambos cambios vayan en
+    la misma transacción.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def _increment(self, model, keys: dict, deltas: dict, latest: dict = None) -> None:
+        """
+        Suma `deltas` a la fila `keys` de una tabla de resumen, creándola si no existe;
+        las columnas de `latest` se quedan con el mayor entre el valor guardado y el nuevo.
+
+        Se hace con un único INSERT ... ON DUPLICATE KEY / ON CONFLICT para que dos
+        requests concurrentes no pierdan incrementos.
+        """
+        table = model.__table__
+        latest = latest or {}
+        values = {**keys, **deltas, **latest}
+        dialect = self.db.bind.dialect.name
+        if dialect == "mysql":
+            stmt = mysql_insert(model).values(**values)
+            stmt = stmt.on_duplicate_key_update({
+                **{c: table.c[c] + stmt.inserted[c] for c in deltas},
+                **{c: func.greatest(func.coalesce(table.c[c], stmt.inserted[c]), stmt.inserted[c]) for c in latest}
+            })
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(model).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={
+                    **{c: table.c[c] + stmt.excluded[c] for c in deltas},
+                    # max() de SQLite con dos argumentos es el escalar, no el agregado
+                    **{c: func.max(func.coalesce(table.c[c], stmt.excluded[c]), stmt.excluded[c]) for c in latest}
+                }
+            )
+        else:
+            result = await self.db.execute(
+                update(model)
+                .where(*[table.c[c] == v for c, v in keys.items()])
+                .values({
+                    **{c: table.c[c] + v for c, v in deltas.items()},
+                    **{c: case((table.c[c].is_(None) | (table.c[c] < v), v), else_=table.c[c]) for c, v in latest.items()}
+                })
+            )
+            if result.rowcount:
+                return
+            stmt = model.__table__.insert().values(**values)
+        await self.db.execute(stmt)
+
+    async def _refresh_last_route_at(self, id_user: int, removed_route: int) -> None:
+        """last_route_at del conductor sin la ruta que se quita (su fila en Route aún no cambió)."""
+        latest = (
+            select(func.max(Route.end_time))
+            .where(Route.id_user_fk == id_user, Route.is_completed, Route.id_route != removed_route)
+            .scalar_subquery()
+        )
+        await self.db.execute(
+            update(DriverStats)
+            .where(DriverStats.id_user_fk == id_user)
+            .values(last_route_at=latest)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def record_route_evaluated(self, route: Route) -> None:
+        """Suma el resultado on_time/on_distance cuando ya se calcularon las estimaciones de la ruta."""
+        deltas = _route_evaluated_deltas(route)
+        await self._increment(VehicleDailyStats, {"id_vehicle_fk": route.id_vehicle_fk, "day": route.end_time.date()}, deltas)
+        await self._increment(DriverStats, {"id_user_fk": route.id_user_fk}, deltas)
+
+    async def record_change(self, old: Optional[Contribution], new: Optional[Contribution]) -> None:
+        """
+        Ajusta los resúmenes cuando se crea, edita, finaliza o borra una ruta o recarga:
+        resta lo que aportaba la fila antes (`old`) y suma lo que aporta después (`new`),
+        con route_contribution/refuel_contribution. None es que no aportaba nada.
+        """
+        if old != new:
+            await self.record_changes([(old, new)])
+
+    async def record_changes(self, changes: Iterable[Tuple[Optional[Contribution], Optional[Contribution]]]) -> None:
+        """
+        record_change para un lote completo: suma primero en memoria y hace un solo
+        upsert por vehículo/día y por conductor.
+        """
+        vehicle_days = defaultdict(Counter)
+        drivers = defaultdict(Counter)
+        last_route = {}
+        for old, new in changes:
+            if old is not None and old.id_route is not None:
+                await self._refresh_last_route_at(old.id_user, old.id_route)
+            for contribution, sign in ((old, -1), (new, 1)):
+                if contribution is None:
+                    continue
+                for column, value in contribution.deltas.items():
+                    vehicle_days[(contribution.id_vehicle, contribution.day)][column] += sign * value
+                    drivers[contribution.id_user][column] += sign * value
+            if new is not None and new.end_time is not None:
+                last_route[new.id_user] = max(last_route.get(new.id_user, new.end_time), new.end_time)
+
+        for (id_vehicle, day), deltas in vehicle_days.items():
+            if any(deltas.values()):
+                await self._increment(VehicleDailyStats, {"id_vehicle_fk": id_vehicle, "day": day}, dict(deltas))
+        for id_user, deltas in drivers.items():
+            latest = {"last_route_at": last_route[id_user]} if id_user in last_route else None
+            if any(deltas.values()) or latest:
+                await self._increment(DriverStats, {"id_user_fk": id_user}, dict(deltas), latest=latest)
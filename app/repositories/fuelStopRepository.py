@@ -1,38 +1,114 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, Row
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.fuelStopsModel import FuelStop
 from app.models.routesModel import Route
+from app.utils.paginationUtil import apply_keyset
+from datetime import datetime
+from app.utils.updateUtil import commit_changes
+
+# Columnas de las lecturas de FuelStopOut, con los nombres del esquema; de la ruta solo
+# hace falta la descripción
+FUEL_STOP_OUT_COLUMNS = (
+    FuelStop.id_route_fk,
+    FuelStop.Latitude_stop.label("latitude_stop"),
+    FuelStop.Longitude_stop.label("longitude_stop"),
+    FuelStop.stop_time,
+    FuelStop.resume_time,
+    FuelStop.start_time,
+    FuelStop.Latitude_start.label("latitude_start"),
+    FuelStop.Longitude_start.label("longitude_start"),
+    FuelStop.liters_added,
+    FuelStop.id_fuel_stop,
+    Route.description.label("route_name"),
+)
+
+
+def select_fuel_stop_rows():
+    return select(*FUEL_STOP_OUT_COLUMNS).outerjoin(FuelStop.route)
 
 
 class FuelStopRepository:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: AsyncSession) -> None:
         self.db = db
 
-    def create_fuel_stop(self, fuel_stop: FuelStop) -> FuelStop:
+    async def create_fuel_stop(self, fuel_stop: FuelStop) -> FuelStop:
         self.db.add(fuel_stop)
-        self.db.commit()
-        self.db.refresh(fuel_stop)
-        self.db.refresh(fuel_stop, attribute_names=['route'])
+        await self.db.commit()
+        await self.db.refresh(fuel_stop)
+        await self.db.refresh(fuel_stop, attribute_names=['route'])
         return fuel_stop
     
-    def get_fuel_stop_by_id(self, fuel_stop_id: int) -> FuelStop:
-        result = self.db.query(FuelStop).options(joinedload(FuelStop.route)).filter(FuelStop.id_fuel_stop == fuel_stop_id)
+    async def add_fuel_stop(self, fuel_stop: FuelStop) -> FuelStop:
+        # Sin commit: el servicio confirma la parada junto con el estado del vehículo
+        self.db.add(fuel_stop)
+        await self.db.flush()
+        return fuel_stop
+
+    async def commit(self) -> None:
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
+    async def get_fuel_stop_by_id(self, fuel_stop_id: int) -> FuelStop:
+        result = await self.db.execute(select(FuelStop).options(joinedload(FuelStop.route)).filter(FuelStop.id_fuel_stop == fuel_stop_id))
+        return result.scalars().first()
+
+    async def get_fuel_stop_row(self, fuel_stop_id: int) -> Row:
+        """Parada como fila de FUEL_STOP_OUT_COLUMNS (solo lectura)."""
+        result = await self.db.execute(select_fuel_stop_rows().filter(FuelStop.id_fuel_stop == fuel_stop_id))
         return result.first()
     
-    def get_fuel_stops_by_route_id(self, route_id: int) -> list[FuelStop]:
-        return self.db.query(FuelStop).options(joinedload(FuelStop.route)).filter(FuelStop.id_route_fk == route_id).all()
+    async def get_fuel_stops_by_route_id(self, route_id: int) -> list[Row]:
+        result = await self.db.execute(select_fuel_stop_rows().filter(FuelStop.id_route_fk == route_id))
+        return result.all()
     
-    def get_all_fuel_stops(self) -> list[FuelStop]:
-        return self.db.query(FuelStop).options(joinedload(FuelStop.route)).all()
+    def _filter_fuel_stops(self, stmt, id_route_fk: int = None, id_vehicle_fk: int = None, stop_from: datetime = None, stop_to: datetime = None):
+        if id_route_fk is not None:
+            stmt = stmt.filter(FuelStop.id_route_fk == id_route_fk)
+        if id_vehicle_fk is not None:
+            stmt = stmt.filter(FuelStop.id_route_fk.in_(select(Route.id_route).filter(Route.id_vehicle_fk == id_vehicle_fk)))
+        if stop_from is not None:
+            stmt = stmt.filter(FuelStop.stop_time >= stop_from)
+        if stop_to is not None:
+            stmt = stmt.filter(FuelStop.stop_time < stop_to)
+        return stmt
+
+    async def get_all_fuel_stops(self, id_route_fk: int = None, id_vehicle_fk: int = None, stop_from: datetime = None, stop_to: datetime = None, after: int = None, limit: int = None) -> list[Row]:
+        stmt = self._filter_fuel_stops(select_fuel_stop_rows(), id_route_fk, id_vehicle_fk, stop_from, stop_to)
+        result = await self.db.execute(apply_keyset(stmt, FuelStop.id_fuel_stop, after, limit))
+        return result.all()
+
+    async def stream_fuel_stops(self, id_route_fk: int = None, id_vehicle_fk: int = None, stop_from: datetime = None, stop_to: datetime = None, after: int = None, limit: int = None, chunk_size: int = 1000):
+        """
+        Mismas filas que get_all_fuel_stops, leídas por bloques con un cursor del servidor
+        (yield_per); `limit` es el total de filas, sin la fila extra del keyset.
+        """
+        stmt = self._filter_fuel_stops(select_fuel_stop_rows(), id_route_fk, id_vehicle_fk, stop_from, stop_to)
+        stmt = apply_keyset(stmt, FuelStop.id_fuel_stop, after)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield rows
     
-    def update_fuel_stop(self, fuel_stop: FuelStop) -> FuelStop:
-        self.db.merge(fuel_stop)
-        self.db.commit()
-        self.db.refresh(fuel_stop)
-        self.db.refresh(fuel_stop, attribute_names=['route'])
-        return fuel_stop
+    def _in_box(self, stmt, min_lat: float, max_lat: float, min_lon: float, max_lon: float):
+        # Rango sobre (Latitude_stop, Longitude_stop): lo resuelve ix_FuelStop_stop_point
+        return stmt.filter(FuelStop.Latitude_stop.between(min_lat, max_lat), FuelStop.Longitude_stop.between(min_lon, max_lon))
+
+    async def get_fuel_stops_in_box(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float, limit: int = None) -> list[Row]:
+        stmt = self._in_box(select_fuel_stop_rows(), min_lat, max_lat, min_lon, max_lon).order_by(FuelStop.id_fuel_stop)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.db.execute(stmt)
+        return result.all()
+    
+    async def update_fuel_stop(self, fuel_stop: FuelStop) -> FuelStop:
+        return await commit_changes(self.db, fuel_stop, ['route'])
     
-    def delete_fuel_stop(self, fuel_stop: FuelStop) -> bool:
-        self.db.delete(fuel_stop)
-        self.db.commit()
+    async def delete_fuel_stop(self, fuel_stop: FuelStop) -> bool:
+        await self.db.delete(fuel_stop)
+        await self.db.commit()
         return True
     
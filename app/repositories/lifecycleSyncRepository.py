@@ -0,0 +1,55 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, List
+from app.models.routesModel import Route
+from app.models.fuelStopsModel import FuelStop
+from app.models.vehiclesModel import Vehicle
+
+
+class LifecycleSyncRepository:
+    """
+    Lecturas en bloque y escritura en una sola transacción para los lotes de eventos
+    de POST /routes/sync. Nada se confirma hasta commit().
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def get_fuel_stops(self, fuel_stop_ids: Iterable[int]) -> List[FuelStop]:
+        ids = sorted(set(fuel_stop_ids))
+        if not ids:
+            return []
+        result = await self.db.execute(select(FuelStop).filter(FuelStop.id_fuel_stop.in_(ids)))
+        return result.scalars().all()
+
+    async def get_routes(self, route_ids: Iterable[int]) -> List[Route]:
+        ids = sorted(set(route_ids))
+        if not ids:
+            return []
+        result = await self.db.execute(select(Route).filter(Route.id_route.in_(ids)))
+        return result.scalars().all()
+
+    async def get_vehicles(self, vehicle_ids: Iterable[int]) -> List[Vehicle]:
+        # Sin bloqueo: los UPDATE comparan Vehicle.version y el servicio reintenta el lote
+        ids = sorted(set(vehicle_ids))
+        if not ids:
+            return []
+        result = await self.db.execute(
+            select(Vehicle).filter(Vehicle.id_vehicle.in_(ids)).execution_options(populate_existing=True)
+        )
+        return result.scalars().all()
+
+    async def add_all(self, objects: list) -> None:
+        """Inserta las rutas y paradas nuevas (el flush asigna sus IDs) sin confirmar."""
+        # Primero los UPDATE de los vehículos (compara versión): los INSERT con FK al
+        # vehículo toman un bloqueo compartido en InnoDB y dos lotes simultáneos se
+        # bloquearían entre sí al subir al exclusivo
+        await self.db.flush()
+        self.db.add_all(objects)
+        await self.db.flush()
+
+    async def commit(self) -> None:
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
@@ -1,36 +1,51 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.MaintenanceModel import Maintenance
+from app.models.MaintenanceStatus import MaintenanceStatus
+from app.utils.paginationUtil import apply_keyset
+from datetime import datetime
 from typing import List
+from app.utils.updateUtil import commit_changes
 
 class MaintenanceRepository:
-  def __init__(self, db: Session) -> None:
+  def __init__(self, db: AsyncSession) -> None:
     self.db = db
       
-  def create_maintenance(self, maintenance: Maintenance) -> Maintenance:
+  async def create_maintenance(self, maintenance: Maintenance) -> Maintenance:
     self.db.add(maintenance)
-    self.db.commit()
-    self.db.refresh(maintenance)
+    await self.db.commit()
+    await self.db.refresh(maintenance)
     return maintenance
   
-  def get_maintenance_by_id(self, maintenance_id: int) -> Maintenance:
-    return self.db.query(Maintenance).filter(Maintenance.id_maintenance == maintenance_id).first()
+  async def get_maintenance_by_id(self, maintenance_id: int) -> Maintenance:
+    result = await self.db.execute(select(Maintenance).filter(Maintenance.id_maintenance == maintenance_id))
+    return result.scalars().first()
   
-  def get_all_maintenances(self) -> List[Maintenance]:
-    return self.db.query(Maintenance).all()
+  async def get_all_maintenances(self, id_vehicle_fk: int = None, status: MaintenanceStatus = None, start_from: datetime = None, start_to: datetime = None, after: int = None, limit: int = None) -> List[Maintenance]:
+    stmt = select(Maintenance)
+    if id_vehicle_fk is not None:
+      stmt = stmt.filter(Maintenance.id_vehicle_fk == id_vehicle_fk)
+    if status is not None:
+      stmt = stmt.filter(Maintenance.status == status)
+    if start_from is not None:
+      stmt = stmt.filter(Maintenance.start_time >= start_from)
+    if start_to is not None:
+      stmt = stmt.filter(Maintenance.start_time < start_to)
+    result = await self.db.execute(apply_keyset(stmt, Maintenance.id_maintenance, after, limit))
+    return result.scalars().all()
   
-  def get_all_maintenances_by_vehicle(self, vehicle_id: int) -> List[Maintenance]:
-    return self.db.query(Maintenance).filter(Maintenance.id_vehicle_fk == vehicle_id).all()
+  async def get_all_maintenances_by_vehicle(self, vehicle_id: int) -> List[Maintenance]:
+    result = await self.db.execute(select(Maintenance).filter(Maintenance.id_vehicle_fk == vehicle_id))
+    return result.scalars().all()
   
-  def update_maintenance(self, maintenance: Maintenance) -> Maintenance:
-    self.db.merge(maintenance)
-    self.db.commit()
-    self.db.refresh(maintenance)
-    return maintenance
+  async def update_maintenance(self, maintenance: Maintenance) -> Maintenance:
+    return await commit_changes(self.db, maintenance)
   
-  def delete_maintenance(self, maintenance: Maintenance) -> bool:
-    self.db.delete(maintenance)
-    self.db.commit()
+  async def delete_maintenance(self, maintenance: Maintenance) -> bool:
+    await self.db.delete(maintenance)
+    await self.db.commit()
     return True
   
-  def get_maintenances_by_status(self, status: str) -> List[Maintenance]:
-    return self.db.query(Maintenance).filter(Maintenance.status == status).all()
\ No newline at end of file
+  async def get_maintenances_by_status(self, status: str) -> List[Maintenance]:
+    result = await self.db.execute(select(Maintenance).filter(Maintenance.status == status))
+    return result.scalars().all()
\ No newline at end of file
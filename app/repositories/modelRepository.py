@@ -1,35 +1,35 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.modelsModel import Model
 from app.models.brandsModel import Brand
+from app.utils.updateUtil import commit_changes
 
 class ModelRepository:
-  def __init__(self, db: Session) -> None:
+  def __init__(self, db: AsyncSession) -> None:
     self.db = db
     
-  def create_model(self, model: Model) -> Model:
+  async def create_model(self, model: Model) -> Model:
     self.db.add(model)
-    self.db.commit()
-    self.db.refresh(model)
+    await self.db.commit()
+    await self.db.refresh(model)
     
-    self.db.refresh(model, attribute_names=['brand'])
+    await self.db.refresh(model, attribute_names=['brand'])
     return model
   
-  def get_model_by_id(self, model_id: int) -> Model:
-    result = self.db.query(Model).options(joinedload(Model.brand)).filter(Model.id_model == model_id)
-    return result.first()
+  async def get_model_by_id(self, model_id: int) -> Model:
+    result = await self.db.execute(select(Model).options(joinedload(Model.brand)).filter(Model.id_model == model_id))
+    return result.scalars().first()
   
-  def get_all_models(self) -> list[Model]:
-    return self.db.query(Model).options(joinedload(Model.brand)).all()
+  async def get_all_models(self) -> list[Model]:
+    result = await self.db.execute(select(Model).options(joinedload(Model.brand)))
+    return result.scalars().all()
   
-  def update_model(self, model: Model) -> Model:
-    self.db.merge(model)
-    self.db.commit()
-    self.db.refresh(model)
-    # Carga explícita de la relación brand
-    self.db.refresh(model, attribute_names=['brand'])
-    return model
+  async def update_model(self, model: Model) -> Model:
+    # Solo se recarga brand si cambió id_brand_fk
+    return await commit_changes(self.db, model, ['brand'])
 
-  def delete_model(self, model: Model) -> bool:
-    self.db.delete(model)
-    self.db.commit()
+  async def delete_model(self, model: Model) -> bool:
+    await self.db.delete(model)
+    await self.db.commit()
     return True
\ No newline at end of file
@@ -1,30 +1,30 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.rolesModel import Role
+from app.utils.updateUtil import commit_changes
 
 class RoleRepository:
-  def __init__(self, db: Session) -> None:
+  def __init__(self, db: AsyncSession) -> None:
     self.db = db
     
-  def create_role(self, role: Role) -> Role:
+  async def create_role(self, role: Role) -> Role:
     self.db.add(role)
-    self.db.commit()
-    self.db.refresh(role)
+    await self.db.commit()
+    await self.db.refresh(role)
     return role
   
-  def get_role_by_id(self, role_id: int) -> Role:
-    result = self.db.query(Role).filter(Role.id_role == role_id)
-    return result.first()
+  async def get_role_by_id(self, role_id: int) -> Role:
+    result = await self.db.execute(select(Role).filter(Role.id_role == role_id))
+    return result.scalars().first()
   
-  def get_all_roles(self) -> list[Role]:
-    return self.db.query(Role).all()
+  async def get_all_roles(self) -> list[Role]:
+    result = await self.db.execute(select(Role))
+    return result.scalars().all()
   
-  def update_role(self, role: Role) -> Role:
-    self.db.merge(role)
-    self.db.commit()
-    self.db.refresh(role)
-    return role
+  async def update_role(self, role: Role) -> Role:
+    return await commit_changes(self.db, role)
   
-  def delete_role(self, role: Role) -> bool:
-    self.db.delete(role)
-    self.db.commit()
+  async def delete_role(self, role: Role) -> bool:
+    await self.db.delete(role)
+    await self.db.commit()
     return True
\ No newline at end of file
@@ -1,43 +1,145 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, update, or_, and_, not_, Row
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from datetime import datetime, timedelta
 from app.models.routesModel import Route
 from app.models.vehiclesModel import Vehicle
 from app.models.usersModel import User
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
+from app.utils.paginationUtil import apply_keyset
+from app.utils.updateUtil import commit_changes
+
+# Columnas de las lecturas de RouteOut: la ruta más la placa y el nombre del conductor,
+# sin cargar las entidades Vehicle y User completas (ni el hash de la contraseña)
+ROUTE_OUT_COLUMNS = (
+    *Route.__table__.c,
+    Vehicle.number_plate.label("name_vehicle"),
+    User.first_name.label("name_user"),
+)
+
+
+def select_route_rows():
+    return select(*ROUTE_OUT_COLUMNS).outerjoin(Route.vehicle).outerjoin(Route.user)
 
 
 class RouteRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_route(self, route: Route) -> Route:
+    async def create_route(self, route: Route) -> Route:
         self.db.add(route)
-        self.db.commit()
-        self.db.refresh(route)
-        self.db.refresh(route, attribute_names=["vehicle", "user"])
+        await self.db.commit()
+        await self.db.refresh(route)
+        await self.db.refresh(route, attribute_names=["vehicle", "user"])
         return route
     
-    def get_route_by_id(self, route_id: int) -> Route:
-        result = self.db.query(Route).options(
-            joinedload(Route.vehicle),
-            joinedload(Route.user)
-        ).filter(Route.id_route == route_id).first()
-        return result
+    async def add_route(self, route: Route) -> Route:
+        # Sin commit: el servicio confirma la ruta junto con el estado del vehículo
+        self.db.add(route)
+        await self.db.flush()
+        # Solo falta el conductor para la respuesta: una consulta por PK en vez de refresh
+        set_committed_value(route, "user", await self.db.get(User, route.id_user_fk))
+        return route
+
+    async def commit(self) -> None:
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
     
-    def get_all_routes(self) -> List[Route]:
-        return self.db.query(Route).options(
+    async def get_route_by_id(self, route_id: int) -> Route:
+        result = await self.db.execute(select(Route).options(
             joinedload(Route.vehicle),
             joinedload(Route.user)
-        ).all()
+        ).filter(Route.id_route == route_id))
+        return result.scalars().first()
+
+    async def get_route_row(self, route_id: int) -> Row:
+        """Ruta como fila de ROUTE_OUT_COLUMNS (solo lectura)."""
+        result = await self.db.execute(select_route_rows().filter(Route.id_route == route_id))
+        return result.first()
+    
+    def _filter_routes(self, stmt, id_vehicle_fk: int = None, id_user_fk: int = None, start_from: datetime = None, start_to: datetime = None, completed: bool = None):
+        if id_vehicle_fk is not None:
+            stmt = stmt.filter(Route.id_vehicle_fk == id_vehicle_fk)
+        if id_user_fk is not None:
+            stmt = stmt.filter(Route.id_user_fk == id_user_fk)
+        if start_from is not None:
+            stmt = stmt.filter(Route.start_time >= start_from)
+        if start_to is not None:
+            stmt = stmt.filter(Route.start_time < start_to)
+        if completed is not None:
+            stmt = stmt.filter(Route.is_completed if completed else not_(Route.is_completed))
+        return stmt
+
+    async def get_all_routes(self, id_vehicle_fk: int = None, id_user_fk: int = None, start_from: datetime = None, start_to: datetime = None, completed: bool = None, after: int = None, limit: int = None) -> List[Row]:
+        stmt = self._filter_routes(select_route_rows(), id_vehicle_fk, id_user_fk, start_from, start_to, completed)
+        result = await self.db.execute(apply_keyset(stmt, Route.id_route, after, limit))
+        return result.all()
+
+    async def stream_routes(self, id_vehicle_fk: int = None, id_user_fk: int = None, start_from: datetime = None, start_to: datetime = None, completed: bool = None, after: int = None, limit: int = None, chunk_size: int = 1000):
+        """
+        Mismas filas que get_all_routes, leídas por bloques con un cursor del servidor
+        (yield_per); `limit` es el total de filas, sin la fila extra del keyset.
+        """
+        stmt = self._filter_routes(select_route_rows(), id_vehicle_fk, id_user_fk, start_from, start_to, completed)
+        stmt = apply_keyset(stmt, Route.id_route, after)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield rows
         
-    def update_route(self, route: Route) -> Route:
-        self.db.merge(route)
-        self.db.commit()
-        self.db.refresh(route)
-        return route
+    def _in_box(self, stmt, min_lat: float, max_lat: float, min_lon: float, max_lon: float, point: str = "start"):
+        # Rango sobre (latitude_*, longitude_*): lo resuelve ix_Route_start_point / ix_Route_end_point
+        latitude, longitude = (Route.latitude_start, Route.longitude_start) if point == "start" else (Route.latitude_end, Route.longitude_end)
+        return stmt.filter(latitude.between(min_lat, max_lat), longitude.between(min_lon, max_lon))
+
+    async def get_routes_in_box(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float, point: str = "start", limit: int = None) -> List[Row]:
+        stmt = self._in_box(select_route_rows(), min_lat, max_lat, min_lon, max_lon, point).order_by(Route.id_route)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.db.execute(stmt)
+        return result.all()
+        
+    async def update_route(self, route: Route) -> Route:
+        # En async no hay lazy loading: si cambió el vehículo o el conductor se recarga esa relación
+        return await commit_changes(self.db, route, ["vehicle", "user"])
+    
+    def _claimable(self, lease_seconds: float, now: datetime):
+        # Pendientes, o en Running desde hace más que el lease (el proceso que la tomó murió)
+        return or_(
+            Route.enrichment_status == RouteEnrichmentStatus.PENDING,
+            and_(
+                Route.enrichment_status == RouteEnrichmentStatus.RUNNING,
+                Route.enrichment_claimed_at < now - timedelta(seconds=lease_seconds)
+            )
+        )
+
+    async def get_route_ids_to_enrich(self, lease_seconds: float) -> List[int]:
+        result = await self.db.execute(select(Route.id_route).filter(self._claimable(lease_seconds, datetime.utcnow())))
+        return result.scalars().all()
+
+    async def claim_route_for_enrichment(self, route_id: int, lease_seconds: float) -> bool:
+        """
+        Pasa la ruta a Running con un solo UPDATE condicionado y lo confirma. Si varios
+        procesos la tienen en cola solo uno obtiene rowcount 1 y la procesa.
+        """
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            update(Route)
+            .where(Route.id_route == route_id, self._claimable(lease_seconds, now))
+            .values(enrichment_status=RouteEnrichmentStatus.RUNNING, enrichment_claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
     
-    def delete_route(self, route: Route) -> bool:
-        self.db.delete(route)
-        self.db.commit()
+    async def delete_route(self, route: Route) -> bool:
+        await self.db.delete(route)
+        await self.db.commit()
         return True 
     
     
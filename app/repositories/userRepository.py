@@ -1,32 +1,52 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from app.models.usersModel import User
+from app.models.routesModel import Route
+from app.utils.paginationUtil import apply_keyset
+from app.utils.updateUtil import commit_changes
 
 class UserRepository:
-  def __init__(self, db: Session) -> None:
+  def __init__(self, db: AsyncSession) -> None:
     self.db = db
       
-  def create_user(self, user: User) -> User:
+  async def create_user(self, user: User) -> User:
     self.db.add(user)
-    self.db.commit()
-    self.db.refresh(user)
+    await self.db.commit()
+    await self.db.refresh(user)
     return user
   
-  def get_user_by_id(self, user_id: int) -> User:
-    return self.db.query(User).filter(User.id_usuario == user_id).first()
+  async def get_user_by_id(self, user_id: int) -> User:
+    result = await self.db.execute(select(User).filter(User.id_usuario == user_id))
+    return result.scalars().first()
   
-  def get_user_by_email(self, email: str) -> User:
-    return self.db.query(User).filter(User.email == email).first()
+  async def get_user_by_email(self, email: str) -> User:
+    result = await self.db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
   
-  def get_all_users(self) -> list[User]:
-    return self.db.query(User).all()
+  async def get_all_users(self, id_role_fk: int = None, id_vehicle_fk: int = None, assigned: bool = None, route_from: datetime = None, route_to: datetime = None, after: int = None, limit: int = None) -> list[User]:
+    stmt = select(User)
+    if id_role_fk is not None:
+      stmt = stmt.filter(User.id_role_fk == id_role_fk)
+    if id_vehicle_fk is not None:
+      stmt = stmt.filter(User.id_vehicle_fk == id_vehicle_fk)
+    if assigned is not None:
+      stmt = stmt.filter(User.id_vehicle_fk.isnot(None) if assigned else User.id_vehicle_fk.is_(None))
+    if route_from is not None or route_to is not None:
+      # EXISTS por conductor: lo resuelve ix_Route_id_user_fk_end_time
+      routes = select(Route.id_route).filter(Route.id_user_fk == User.id_usuario, Route.is_completed)
+      if route_from is not None:
+        routes = routes.filter(Route.end_time >= route_from)
+      if route_to is not None:
+        routes = routes.filter(Route.end_time < route_to)
+      stmt = stmt.filter(routes.exists())
+    result = await self.db.execute(apply_keyset(stmt, User.id_usuario, after, limit))
+    return result.scalars().all()
   
-  def update_user(self, user: User) -> User:
-    self.db.merge(user)
-    self.db.commit()
-    self.db.refresh(user)
-    return user
+  async def update_user(self, user: User) -> User:
+    return await commit_changes(self.db, user)
   
-  def delete_user(self, user: User) -> bool:
-    self.db.delete(user)
-    self.db.commit()
+  async def delete_user(self, user: User) -> bool:
+    await self.db.delete(user)
+    await self.db.commit()
     return True
\ No newline at end of file
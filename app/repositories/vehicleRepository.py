@@ -1,4 +1,8 @@
-from sqlalchemy.orm import Session, joinedload
+import hashlib
+from typing import Optional
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.vehiclesModel import Vehicle
 from app.models.modelsModel import Model
 from app.models.brandsModel import Brand
@@ -6,39 +10,70 @@ from app.models.descriptionsModel import Description
 from app.models.routesModel import Route
 from app.models.fuelStopsModel import FuelStop
 from app.models.usersModel import User
+from app.models.vehicleRoute import vehicleRoute
+from app.models.VehicleAssignmentStatus import VehicleAssignmentStatus
+from app.utils.paginationUtil import apply_keyset
+from app.utils.updateUtil import commit_changes
 
 
 class VehicleRepository:
-  def __init__(self, db: Session) -> None:
+  def __init__(self, db: AsyncSession) -> None:
     self.db = db
     
-  def create_vehicle(self, vehicle: Vehicle) -> Vehicle:
+  async def create_vehicle(self, vehicle: Vehicle) -> Vehicle:
     self.db.add(vehicle)
-    self.db.commit()
-    self.db.refresh(vehicle)
-    self.db.refresh(vehicle, attribute_names=['model', 'brand', 'description'])
+    await self.db.commit()
+    await self.db.refresh(vehicle)
+    await self.db.refresh(vehicle, attribute_names=['model', 'brand', 'description'])
     return vehicle
 
-  def get_vehicle_by_id(self, vehicle_id: int) -> Vehicle:
-    result = self.db.query(Vehicle).options(joinedload(Vehicle.model), joinedload(Vehicle.brand), joinedload(Vehicle.description)).filter(Vehicle.id_vehicle == vehicle_id)
-    return result.first()
+  async def get_vehicle_by_id(self, vehicle_id: int) -> Vehicle:
+    result = await self.db.execute(select(Vehicle).options(joinedload(Vehicle.model), joinedload(Vehicle.brand), joinedload(Vehicle.description)).filter(Vehicle.id_vehicle == vehicle_id))
+    return result.scalars().first()
 
-  def get_all_vehicles(self) -> list[Vehicle]:
-    return self.db.query(Vehicle).options(joinedload(Vehicle.model), joinedload(Vehicle.brand), joinedload(Vehicle.description)).all()
+  async def get_vehicle_for_transition(self, vehicle_id: int) -> Vehicle:
+    # Sin bloquear la fila: el UPDATE compara Vehicle.version (ver retry_on_conflict).
+    # populate_existing por si la sesión ya tenía el vehículo (joinedload de la ruta o un reintento)
+    result = await self.db.execute(
+      select(Vehicle).filter(Vehicle.id_vehicle == vehicle_id).execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
 
-  def update_vehicle(self, vehicle: Vehicle) -> Vehicle:
-    self.db.merge(vehicle)
-    self.db.commit()
-    self.db.refresh(vehicle)
-    self.db.refresh(vehicle, attribute_names=['model', 'brand', 'description'])
-    return vehicle
+  async def flush_transition(self) -> None:
+    # Envía ya el UPDATE ... WHERE version = <leída> del vehículo, antes de insertar rutas,
+    # paradas o resúmenes: en InnoDB esos INSERT toman un bloqueo compartido sobre la fila
+    # del vehículo (FK) y dos requests que luego suben al exclusivo se bloquean entre sí
+    # (deadlock 1213). Con el UPDATE primero el segundo request espera al commit del
+    # primero y su UPDATE no encuentra la versión (StaleDataError -> retry_on_conflict).
+    await self.db.flush()
+
+  async def get_all_vehicles(self, id_brand_fk: int = None, id_model_fk: int = None, route_status: vehicleRoute = None, assignment_status: VehicleAssignmentStatus = None, after: int = None, limit: int = None) -> list[Vehicle]:
+    stmt = select(Vehicle).options(joinedload(Vehicle.model), joinedload(Vehicle.brand), joinedload(Vehicle.description))
+    if id_brand_fk is not None:
+      stmt = stmt.filter(Vehicle.id_brand_fk == id_brand_fk)
+    if id_model_fk is not None:
+      stmt = stmt.filter(Vehicle.id_model_fk == id_model_fk)
+    if route_status is not None:
+      stmt = stmt.filter(Vehicle.route_status == route_status)
+    if assignment_status is not None:
+      stmt = stmt.filter(Vehicle.assignment_status == assignment_status)
+    result = await self.db.execute(apply_keyset(stmt, Vehicle.id_vehicle, after, limit))
+    return result.scalars().all()
+
+  async def update_vehicle(self, vehicle: Vehicle) -> Vehicle:
+    # Compare-and-set: el UPDATE lleva WHERE version = <leída>; si otro request escribió
+    # antes el commit lanza StaleDataError y el servicio reintenta con retry_on_conflict
+    return await commit_changes(self.db, vehicle, ['model', 'brand', 'description'])
+
+  async def rollback(self) -> None:
+    await self.db.rollback()
 
-  def delete_vehicle(self, vehicle: Vehicle) -> bool:
-    self.db.delete(vehicle)
-    self.db.commit()
+  async def delete_vehicle(self, vehicle: Vehicle) -> bool:
+    await self.db.delete(vehicle)
+    await self.db.commit()
     return True
 
-  def get_vehicle_report_data(self, vehicle_id: int) -> tuple:
+  async def get_vehicle_report_data(self, vehicle_id: int) -> tuple:
     """
     Get a vehicle with all its routes and fuel stops for a report
     
@@ -48,23 +83,108 @@ class VehicleRepository:
     Returns:
         Tuple containing (vehicle, routes, fuel_stops_by_route)
     """
-    vehicle = self.get_vehicle_by_id(vehicle_id)
+    vehicle = await self.get_vehicle_by_id(vehicle_id)
     if not vehicle:
         return None, [], {}
     
-    # Get all routes for this vehicle with relationships loaded
-    routes = self.db.query(Route).options(
+    # Get all routes for this vehicle with relationships loaded.
+    # Fuel stops come in a single extra SELECT ... WHERE id_route_fk IN (...)
+    # instead of one query per route.
+    result = await self.db.execute(select(Route).options(
         joinedload(Route.user),
-        joinedload(Route.vehicle)
-    ).filter(Route.id_vehicle_fk == vehicle_id).all()
+        joinedload(Route.vehicle),
+        selectinload(Route.fuel_stops)
+    ).filter(Route.id_vehicle_fk == vehicle_id))
+    routes = result.scalars().all()
     
-    # Get all fuel stops for each route with route relationship loaded
-    fuel_stops_by_route = {}
-    for route in routes:
-        fuel_stops = self.db.query(FuelStop).options(
-            joinedload(FuelStop.route)
-        ).filter(FuelStop.id_route_fk == route.id_route).all()
-        fuel_stops_by_route[route.id_route] = fuel_stops
+    fuel_stops_by_route = {route.id_route: route.fuel_stops for route in routes}
     
     return vehicle, routes, fuel_stops_by_route
-    
\ No newline at end of file
+
+  async def get_report_watermark(self, vehicle_id: int) -> Optional[str]:
+    """
+    Get a short hash that changes whenever the data in the vehicle report changes
+
+    Combines the vehicle version and catalog names, the number, last id and summed
+    `revision` of its routes and fuel stops (revision goes up on every UPDATE, so
+    any edited column changes the sum; inserts and deletes change the count), and
+    the names of the drivers of its routes.
+
+    Args:
+        vehicle_id: The ID of the vehicle to report on
+
+    Returns:
+        Hex string, or None if the vehicle does not exist
+    """
+    vehicle = (await self.db.execute(
+      select(Vehicle.version, Brand.name, Model.name, Description.name)
+      .outerjoin(Brand, Vehicle.id_brand_fk == Brand.id_brand)
+      .outerjoin(Model, Vehicle.id_model_fk == Model.id_model)
+      .outerjoin(Description, Vehicle.id_description_fk == Description.id_description)
+      .filter(Vehicle.id_vehicle == vehicle_id)
+    )).first()
+    if vehicle is None:
+      return None
+    routes = (await self.db.execute(
+      select(func.count(Route.id_route), func.max(Route.id_route), func.sum(Route.revision))
+      .filter(Route.id_vehicle_fk == vehicle_id)
+    )).one()
+    fuel_stops = (await self.db.execute(
+      select(func.count(FuelStop.id_fuel_stop), func.max(FuelStop.id_fuel_stop), func.sum(FuelStop.revision))
+      .join(Route, FuelStop.id_route_fk == Route.id_route).filter(Route.id_vehicle_fk == vehicle_id)
+    )).one()
+    drivers = (await self.db.execute(
+      select(User.id_usuario, User.first_name, User.last_name)
+      .filter(User.id_usuario.in_(select(Route.id_user_fk).filter(Route.id_vehicle_fk == vehicle_id)))
+      .order_by(User.id_usuario)
+    )).all()
+    stamp = (tuple(vehicle), tuple(routes), tuple(fuel_stops), [tuple(driver) for driver in drivers])
+    return hashlib.sha1(repr(stamp).encode()).hexdigest()[:16]
+
+  async def stream_vehicle_routes(self, vehicle_id: int, chunk_size: int = 1000):
+    """
+    Stream the routes of a vehicle in chunks using a server-side cursor
+    
+    Args:
+        vehicle_id: The ID of the vehicle to report on
+        chunk_size: Number of rows fetched per round-trip
+        
+    Yields:
+        Lists of rows with the route columns used in the report plus the driver name
+    """
+    stmt = select(
+        Route.id_route, Route.description, User.first_name, User.last_name,
+        Route.start_time, Route.end_time, Route.start_km, Route.end_km,
+        Route.total_duration, Route.estimated_km, Route.estimated_time,
+        Route.on_time, Route.on_distance, Route.liters_consumed
+    ).outerjoin(User, Route.id_user_fk == User.id_usuario).filter(
+        Route.id_vehicle_fk == vehicle_id
+    ).order_by(Route.id_route).execution_options(yield_per=chunk_size)
+    
+    result = await self.db.stream(stmt)
+    async for rows in result.partitions():
+        yield rows
+
+  async def stream_vehicle_fuel_stops(self, vehicle_id: int, chunk_size: int = 1000):
+    """
+    Stream the fuel stops of every route of a vehicle in chunks using a server-side cursor
+    
+    Args:
+        vehicle_id: The ID of the vehicle to report on
+        chunk_size: Number of rows fetched per round-trip
+        
+    Yields:
+        Lists of fuel stop rows ordered by route
+    """
+    stmt = select(
+        FuelStop.id_route_fk, FuelStop.id_fuel_stop, FuelStop.stop_time,
+        FuelStop.resume_time, FuelStop.start_time, FuelStop.liters_added,
+        FuelStop.current_km, FuelStop.Latitude_stop, FuelStop.Longitude_stop,
+        FuelStop.Latitude_start, FuelStop.Longitude_start
+    ).join(Route, FuelStop.id_route_fk == Route.id_route).filter(
+        Route.id_vehicle_fk == vehicle_id
+    ).order_by(FuelStop.id_route_fk, FuelStop.id_fuel_stop).execution_options(yield_per=chunk_size)
+    
+    result = await self.db.stream(stmt)
+    async for rows in result.partitions():
+        yield rows
\ No newline at end of file
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Annotated
+import app.schemas.analyticsSchema as analyticsSchema
+import app.services.analyticsService as analyticsService
+import app.repositories.analyticsRepository as analyticsRepository
+from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+def get_analytics_service(db: AsyncSession = Depends(get_db)):
+    repo = analyticsRepository.AnalyticsRepository(db)
+    return analyticsService.AnalyticsService(repo)
+
+@router.get(
+    "/kpis",
+    response_model=List[analyticsSchema.FleetKpiOut],
+    summary="Fleet KPIs grouped by vehicle, driver, brand, model or period"
+)
+async def get_fleet_kpis(
+    query: Annotated[analyticsSchema.FleetKpiQuery, Query()],
+    service: analyticsService.AnalyticsService = Depends(get_analytics_service)
+):
+    """
+    Km, litros consumidos, horas y porcentaje de rutas a tiempo / en distancia de las
+    rutas finalizadas, calculados con GROUP BY en la base de datos.
+
+    - **group_by**: vehicle, driver, brand, model, day, week (ISO 8601, `2022-W52`) o month (fecha de fin de la ruta)
+    - **from_date** / **to_date**: rango de fechas, ambos inclusive
+    - **id_vehicle_fk** / **id_user_fk**: limitar a un vehículo o conductor
+    """
+    return await service.get_fleet_kpis(query)
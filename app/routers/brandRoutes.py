@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from typing import List
-from app.schemas.brandsSchema import BrandCreate, BrandOut
+from app.schemas.brandsSchema import BrandCreate, BrandOut, CatalogBrand
 from app.services.brandService import BrandService
 from app.repositories.brandRepository import BrandRepository
 from app.database import get_db
-from sqlalchemy.orm import Session
+from app.utils.catalogCacheUtil import catalog_cache
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
   prefix="/brands",
@@ -13,7 +14,7 @@ router = APIRouter(
 )
 
 
-def get_brand_service(db: Session = Depends(get_db)):
+def get_brand_service(db: AsyncSession = Depends(get_db)):
     repo = BrandRepository(db)
     return BrandService(repo)
 
@@ -28,7 +29,23 @@ async def create_brand(
     brand_data: BrandCreate = Body(..., example={"name": "Toyota"}),
     service: BrandService = Depends(get_brand_service)
 ):
-    return service.create_brand(brand_data)
+    return await service.create_brand(brand_data)
+
+@router.get(
+    "/catalog",
+    response_model=List[CatalogBrand],
+    summary="Get the brand -> model -> description tree"
+)
+async def get_catalog_tree(
+    request: Request,
+    service: BrandService = Depends(get_brand_service)
+):
+    """
+    Todas las marcas con sus modelos y las descripciones de cada modelo, para llenar
+    los selectores del alta de vehículos en una sola llamada. Cacheado con ETag igual
+    que **GET /brands**; se invalida al escribir marcas, modelos o descripciones.
+    """
+    return await catalog_cache.respond(request, "catalog", service.get_catalog_tree)
 
 @router.get(
     "/{brand_id}",
@@ -40,7 +57,7 @@ async def get_brand(
     brand_id: int,
     service: BrandService = Depends(get_brand_service)
 ):
-    brand = service.get_brand_by_id(brand_id)
+    brand = await service.get_brand_by_id(brand_id)
     if not brand:
         raise HTTPException(status_code=404, detail="Brand not found")
     return brand
@@ -51,9 +68,13 @@ async def get_brand(
     summary="Get all brands"
 )
 async def list_brands(
+    request: Request,
     service: BrandService = Depends(get_brand_service)
 ):
-    return service.get_all_brands()
+    """
+    Lista cacheada con ETag: con If-None-Match que incluya el ETag anterior (fuerte o W/) o `*` responde 304.
+    """
+    return await catalog_cache.respond(request, "brands", service.get_all_brands)
 
 @router.put(
     "/{brand_id}",
@@ -69,7 +90,7 @@ async def update_brand(
     brand_data: BrandCreate = Body(..., example={"name": "Updated Brand"}),
     service: BrandService = Depends(get_brand_service)
 ):
-    updated_brand = service.update_brand(brand_id, brand_data)
+    updated_brand = await service.update_brand(brand_id, brand_data)
     if not updated_brand:
         raise HTTPException(status_code=404, detail="Brand not found")
     return updated_brand
@@ -87,7 +108,7 @@ async def delete_brand(
     brand_id: int,
     service: BrandService = Depends(get_brand_service)
 ):
-    success = service.delete_brand(brand_id)
+    success = await service.delete_brand(brand_id)
     if not success:
         raise HTTPException(status_code=404, detail="Brand not found")
     return None
@@ -0,0 +1,94 @@
+import json
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.utils.iaUtil import manejar_pregunta, eventos_pregunta, ChatBotBusy
+from app.config import CHATBOT_QUEUE_TIMEOUT
+
+router = APIRouter(
+    tags=["chat-bot"],
+)
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Chat-bot is busy, try again later",
+        headers={"Retry-After": str(int(CHATBOT_QUEUE_TIMEOUT))}
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post(
+    "/chat-bot",
+    summary="Ask the chat-bot a question about the fleet data",
+    responses={503: {"description": "Chat-bot is saturated, retry later"}}
+)
+async def chat_bot(message: str):
+    """
+    Genera una consulta SELECT con el LLM, la ejecuta en la conexión de solo lectura
+    y resume el resultado. Si ya hay demasiadas preguntas en cola responde **503**.
+    """
+    try:
+        return await manejar_pregunta(message)
+    except ChatBotBusy:
+        raise _busy()
+
+@router.get(
+    "/chat-bot/stream",
+    operation_id="chat_bot_stream_get",
+    summary="Ask the chat-bot and stream the answer as Server-Sent Events",
+    responses={503: {"description": "Chat-bot is saturated, retry later"}}
+)
+@router.post(
+    "/chat-bot/stream",
+    operation_id="chat_bot_stream_post",
+    summary="Ask the chat-bot and stream the answer as Server-Sent Events",
+    responses={503: {"description": "Chat-bot is saturated, retry later"}}
+)
+async def chat_bot_stream(message: str):
+    """
+    Same pipeline as **POST /chat-bot**, streamed as `text/event-stream`:
+    - `progress`: `{"stage": "generating_sql" | "querying_db" | "generating_answer"}`
+    - `token`: `{"text": ...}` answer fragments as the LLM produces them
+    - `done`: `{"answer": ...}` the full answer, or `error`: `{"detail": ...}`
+    """
+    eventos = eventos_pregunta(message)
+    # El primer evento se obtiene antes de enviar headers para poder responder 503
+    try:
+        primero = await eventos.__anext__()
+    except ChatBotBusy:
+        raise _busy()
+    except StopAsyncIteration:
+        primero = None
+    except Exception as e:
+        primero = ("error", f"Error: {str(e)}")
+
+    async def stream():
+        try:
+            pendiente = primero
+            while pendiente is not None:
+                evento, texto = pendiente
+                if evento == "progress":
+                    yield _sse("progress", {"stage": texto})
+                elif evento == "token":
+                    yield _sse("token", {"text": texto})
+                elif evento == "answer":
+                    yield _sse("done", {"answer": texto})
+                else:
+                    yield _sse("error", {"detail": texto})
+                    return
+                pendiente = await eventos.__anext__()
+        except StopAsyncIteration:
+            pass
+        except ChatBotBusy:
+            yield _sse("error", {"detail": "Chat-bot is busy, try again later"})
+        except Exception as e:
+            yield _sse("error", {"detail": f"Error: {str(e)}"})
+        finally:
+            await eventos.aclose()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from typing import List
 import app.schemas.descriptionsSchema as descriptionsSchema
 import app.services.descriptionService as descriptionService
 import app.repositories.descriptionRepository as descriptionRepository
 from app.database import get_db
-from sqlalchemy.orm import Session
+from app.utils.catalogCacheUtil import catalog_cache
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
   prefix="/descriptions",
@@ -12,7 +13,7 @@ router = APIRouter(
   responses={404: {"description": "Not found"}},
 )
 
-def get_description_service(db: Session = Depends(get_db)):
+def get_description_service(db: AsyncSession = Depends(get_db)):
     repo = descriptionRepository.DescriptionRepository(db)
     return descriptionService.DescriptionService(repo)
 
@@ -27,7 +28,7 @@ async def create_description(
     description_data: descriptionsSchema.DescriptionCreate = Body(..., example={"name": "Toyota", "id_model_fk": 1}),
     service: descriptionService.DescriptionService = Depends(get_description_service)
 ):
-    return service.create_description(description_data)
+    return await service.create_description(description_data)
 
 @router.get(
     "/{description_id}",
@@ -39,7 +40,7 @@ async def get_description(
     description_id: int,
     service: descriptionService.DescriptionService = Depends(get_description_service)
 ):
-    description = service.get_description_by_id(description_id)
+    description = await service.get_description_by_id(description_id)
     if not description:
         raise HTTPException(status_code=404, detail="Description not found")
     return description
@@ -50,9 +51,13 @@ async def get_description(
     summary="Get all descriptions"
 )
 async def list_descriptions(
+    request: Request,
     service: descriptionService.DescriptionService = Depends(get_description_service)
 ):
-    return service.get_all_descriptions()
+    """
+    Lista cacheada con ETag: con If-None-Match que incluya el ETag anterior (fuerte o W/) o `*` responde 304.
+    """
+    return await catalog_cache.respond(request, "descriptions", service.get_all_descriptions)
 
 @router.put(
     "/{description_id}",
@@ -68,7 +73,7 @@ async def update_description(
     description_data: descriptionsSchema.DescriptionCreate = Body(..., example={"name": "Updated Description", "id_model_fk": 1}),
     service: descriptionService.DescriptionService = Depends(get_description_service)
 ):
-    updated_description = service.update_description(description_id, description_data)
+    updated_description = await service.update_description(description_id, description_data)
     if not updated_description:
         raise HTTPException(status_code=404, detail="Description not found")
     return updated_description
@@ -86,7 +91,7 @@ async def delete_description(
     description_id: int,
     service: descriptionService.DescriptionService = Depends(get_description_service)
 ):
-    success = service.delete_description(description_id)
+    success = await service.delete_description(description_id)
     if not success:
         raise HTTPException(status_code=404, detail="Description not found")
     return None
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from typing import List, Annotated
+from fastapi.responses import StreamingResponse
 import app.schemas.fuelStopSchema as fuelStopSchema
+from app.schemas.geoSchema import RadiusQuery, BoundingBoxQuery
 import app.services.fuelStopService as fuelStopService
 import app.repositories.fuelStopRepository as fuelStopRepository
+import app.repositories.fleetStatsRepository as fleetStatsRepository
 import app.repositories.vehicleRepository as vehicleRepository
 import app.repositories.routeRepository as routeRepository
 from app.database import get_db
-from sqlalchemy.orm import Session
+from app.utils.dtoUtil import json_response, stream_json, STREAM_MEDIA_TYPES
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 router = APIRouter(
@@ -15,11 +19,12 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-def get_fuel_stop_service(db: Session = Depends(get_db)):
+def get_fuel_stop_service(db: AsyncSession = Depends(get_db)):
     repo = fuelStopRepository.FuelStopRepository(db)
     vehicle_repo = vehicleRepository.VehicleRepository(db)
     route_repo = routeRepository.RouteRepository(db)
-    return fuelStopService.FuelStopService(repo, vehicle_repo, route_repo)
+    stats_repo = fleetStatsRepository.FleetStatsRepository(db)
+    return fuelStopService.FuelStopService(repo, vehicle_repo, route_repo, stats_repo)
 
 @router.post(
     "/",
@@ -32,7 +37,36 @@ async def create_fuel_stop(
     fuel_stop_data: fuelStopSchema.FuelStopCreate = Body(..., example={"id_route_fk": 1, "latitude_stop": 12.3456, "longitude_stop": 78.9101, "stop_time": "2023-01-01T12:00:00Z", "resume_time": "2023-01-01T12:00:00Z", "start_time": "2023-01-01T12:00:00Z", "latitude_start": 12.3456, "longitude_start": 78.9101, "liters_added": 10.0}),
     service: fuelStopService.FuelStopService = Depends(get_fuel_stop_service)
 ):
-    return service.create_fuel_stop(fuel_stop_data)
+    return await service.create_fuel_stop(fuel_stop_data)
+
+@router.get(
+    "/within",
+    response_model=List[fuelStopSchema.FuelStopOut],
+    summary="Get fuel stops inside a bounding box"
+)
+async def list_fuel_stops_within(
+    query: Annotated[BoundingBoxQuery, Query()],
+    service: fuelStopService.FuelStopService = Depends(get_fuel_stop_service)
+):
+    """
+    List fuel stops whose stop coordinates fall inside the box delimited by
+    **min_latitude**/**max_latitude** and **min_longitude**/**max_longitude**.
+    """
+    return json_response(await service.get_fuel_stops_within(query))
+
+@router.get(
+    "/nearby",
+    response_model=List[fuelStopSchema.FuelStopNearbyOut],
+    summary="Get fuel stops near a point"
+)
+async def list_fuel_stops_nearby(
+    query: Annotated[RadiusQuery, Query()],
+    service: fuelStopService.FuelStopService = Depends(get_fuel_stop_service)
+):
+    """
+    List fuel stops within **radius_km** of (**latitude**, **longitude**), closest first.
+    """
+    return json_response(await service.get_fuel_stops_nearby(query))
 
 @router.get(
     "/{fuel_stop_id}",
@@ -44,7 +78,7 @@ async def get_fuel_stop(
     fuel_stop_id: int,
     service: fuelStopService.FuelStopService = Depends(get_fuel_stop_service)
 ):
-    fuel_stop = service.get_fuel_stop_by_id(fuel_stop_id)
+    fuel_stop = await service.get_fuel_stop_by_id(fuel_stop_id)
     if not fuel_stop:
         raise HTTPException(status_code=404, detail="Fuel stop not found")
     return fuel_stop
@@ -55,9 +89,28 @@ async def get_fuel_stop(
     summary="Get all fuel stops"
 )
 async def list_fuel_stops(
+    filters: Annotated[fuelStopSchema.FuelStopFilter, Query()],
     service: fuelStopService.FuelStopService = Depends(get_fuel_stop_service)
 ):
-    return service.get_all_fuel_stops()
+    """
+    List fuel stops filtered by route, vehicle and stop time range.
+    
+    Use **limit** to paginate; when there are more rows the response carries an
+    **X-Next-Cursor** header whose value is passed as **after** for the next page.
+    
+    For exports use **stream=ndjson** (one fuel stop per line) or **stream=json** (a
+    regular array): rows are read with a server-side cursor and sent as they arrive,
+    so memory stays flat regardless of the number of fuel stops. **limit** is then the
+    total number of rows and no cursor header is sent.
+    """
+    if filters.stream is not None:
+        return StreamingResponse(
+            stream_json(fuelStopService.stream_fuel_stops(filters), filters.stream.value),
+            media_type=STREAM_MEDIA_TYPES[filters.stream.value]
+        )
+    fuel_stops, next_cursor = await service.get_all_fuel_stops(filters)
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return json_response(fuel_stops, headers)
 
 @router.put(
     "/{fuel_stop_id}",
@@ -73,7 +126,7 @@ async def update_fuel_stop(
     fuel_stop_data: fuelStopSchema.FuelStopCreate = Body(..., example={"id_route_fk": 1, "latitude_stop": 12.3456, "longitude_stop": 78.9101, "stop_time": "2023-01-01T12:00:00Z", "resume_time": "2023-01-01T12:00:00Z", "start_time": "2023-01-01T12:00:00Z", "latitude_start": 12.3456, "longitude_start": 78.9101, "liters_added": 10.0}),
     service: fuelStopService.FuelStopService = Depends(get_fuel_stop_service)
 ):
-    updated_fuel_stop = service.update_fuel_stop(fuel_stop_id, fuel_stop_data)
+    updated_fuel_stop = await service.update_fuel_stop(fuel_stop_id, fuel_stop_data)
     if not updated_fuel_stop:
         raise HTTPException(status_code=404, detail="Fuel stop not found")
     return updated_fuel_stop
@@ -91,7 +144,7 @@ async def delete_fuel_stop(
     fuel_stop_id: int,
     service: fuelStopService.FuelStopService = Depends(get_fuel_stop_service)
 ):
-    if not service.delete_fuel_stop(fuel_stop_id):
+    if not await service.delete_fuel_stop(fuel_stop_id):
         raise HTTPException(status_code=404, detail="Fuel stop not found")
     return None
 
@@ -120,7 +173,7 @@ async def start_refueling(
     
     Esta acción también cambiará el estado del vehículo a REFUELING.
     """
-    return service.start_refueling(fuel_stop_data)
+    return await service.start_refueling(fuel_stop_data)
 
 @router.post(
     "/finish-refueling",
@@ -159,7 +212,7 @@ async def finish_refueling(
     
     Esta acción también cambiará el estado del vehículo de vuelta a ON_ROUTE.
     """
-    return service.finish_refueling(fuel_stop_data)
+    return await service.finish_refueling(fuel_stop_data)
 
 
 
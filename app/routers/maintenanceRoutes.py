@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from typing import List, Annotated
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.maintenanceSchema import (
   MaintenanceCreate,
   MaintenanceOut,
   MaintenanceUpdate,
-  MaintenanceStatus
+  MaintenanceStatus,
+  MaintenanceFilter
 )
 from app.services.maintenanceService import MaintenanceService
 from app.repositories.maintenanceRepository import MaintenanceRepository
 from app.database import get_db
+from app.utils.dtoUtil import json_response
 
 router = APIRouter(
   prefix="/maintenances",
@@ -17,7 +19,7 @@ router = APIRouter(
   responses={404: {"description": "Not found"}},
 )
 
-def get_maintenance_service(db: Session = Depends(get_db)):
+def get_maintenance_service(db: AsyncSession = Depends(get_db)):
   repo = MaintenanceRepository(db)
   return MaintenanceService(repo)
 
@@ -40,7 +42,7 @@ async def create_maintenance(
   - **description**: (Optional) Description of the maintenance
   - **end_time**: (Optional) When the maintenance ended
   """
-  return service.create_maintenance(maintenance_data)
+  return await service.create_maintenance(maintenance_data)
 
 @router.get(
   "/{maintenance_id}",
@@ -55,7 +57,7 @@ async def get_maintenance(
   """
   Get details of a specific maintenance by its ID.
   """
-  maintenance = service.get_maintenance_by_id(maintenance_id)
+  maintenance = await service.get_maintenance_by_id(maintenance_id)
   if not maintenance:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
@@ -69,12 +71,19 @@ async def get_maintenance(
   summary="Get all maintenances"
 )
 async def list_maintenances(
+  filters: Annotated[MaintenanceFilter, Query()],
   service: MaintenanceService = Depends(get_maintenance_service)
 ):
   """
-  Retrieve a list of all maintenance records.
+  Retrieve a list of all maintenance records, optionally filtered by vehicle,
+  status and start time range.
+  
+  Use **limit** to paginate; when there are more rows the response carries an
+  **X-Next-Cursor** header whose value is passed as **after** for the next page.
   """
-  return service.get_all_maintenances()
+  maintenances, next_cursor = await service.get_all_maintenances(filters)
+  headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+  return json_response(maintenances, headers)
 
 @router.get(
   "/status/{status}",
@@ -88,7 +97,7 @@ async def list_maintenances_by_status(
   """
   Retrieve maintenance records filtered by status.
   """
-  return service.get_maintenances_by_status(status)
+  return json_response(await service.get_maintenances_by_status(status))
 
 @router.put(
   "/{maintenance_id}",
@@ -107,7 +116,7 @@ async def update_maintenance(
   """
   Update an existing maintenance's information.
   """
-  updated_maintenance = service.update_maintenance(maintenance_id, maintenance_data)
+  updated_maintenance = await service.update_maintenance(maintenance_id, maintenance_data)
   if not updated_maintenance:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
@@ -131,7 +140,7 @@ async def delete_maintenance(
   """
   Delete a specific maintenance by its ID.
   """
-  success = service.delete_maintenance(maintenance_id)
+  success = await service.delete_maintenance(maintenance_id)
   if not success:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
@@ -151,4 +160,4 @@ async def list_maintenances_by_vehicle(
   """
   Retrieve maintenance records filtered by vehicle ID.
   """
-  return service.get_all_maintenances_by_vehicle(vehicle_id)
\ No newline at end of file
+  return json_response(await service.get_all_maintenances_by_vehicle(vehicle_id))
\ No newline at end of file
@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+from app.utils.poolMetricsUtil import pool_metrics
+from app.database import POOL_OPTIONS
+from app.utils.distanceUtil import distance_cache
+from app.utils.iaUtil import chat_limiter, cache_stats
+from app.utils.catalogCacheUtil import catalog_cache
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+)
+
+@router.get(
+    "/db-pool",
+    summary="Database connection pool metrics"
+)
+async def db_pool_metrics():
+    """
+    Estado del pool de conexiones de la base de datos:
+    - **checked_out** / **checked_in** / **overflow**: uso actual del pool
+    - **wait_time**: tiempo que esperan los requests por una conexión libre
+    - **connection_age**: antigüedad de las conexiones abiertas (ver DB_POOL_RECYCLE)
+    """
+    return {"config": POOL_OPTIONS, **pool_metrics.snapshot()}
+
+@router.get(
+    "/distance-cache",
+    summary="OpenRouteService distance cache metrics"
+)
+async def distance_cache_metrics():
+    """
+    Tamaño, hits, misses y hit ratio de la caché de distancias de OpenRouteService.
+    """
+    return distance_cache.stats()
+
+@router.get(
+    "/chat-bot",
+    summary="Chat-bot limiter and cache metrics"
+)
+async def chat_bot_metrics():
+    """
+    Preguntas en proceso (**active**), en cola (**waiting**), terminadas y rechazadas con 503,
+    y hits/misses de las cachés de SQL generado, resultados y respuestas (**cache**).
+    """
+    return {**chat_limiter.stats(), "cache": cache_stats()}
+
+@router.get(
+    "/catalog-cache",
+    summary="Catalog list cache metrics"
+)
+async def catalog_cache_metrics():
+    """
+    Backend de invalidación, entradas, hits/misses y respuestas 304 de la caché de
+    /brands, /models, /descriptions y /roles.
+    """
+    return catalog_cache.stats()
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from typing import List
 import app.schemas.modelsSchema as modelsSchema
 import app.services.modelService as modelService
 import app.repositories.modelRepository as modelRepository
 from app.database import get_db
-from sqlalchemy.orm import Session
+from app.utils.catalogCacheUtil import catalog_cache
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 router = APIRouter(
@@ -13,7 +14,7 @@ router = APIRouter(
   responses={404: {"description": "Not found"}},
 )   
 
-def get_model_service(db: Session = Depends(get_db)):
+def get_model_service(db: AsyncSession = Depends(get_db)):
     repo = modelRepository.ModelRepository(db)
     return modelService.ModelService(repo)
 
@@ -28,7 +29,7 @@ async def create_model(
     model_data: modelsSchema.ModelCreate = Body(..., example={"name": "Toyota", "id_brand_fk": 1}),
     service: modelService.ModelService = Depends(get_model_service)
 ):
-    return service.create_model(model_data)
+    return await service.create_model(model_data)
 
 @router.get(
     "/{model_id}",
@@ -40,7 +41,7 @@ async def get_model(
     model_id: int,
     service: modelService.ModelService = Depends(get_model_service)
 ):
-    model = service.get_model_by_id(model_id)
+    model = await service.get_model_by_id(model_id)
     if not model:   
         raise HTTPException(status_code=404, detail="Model not found")
     return model
@@ -51,9 +52,13 @@ async def get_model(
     summary="Get all models"
 )
 async def list_models(
+    request: Request,
     service: modelService.ModelService = Depends(get_model_service)
 ):
-    return service.get_all_models() 
+    """
+    Lista cacheada con ETag: con If-None-Match que incluya el ETag anterior (fuerte o W/) o `*` responde 304.
+    """
+    return await catalog_cache.respond(request, "models", service.get_all_models)
 
 @router.put(
     "/{model_id}",
@@ -69,7 +74,7 @@ async def update_model(
     model_data: modelsSchema.ModelCreate = Body(..., example={"name": "Updated Model", "id_brand_fk": 1}),
     service: modelService.ModelService = Depends(get_model_service) 
 ):
-    updated_model = service.update_model(model_id, model_data)
+    updated_model = await service.update_model(model_id, model_data)
     if not updated_model:
         raise HTTPException(status_code=404, detail="Model not found")
     return updated_model   
@@ -87,7 +92,7 @@ async def delete_model(
     model_id: int,
     service: modelService.ModelService = Depends(get_model_service)
 ):
-    success = service.delete_model(model_id)
+    success = await service.delete_model(model_id)
     if not success:
         raise HTTPException(status_code=404, detail="Model not found")
     return None
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from typing import List
 from app.schemas.rolesSchema import RoleCreate, RoleOut
 from app.services.roleService import RoleService
 from app.repositories.roleRepository import RoleRepository
 from app.database import get_db
-from sqlalchemy.orm import Session
+from app.utils.catalogCacheUtil import catalog_cache
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Crear el router
 router = APIRouter(
@@ -14,7 +15,7 @@ router = APIRouter(
 )
 
 # Inyección de dependencias
-def get_role_service(db: Session = Depends(get_db)):
+def get_role_service(db: AsyncSession = Depends(get_db)):
     repo = RoleRepository(db)
     return RoleService(repo)
 
@@ -34,7 +35,7 @@ async def create_role(
     Create a new role with the following details:
     - **name**: The name of the role (must be unique)
     """
-    return service.create_role(role_data)
+    return await service.create_role(role_data)
 
 @router.get(
     "/{role_id}",
@@ -49,7 +50,7 @@ async def get_role(
     """
     Get details of a specific role by its ID.
     """
-    role = service.get_role_by_id(role_id)
+    role = await service.get_role_by_id(role_id)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,12 +64,14 @@ async def get_role(
     summary="Get all roles"
 )
 async def list_roles(
+    request: Request,
     service: RoleService = Depends(get_role_service)
 ):
     """
     Retrieve a list of all available roles.
+    Cached with an ETag: a matching If-None-Match returns 304.
     """
-    return service.get_all_roles()
+    return await catalog_cache.respond(request, "roles", service.get_all_roles)
 
 @router.put(
     "/{role_id}",
@@ -87,7 +90,7 @@ async def update_role(
     """
     Update an existing role's information.
     """
-    updated_role = service.update_role(role_id, role_data)
+    updated_role = await service.update_role(role_id, role_data)
     if not updated_role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -111,7 +114,7 @@ async def delete_role(
     """
     Delete a specific role by its ID.
     """
-    success = service.delete_role(role_id)
+    success = await service.delete_role(role_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
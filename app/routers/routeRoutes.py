@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from typing import List, Annotated
+from fastapi.responses import StreamingResponse
 import app.schemas.routesSchema as routesSchema
 import app.schemas.fuelStopSchema as fuelStopSchema
+import app.schemas.syncSchema as syncSchema
 import app.services.routeService as routeService
 import app.services.fuelStopService as fuelStopService
+import app.services.lifecycleSyncService as lifecycleSyncService
 import app.repositories.routeRepository as routeRepository
 import app.repositories.vehicleRepository as vehicleRepository
 import app.repositories.fuelStopRepository as fuelStopRepository
+import app.repositories.fleetStatsRepository as fleetStatsRepository
+import app.repositories.lifecycleSyncRepository as lifecycleSyncRepository
 from app.database import get_db
-from sqlalchemy.orm import Session
+from app.utils.dtoUtil import json_response, stream_json, STREAM_MEDIA_TYPES
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/routes",
@@ -16,16 +22,23 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-def get_route_service(db: Session = Depends(get_db)):
+def get_route_service(db: AsyncSession = Depends(get_db)):
     repo = routeRepository.RouteRepository(db)
     vehicle_repo = vehicleRepository.VehicleRepository(db)
-    return routeService.RouteService(repo, vehicle_repo)
+    stats_repo = fleetStatsRepository.FleetStatsRepository(db)
+    return routeService.RouteService(repo, vehicle_repo, stats_repo)
 
-def get_fuel_stop_service(db: Session = Depends(get_db)):
+def get_fuel_stop_service(db: AsyncSession = Depends(get_db)):
     repo = fuelStopRepository.FuelStopRepository(db)
     vehicle_repo = vehicleRepository.VehicleRepository(db)
     route_repo = routeRepository.RouteRepository(db)
-    return fuelStopService.FuelStopService(repo, vehicle_repo, route_repo)
+    stats_repo = fleetStatsRepository.FleetStatsRepository(db)
+    return fuelStopService.FuelStopService(repo, vehicle_repo, route_repo, stats_repo)
+
+def get_lifecycle_sync_service(db: AsyncSession = Depends(get_db)):
+    repo = lifecycleSyncRepository.LifecycleSyncRepository(db)
+    stats_repo = fleetStatsRepository.FleetStatsRepository(db)
+    return lifecycleSyncService.LifecycleSyncService(repo, stats_repo)
 
 @router.post(
     "/",
@@ -38,7 +51,37 @@ async def create_route(
     route_data: routesSchema.RouteCreate = Body(..., example={"id_vehicle_fk": 1, "id_user_fk": 1, "description": "Route description", "latitude_start": 12.345678, "longitude_start": 98.765432, "latitude_end": 12.345678, "longitude_end": 98.765432, "start_time": "2021-01-01T00:00:00Z", "end_time": "2021-01-01T00:00:00Z", "estimated_time": 100, "total_duration": 100, "on_time": 100, "start_km": 100, "end_km": 100, "estimated_km": 100, "image_start_km": "image_start_km", "image_end_km": "image_end_km", "on_distance": 100, "liters_consumed": 100}),
     service: routeService.RouteService = Depends(get_route_service)
 ):
-    return service.create_route(route_data)
+    return await service.create_route(route_data)
+
+@router.get(
+    "/within",
+    response_model=List[routesSchema.RouteOut],
+    summary="Get routes inside a bounding box"
+)
+async def list_routes_within(
+    query: Annotated[routesSchema.RouteBoundingBoxQuery, Query()],
+    service: routeService.RouteService = Depends(get_route_service)
+):
+    """
+    List routes whose start (or end, with **point=end**) coordinates fall inside
+    the box delimited by **min_latitude**/**max_latitude** and **min_longitude**/**max_longitude**.
+    """
+    return json_response(await service.get_routes_within(query))
+
+@router.get(
+    "/nearby",
+    response_model=List[routesSchema.RouteNearbyOut],
+    summary="Get routes near a point"
+)
+async def list_routes_nearby(
+    query: Annotated[routesSchema.RouteRadiusQuery, Query()],
+    service: routeService.RouteService = Depends(get_route_service)
+):
+    """
+    List routes whose start (or end, with **point=end**) coordinates are within
+    **radius_km** of (**latitude**, **longitude**), closest first.
+    """
+    return json_response(await service.get_routes_nearby(query))
 
 @router.get(
     "/{route_id}",
@@ -50,7 +93,7 @@ async def get_route(
     route_id: int,
     service: routeService.RouteService = Depends(get_route_service)
 ):
-    route = service.get_route_by_id(route_id)
+    route = await service.get_route_by_id(route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
     return route
@@ -61,9 +104,28 @@ async def get_route(
     summary="Get all routes"
 )
 async def list_routes(
+    filters: Annotated[routesSchema.RouteFilter, Query()],
     service: routeService.RouteService = Depends(get_route_service)
 ):
-    return service.get_all_routes()
+    """
+    List routes filtered by vehicle, driver, start time range and whether they are finished (**completed**).
+    
+    Use **limit** to paginate; when there are more rows the response carries an
+    **X-Next-Cursor** header whose value is passed as **after** for the next page.
+    
+    For exports use **stream=ndjson** (one route per line) or **stream=json** (a regular
+    array): rows are read with a server-side cursor and sent as they arrive, so memory
+    stays flat regardless of the number of routes. **limit** is then the total number
+    of rows and no cursor header is sent.
+    """
+    if filters.stream is not None:
+        return StreamingResponse(
+            stream_json(routeService.stream_routes(filters), filters.stream.value),
+            media_type=STREAM_MEDIA_TYPES[filters.stream.value]
+        )
+    routes, next_cursor = await service.get_all_routes(filters)
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return json_response(routes, headers)
 
 @router.put(
     "/{route_id}",
@@ -79,7 +141,7 @@ async def update_route(
     route_data: routesSchema.RouteCreate = Body(..., example={"id_vehicle_fk": 1, "id_user_fk": 1, "description": "Route description", "latitude_start": 12.345678, "longitude_start": 98.765432, "latitude_end": 12.345678, "longitude_end": 98.765432, "start_time": "2021-01-01T00:00:00Z", "end_time": "2021-01-01T00:00:00Z", "estimated_time": 100, "total_duration": 100, "on_time": 100, "start_km": 100, "end_km": 100, "estimated_km": 100, "image_start_km": "image_start_km", "image_end_km": "image_end_km", "on_distance": 100, "liters_consumed": 100}),
     service: routeService.RouteService = Depends(get_route_service)
 ):
-    return service.update_route(route_id, route_data)
+    return await service.update_route(route_id, route_data)
 
 @router.delete(
     "/{route_id}",
@@ -94,7 +156,7 @@ async def delete_route(
     route_id: int,
     service: routeService.RouteService = Depends(get_route_service)
 ):
-    if not service.delete_route(route_id):
+    if not await service.delete_route(route_id):
         raise HTTPException(status_code=404, detail="Route not found")
     return None
 
@@ -131,7 +193,37 @@ async def start_route(
     
     This will also change the vehicle's status to ON_ROUTE.
     """
-    return service.start_route(route_data)
+    return await service.start_route(route_data)
+
+@router.post(
+    "/sync",
+    response_model=syncSchema.LifecycleBatchResponse,
+    summary="Replay a batch of offline route and refueling events",
+    responses={
+        400: {"description": "An event is not a valid state transition; nothing was saved"},
+        404: {"description": "An event references a missing vehicle, route or fuel stop; nothing was saved"}
+    }
+)
+async def sync_lifecycle_events(
+    batch: syncSchema.LifecycleBatch = Body(..., example={"events": [
+        {"event": "route_start", "ref": "r1", "id_vehicle_fk": 1, "id_user_fk": 1, "latitude_start": 21.0, "longitude_start": -89.6, "start_time": "2023-01-01T08:00:00Z", "start_km": 10000, "image_start_km": "path/to/image.jpg"},
+        {"event": "refuel_start", "ref": "f1", "route_ref": "r1", "latitude_stop": 21.1, "longitude_stop": -89.5, "stop_time": "2023-01-01T09:00:00Z"},
+        {"event": "refuel_finish", "fuel_stop_ref": "f1", "resume_time": "2023-01-01T09:10:00Z", "start_time": "2023-01-01T09:12:00Z", "latitude_start": 21.1, "longitude_start": -89.5, "liters_added": 40, "current_km": 10050, "image_km": "path/to/image.jpg"},
+        {"event": "route_end", "route_ref": "r1", "id_vehicle_fk": 1, "id_user_fk": 1, "latitude_end": 21.2, "longitude_end": -89.4, "end_time": "2023-01-01T10:00:00Z", "end_km": 10100, "image_end_km": "path/to/image.jpg"}
+    ]}),
+    service: lifecycleSyncService.LifecycleSyncService = Depends(get_lifecycle_sync_service)
+):
+    """
+    Applies, in order, route start/finish and refueling start/finish events queued on
+    the device while offline, for one or more vehicles, in a single transaction.
+
+    - Routes and fuel stops created in the same batch are referenced by the client `ref`
+      (`route_ref`, `fuel_stop_ref`); existing ones by ID.
+      A `ref` can be used only once per batch for routes and once for fuel stops.
+    - If any event is invalid nothing is saved and the error detail gives its index.
+    - Route estimates are always computed by the background worker (`Pending`).
+    """
+    return await service.apply_events(batch)
 
 @router.post(
     "/finish",
@@ -161,8 +253,36 @@ async def finish_route(
     - **end_time**: Time when the route ends
     - **end_km**: Current vehicle odometer reading
     - **image_end_km**: Path to the image of the odometer
+
+    A route that is already finished is rejected with 400.
+    """
+    return await service.end_route(route_data)
+
+@router.get(
+    "/{route_id}/enrichment",
+    response_model=routesSchema.RouteEnrichmentOut,
+    summary="Get the distance/time enrichment status of a route",
+    responses={404: {"description": "Route not found"}}
+)
+async def get_route_enrichment(
+    route_id: int,
+    service: routeService.RouteService = Depends(get_route_service)
+):
     """
-    return service.end_route(route_data)
+    Returns the enrichment status of a finished route:
+    - **Pending**: waiting for the background worker (DEFERRED_ROUTE_ENRICHMENT)
+    - **Running**: a worker has claimed the route and is computing the estimates; if it
+      does not finish within ROUTE_ENRICHMENT_LEASE seconds, the next periodic rescan
+      (every ROUTE_ENRICHMENT_RESCAN_INTERVAL seconds, in any API process) retries it
+    - **Done**: estimated_km, estimated_time, on_time and on_distance are filled
+    - **Failed**: the estimates could not be computed
+
+    Routes that are not finished yet have no status (null).
+    """
+    enrichment = await service.get_route_enrichment(route_id)
+    if not enrichment:
+        raise HTTPException(status_code=404, detail="Route not found")
+    return enrichment
 
 @router.get(
     "/{route_id}/fuel-stops",
@@ -184,9 +304,9 @@ async def get_route_fuel_stops(
     This endpoint returns a list of all fuel stops that occurred during a route,
     including details such as stop times, fuel amounts, and locations.
     """
-    route = route_service.get_route_by_id(route_id)
+    route = await route_service.get_route_by_id(route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
     
     # Get all fuel stops for this route using the service
-    return fuel_stop_service.get_fuel_stops_by_route_id(route_id)
\ No newline at end of file
+    return json_response(await fuel_stop_service.get_fuel_stops_by_route_id(route_id))
\ No newline at end of file
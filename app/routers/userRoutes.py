@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List
-from sqlalchemy.orm import Session
-from app.schemas.usersSchema import UserCreate, UserOut, UserLogin, Token, UserUpdate
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Response
+from typing import List, Annotated
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.usersSchema import UserCreate, UserOut, UserLogin, Token, UserUpdate, UserFilter
 from app.services.userService import UserService
 from app.repositories.userRepository import UserRepository
 from app.database import get_db
@@ -15,7 +15,7 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-def get_user_service(db: Session = Depends(get_db)):
+def get_user_service(db: AsyncSession = Depends(get_db)):
     repo = UserRepository(db)
     return UserService(repo)
 
@@ -39,13 +39,13 @@ async def create_user(
     - **id_role_fk**: Role ID (foreign key)
     - **id_vehicle_fk**: (Optional) Vehicle ID (foreign key)
     """
-    existing_user = service.repo.get_user_by_email(user_data.email)
+    existing_user = await service.repo.get_user_by_email(user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    return service.create_user(user_data)
+    return await service.create_user(user_data)
 
 @router.get(
     "/{user_id}",
@@ -60,7 +60,7 @@ async def get_user(
     """
     Get details of a specific user by their ID.
     """
-    user = service.get_user_by_id(user_id)
+    user = await service.get_user_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,12 +74,22 @@ async def get_user(
     summary="Get all users"
 )
 async def list_users(
+    response: Response,
+    filters: Annotated[UserFilter, Query()],
     service: UserService = Depends(get_user_service)
 ):
     """
-    Retrieve a list of all registered users.
+    Retrieve a list of all registered users, optionally filtered by role, vehicle,
+    whether they have a vehicle assigned (**assigned**) and by having a finished route
+    between **route_from** and **route_to**.
+    
+    Use **limit** to paginate; when there are more rows the response carries an
+    **X-Next-Cursor** header whose value is passed as **after** for the next page.
     """
-    return service.get_all_users()
+    users, next_cursor = await service.get_all_users(filters)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return users
 
 @router.put(
     "/{user_id}",
@@ -98,7 +108,7 @@ async def update_user(
     """
     Update an existing user's information.
     """
-    updated_user = service.update_user(user_id, user_data)
+    updated_user = await service.update_user(user_id, user_data)
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,7 +132,7 @@ async def delete_user(
     """
     Delete a specific user by their ID.
     """
-    success = service.delete_user(user_id)
+    success = await service.delete_user(user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -147,7 +157,7 @@ async def login(
     Authenticate a user with email and password.
     Returns a JWT token for authorized requests.
     """
-    user = service.authenticate_user(user_data.email, user_data.password)
+    user = await service.authenticate_user(user_data.email, user_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from typing import List, Annotated
 import app.schemas.vehiclesSchema as vehiclesSchema
 import app.schemas.routesSchema as routesSchema
+import app.schemas.reportJobSchema as reportJobSchema
 import app.services.vehicleService as vehicleService
 import app.repositories.vehicleRepository as vehicleRepository
 import app.repositories.routeRepository as routeRepository
 from app.database import get_db
-from sqlalchemy.orm import Session
-from fastapi.responses import StreamingResponse
+from app.utils.dtoUtil import json_response
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse, FileResponse
+from app.utils.excelUtil import ExcelGenerator
+import app.services.reportJobService as reportJobService
 
 router = APIRouter(
   prefix="/vehicles",
@@ -15,10 +19,14 @@ router = APIRouter(
   responses={404: {"description": "Not found"}},
 )
 
-def get_vehicle_service(db: Session = Depends(get_db)):
+def get_vehicle_service(db: AsyncSession = Depends(get_db)):
     repo = vehicleRepository.VehicleRepository(db)
     return vehicleService.VehicleService(repo)
 
+def get_report_job_service(db: AsyncSession = Depends(get_db)):
+    repo = vehicleRepository.VehicleRepository(db)
+    return reportJobService.ReportJobService(repo)
+
 @router.post(
     "/",
     response_model=vehiclesSchema.VehicleOut,
@@ -30,7 +38,7 @@ async def create_vehicle(
     vehicle_data: vehiclesSchema.VehicleCreate = Body(..., example={"number_plate": "ABC123", "serial_number": "1234567890", "year": 2020, "color": "Red", "km": 10000, "km_per_litre": 10, "id_model_fk": 1, "id_description_fk": 1, "id_brand_fk": 1}),
     service: vehicleService.VehicleService = Depends(get_vehicle_service)
 ):
-    return service.create_vehicle(vehicle_data)
+    return await service.create_vehicle(vehicle_data)
 
 @router.get(
     "/{vehicle_id}",
@@ -42,7 +50,7 @@ async def get_vehicle(
     vehicle_id: int,
     service: vehicleService.VehicleService = Depends(get_vehicle_service)
 ):
-    vehicle = service.get_vehicle_by_id(vehicle_id)
+    vehicle = await service.get_vehicle_by_id(vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     return vehicle
@@ -53,9 +61,18 @@ async def get_vehicle(
     summary="Get all vehicles"
 )
 async def list_vehicles(
+    filters: Annotated[vehiclesSchema.VehicleFilter, Query()],
     service: vehicleService.VehicleService = Depends(get_vehicle_service)
 ):
-    return service.get_all_vehicles()
+    """
+    List vehicles filtered by brand, model, route status and assignment status.
+    
+    Use **limit** to paginate; when there are more rows the response carries an
+    **X-Next-Cursor** header whose value is passed as **after** for the next page.
+    """
+    vehicles, next_cursor = await service.get_all_vehicles(filters)
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return json_response(vehicles, headers)
 
 @router.put(
     "/{vehicle_id}",
@@ -71,7 +88,7 @@ async def update_vehicle(
     vehicle_data: vehiclesSchema.VehicleUpdate = Body(..., example={"number_plate": "ABC123", "serial_number": "1234567890", "year": 2020, "color": "Red", "km": 10000, "km_per_litre": 10, "id_model_fk": 1, "id_description_fk": 1, "id_brand_fk": 1}),
     service: vehicleService.VehicleService = Depends(get_vehicle_service)
 ):
-    updated_vehicle = service.update_vehicle(vehicle_id, vehicle_data)
+    updated_vehicle = await service.update_vehicle(vehicle_id, vehicle_data)
     if not updated_vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")    
     return updated_vehicle
@@ -89,7 +106,7 @@ async def delete_vehicle(
     vehicle_id: int,
     service: vehicleService.VehicleService = Depends(get_vehicle_service)
 ):
-    success = service.delete_vehicle(vehicle_id)
+    success = await service.delete_vehicle(vehicle_id)
     if not success:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     return None
@@ -104,6 +121,7 @@ async def delete_vehicle(
 )
 async def export_vehicle_to_excel(
     vehicle_id: int,
+    streaming: bool = Query(False, description="Constant-memory mode for vehicles with a long history"),
     service: vehicleService.VehicleService = Depends(get_vehicle_service)
 ):
     """
@@ -118,9 +136,17 @@ async def export_vehicle_to_excel(
     - Vehicle details
     - Routes summary
     - Fuel stops for each route (as separate sheets)
+    
+    With **streaming=true** rows are read from the database in chunks and written
+    to write-only sheets, so memory stays flat regardless of the vehicle history.
+    In this mode all fuel stops are listed in a single "Fuel Stops" sheet.
     """
     try:
-        excel_file = service.generate_vehicle_excel_report(vehicle_id)
+        if streaming:
+            report_file = await service.generate_vehicle_excel_report_streaming(vehicle_id)
+            excel_file = ExcelGenerator.iter_file(report_file)
+        else:
+            excel_file = await service.generate_vehicle_excel_report(vehicle_id)
         
         # Return the Excel file as a response
         return StreamingResponse(
@@ -133,6 +159,66 @@ async def export_vehicle_to_excel(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating Excel file: {str(e)}")
 
+@router.post(
+    "/{vehicle_id}/reports",
+    response_model=reportJobSchema.ReportJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Request an Excel report of a vehicle in the background",
+    responses={
+        404: {"description": "Vehicle not found"},
+        503: {"description": "Report queue is full"}
+    }
+)
+async def create_vehicle_report(
+    vehicle_id: int,
+    service: reportJobService.ReportJobService = Depends(get_report_job_service)
+):
+    """
+    Queue the same report as **export-excel?streaming=true** and return the job at once.
+
+    Poll **GET /vehicles/{vehicle_id}/reports/{id_job}** until `status` is `done` and
+    download the file from `download_url`. If the vehicle data did not change since the
+    last report (same `watermark`) the stored file is reused (`cached: true`), and
+    simultaneous requests for the same report share one job.
+    """
+    return await service.request_report(vehicle_id)
+
+@router.get(
+    "/{vehicle_id}/reports/{job_id}",
+    response_model=reportJobSchema.ReportJobOut,
+    summary="Get the status of a vehicle report job",
+    responses={404: {"description": "Report job not found"}}
+)
+async def get_vehicle_report(
+    vehicle_id: int,
+    job_id: str,
+    service: reportJobService.ReportJobService = Depends(get_report_job_service)
+):
+    job = await service.get_report(vehicle_id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+@router.get(
+    "/{vehicle_id}/reports/{job_id}/download",
+    summary="Download a finished vehicle report",
+    responses={
+        200: {"description": "Excel file with vehicle data", "content": {"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": {}}},
+        404: {"description": "Report job not found or file replaced by a newer report"},
+        409: {"description": "Report is not finished"}
+    }
+)
+async def download_vehicle_report(
+    vehicle_id: int,
+    job_id: str,
+    service: reportJobService.ReportJobService = Depends(get_report_job_service)
+):
+    return FileResponse(
+        await service.get_report_file(vehicle_id, job_id),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=f"vehicle_{vehicle_id}_report.xlsx"
+    )
+
 @router.get(
     "/{vehicle_id}/routes",
     response_model=List[routesSchema.RouteOut],
@@ -152,10 +238,10 @@ async def get_vehicle_routes(
     This endpoint returns a list of all routes that have been assigned to the vehicle,
     including details such as start/end times, locations, and distances.
     """
-    vehicle = service.get_vehicle_by_id(vehicle_id)
+    vehicle = await service.get_vehicle_by_id(vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
     # Get all routes for this vehicle using the service method
-    return service.get_vehicle_routes(vehicle_id)
+    return json_response(await service.get_vehicle_routes(vehicle_id))
 
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, model_validator
+from typing import Optional, Literal
+from datetime import date
+
+# vehicle/driver/brand/model agrupan por entidad; day/week/month por fecha de fin de la ruta
+AnalyticsGroupBy = Literal["vehicle", "driver", "brand", "model", "day", "week", "month"]
+
+
+class FleetKpiQuery(BaseModel):
+    group_by: AnalyticsGroupBy = "vehicle"
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None  # inclusive
+    id_vehicle_fk: Optional[int] = None
+    id_user_fk: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.from_date and self.to_date and self.from_date > self.to_date:
+            raise ValueError("from_date must be before to_date")
+        return self
+
+
+class FleetKpiOut(BaseModel):
+    group: str
+    label: Optional[str] = None
+    routes_completed: int
+    km: int
+    liters_consumed: float
+    total_duration: float  # horas
+    routes_evaluated: int
+    # Sobre las rutas ya evaluadas por OpenRouteService; None si aún no hay ninguna
+    on_time_rate: Optional[float] = None
+    on_distance_rate: Optional[float] = None
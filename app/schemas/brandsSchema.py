@@ -27,5 +27,18 @@ class BrandWithModels(BrandOut):
     class Config:
         from_attributes = True  # Permite cargar relaciones desde el ORM
 
+# Árbol marca -> modelo -> descripción para llenar los formularios de vehículos en una sola llamada
+class CatalogDescription(BaseModel):
+    id_description: int
+    name: str
+
+class CatalogModel(BaseModel):
+    id_model: int
+    name: str
+    descriptions: List[CatalogDescription] = []
+
+class CatalogBrand(BrandOut):
+    models: List[CatalogModel] = []
+
 # Importación al final para evitar referencia circular entre schemas
 from app.schemas.modelsSchema import ModelOut 
\ No newline at end of file
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, model_validator
+from typing import Optional, Literal
+from datetime import date
+
+ExportTable = Literal["routes", "fuel_stops"]
+ExportFormat = Literal["csv", "parquet", "arrow"]
+
+
+class ExportQuery(BaseModel):
+    table: ExportTable
+    format: ExportFormat = "csv"
+    # routes filtra por start_time y fuel_stops por stop_time
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None  # inclusive
+    id_vehicle_fk: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.from_date and self.to_date and self.from_date > self.to_date:
+            raise ValueError("from_date must be before to_date")
+        return self
+
+
+class ExportResult(BaseModel):
+    table: ExportTable
+    format: ExportFormat
+    path: str
+    rows: int
+    bytes: int
+    seconds: float
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
+from app.schemas.paginationSchema import PageParams, StreamFormat
 
 class FuelStopBase(BaseModel):
     id_route_fk: int
@@ -73,5 +74,12 @@ class FuelStopFinishResponse(BaseModel):
     class Config:
         from_attributes = True
 
-    
-    
+class FuelStopFilter(PageParams):
+    id_route_fk: Optional[int] = None
+    id_vehicle_fk: Optional[int] = None
+    stop_from: Optional[datetime] = None
+    stop_to: Optional[datetime] = None
+    stream: Optional[StreamFormat] = Field(None, description="Send rows as they are read: ndjson or json")
+
+class FuelStopNearbyOut(FuelStopOut):
+    distance_km: float
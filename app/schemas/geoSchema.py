@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+
+# Parámetros comunes de las búsquedas geográficas (coordenadas en grados decimales).
+# Sin `limit` se devuelven todos los puntos encontrados, hasta MAX_GEO_RESULTS.
+MAX_GEO_RESULTS = 1000
+
+class RadiusQuery(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    radius_km: float = Field(..., gt=0, le=500)
+    limit: Optional[int] = Field(None, ge=1, le=MAX_GEO_RESULTS)
+
+class BoundingBoxQuery(BaseModel):
+    min_latitude: float = Field(..., ge=-90, le=90)
+    max_latitude: float = Field(..., ge=-90, le=90)
+    min_longitude: float = Field(..., ge=-180, le=180)
+    max_longitude: float = Field(..., ge=-180, le=180)
+    limit: Optional[int] = Field(None, ge=1, le=MAX_GEO_RESULTS)
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.min_latitude > self.max_latitude or self.min_longitude > self.max_longitude:
+            raise ValueError("min_latitude/min_longitude must not be greater than max_latitude/max_longitude")
+        return self
@@ -3,6 +3,7 @@ from datetime import datetime, time
 from typing import Optional
 # from enum import Enum
 from enum import Enum as PyEnum
+from app.schemas.paginationSchema import PageParams
 
 # class MaintenanceStatus(str, Enum):
 #   IN_PROGRESS = "In Progress"
@@ -35,4 +36,11 @@ class MaintenanceUpdate(BaseModel):
   description: Optional[str] = None
   estimated_time: Optional[time] = None
   end_time: Optional[datetime] = None
-  status: Optional[MaintenanceStatus] = None
\ No newline at end of file
+  status: Optional[MaintenanceStatus] = None
+  id_vehicle_fk: Optional[int] = None
+
+class MaintenanceFilter(PageParams):
+  id_vehicle_fk: Optional[int] = None
+  status: Optional[MaintenanceStatus] = None
+  start_from: Optional[datetime] = None
+  start_to: Optional[datetime] = None
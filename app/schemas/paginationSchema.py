@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from enum import Enum
+
+# Parámetros de paginación por keyset comunes a todos los listados.
+# Sin `limit` se devuelve la lista completa (comportamiento anterior);
+# el cursor de la siguiente página viaja en el header X-Next-Cursor.
+class PageParams(BaseModel):
+    limit: Optional[int] = Field(None, ge=1, le=1000)
+    after: Optional[int] = None
+
+
+# Formato de los listados enviados por partes (?stream=...): un objeto JSON por línea
+# o un arreglo JSON normal que se va escribiendo a medida que llegan las filas.
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+
+class ReportJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ReportJobOut(BaseModel):
+    id_job: str
+    vehicle_id: int
+    status: ReportJobStatus
+    # Sello de los datos del vehículo con el que se generó (o se generará) el reporte
+    watermark: str
+    # True si el archivo ya existía en disco para ese sello y no se volvió a generar
+    cached: bool = False
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
@@ -1,6 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional, Union
+from pydantic import BaseModel, Field
+from typing import Optional, Union, Literal
 from datetime import datetime
+from app.schemas.paginationSchema import PageParams, StreamFormat
+from app.schemas.geoSchema import RadiusQuery, BoundingBoxQuery
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
 
 
 class RouteBase(BaseModel):
@@ -64,8 +67,8 @@ class RouteStartResponse(BaseModel):
     id_vehicle_fk: int
     id_user_fk: int
     description: str
-    latitude_start: str
-    longitude_start: str
+    latitude_start: float
+    longitude_start: float
     start_time: datetime
     start_km: int
     image_start_km: str
@@ -76,14 +79,42 @@ class RouteStartResponse(BaseModel):
         from_attributes = True
         
 class RouteEndResponse(RouteStartResponse):
-    latitude_end: str
-    longitude_end: str
+    latitude_end: float
+    longitude_end: float
     end_time: datetime
     end_km: int
     image_end_km: str
     route_status: str
+    enrichment_status: Optional[str] = None
     
     class Config:
         from_attributes = True
-        
 
+class RouteFilter(PageParams):
+    id_vehicle_fk: Optional[int] = None
+    id_user_fk: Optional[int] = None
+    start_from: Optional[datetime] = None
+    start_to: Optional[datetime] = None
+    completed: Optional[bool] = Field(None, description="true: finished routes, false: routes still in progress")
+    stream: Optional[StreamFormat] = Field(None, description="Send rows as they are read: ndjson or json")
+
+class RouteEnrichmentOut(BaseModel):
+    id_route: int
+    # Pending -> Running (tomada por un worker) -> Done/Failed; NULL en rutas sin finalizar
+    enrichment_status: Optional[RouteEnrichmentStatus] = None
+    estimated_km: Optional[int] = None
+    estimated_time: Optional[float] = None
+    on_time: Optional[bool] = None
+    on_distance: Optional[bool] = None
+
+# Punto de la ruta sobre el que se hace la búsqueda geográfica
+RoutePoint = Literal["start", "end"]
+
+class RouteRadiusQuery(RadiusQuery):
+    point: RoutePoint = "start"
+
+class RouteBoundingBoxQuery(BoundingBoxQuery):
+    point: RoutePoint = "start"
+
+class RouteNearbyOut(RouteOut):
+    distance_km: float
@@ -0,0 +1,74 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, Union, Literal, List, Annotated
+from app.schemas.routesSchema import RouteStartSchema, RouteEndSchema
+from app.schemas.fuelStopSchema import FuelStopStartSchema, FuelStopFinishSchema
+from app.config import SYNC_MAX_EVENTS
+
+# Eventos que el dispositivo guarda sin cobertura y reenvía en orden.
+# Las rutas y paradas creadas en el mismo lote todavía no tienen ID: el dispositivo
+# les asigna un `ref` propio y los eventos siguientes lo usan en `route_ref` / `fuel_stop_ref`.
+
+
+def _one_of(event, id_field: str, ref_field: str):
+    if (getattr(event, id_field) is None) == (getattr(event, ref_field) is None):
+        raise ValueError(f"Exactly one of {id_field} or {ref_field} is required")
+    return event
+
+
+class RouteStartEvent(RouteStartSchema):
+    event: Literal["route_start"]
+    ref: Optional[str] = None
+
+
+class RouteEndEvent(RouteEndSchema):
+    event: Literal["route_end"]
+    id_route: Optional[int] = None
+    route_ref: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_route(self):
+        return _one_of(self, "id_route", "route_ref")
+
+
+class FuelStopStartEvent(FuelStopStartSchema):
+    event: Literal["refuel_start"]
+    id_route_fk: Optional[int] = None
+    route_ref: Optional[str] = None
+    ref: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_route(self):
+        return _one_of(self, "id_route_fk", "route_ref")
+
+
+class FuelStopFinishEvent(FuelStopFinishSchema):
+    event: Literal["refuel_finish"]
+    id_fuel_stop: Optional[int] = None
+    fuel_stop_ref: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_fuel_stop(self):
+        return _one_of(self, "id_fuel_stop", "fuel_stop_ref")
+
+
+LifecycleEvent = Annotated[
+    Union[RouteStartEvent, RouteEndEvent, FuelStopStartEvent, FuelStopFinishEvent],
+    Field(discriminator="event")
+]
+
+
+class LifecycleBatch(BaseModel):
+    events: List[LifecycleEvent] = Field(..., min_length=1, max_length=SYNC_MAX_EVENTS)
+
+
+class LifecycleEventResult(BaseModel):
+    index: int
+    event: str
+    ref: Optional[str] = None
+    id_route: Optional[int] = None
+    id_fuel_stop: Optional[int] = None
+    vehicle_status: str
+
+
+class LifecycleBatchResponse(BaseModel):
+    results: List[LifecycleEventResult]
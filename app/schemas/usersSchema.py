@@ -1,5 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
+from datetime import datetime
+from app.schemas.paginationSchema import PageParams
 
 class UserBase(BaseModel):
   first_name: str
@@ -35,4 +37,13 @@ class UserUpdate(BaseModel):
   email: Optional[EmailStr] = None
   password: Optional[str] = None
   id_role_fk: Optional[int] = None
-  id_vehicle_fk: Optional[int] = None
\ No newline at end of file
+  id_vehicle_fk: Optional[int] = None
+
+class UserFilter(PageParams):
+  id_role_fk: Optional[int] = None
+  id_vehicle_fk: Optional[int] = None
+  # User no tiene columnas de fecha ni de estado: el estado es si tiene vehículo asignado
+  # y el rango de fechas se aplica a sus rutas finalizadas
+  assigned: Optional[bool] = Field(None, description="true: users with an assigned vehicle, false: without one")
+  route_from: Optional[datetime] = Field(None, description="Users with a route finished at or after this time")
+  route_to: Optional[datetime] = Field(None, description="Users with a route finished before this time")
@@ -3,6 +3,7 @@ from sqlalchemy import Column, Integer, String, ForeignKey, Enum
 from typing import Optional
 from app.models.vehicleRoute import vehicleRoute
 from app.models.VehicleAssignmentStatus import VehicleAssignmentStatus
+from app.schemas.paginationSchema import PageParams
 
 class VehicleBase(BaseModel):
     number_plate: str
@@ -38,4 +39,10 @@ class VehicleUpdate(BaseModel):
   color: Optional[str] = None
   km: Optional[int] = None
   route_status: Optional[vehicleRoute] = None
-  assignment_status: Optional[VehicleAssignmentStatus] = None
\ No newline at end of file
+  assignment_status: Optional[VehicleAssignmentStatus] = None
+
+class VehicleFilter(PageParams):
+  id_brand_fk: Optional[int] = None
+  id_model_fk: Optional[int] = None
+  route_status: Optional[vehicleRoute] = None
+  assignment_status: Optional[VehicleAssignmentStatus] = None
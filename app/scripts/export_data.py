@@ -0,0 +1,67 @@
+"""
+Exporta el histórico de rutas o de paradas de combustible de toda la flota.
+
+Uso:
+    python -m app.scripts.export_data routes --format parquet --output routes.parquet
+    python -m app.scripts.export_data fuel_stops --from-date 2024-01-01 --to-date 2024-03-31 --vehicle 7
+
+Formatos: csv, parquet y arrow (Arrow IPC / Feather v2; usan pyarrow, incluido en
+requirements.txt). Las filas se leen y escriben en bloques de --chunk-size, así que la
+memoria no depende del tamaño de la tabla.
+"""
+import argparse
+import sys
+from datetime import date
+from pydantic import ValidationError
+from app.database import SessionLocal
+from app.schemas.exportSchema import ExportQuery
+from app.repositories.exportRepository import ExportRepository
+from app.services.exportService import ExportService
+from app.config import EXPORT_CHUNK_SIZE
+
+EXTENSIONS = {"csv": "csv", "parquet": "parquet", "arrow": "arrow"}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export routes or fuel stops to CSV, Parquet or Arrow IPC")
+    parser.add_argument("table", choices=["routes", "fuel_stops"])
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv")
+    parser.add_argument("--output", "-o", help="Output file (default: <table>.<format>)")
+    parser.add_argument("--from-date", type=date.fromisoformat, help="First day, YYYY-MM-DD (start_time / stop_time)")
+    parser.add_argument("--to-date", type=date.fromisoformat, help="Last day included, YYYY-MM-DD")
+    parser.add_argument("--vehicle", type=int, dest="id_vehicle_fk", help="Only this vehicle")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows per batch")
+    return parser.parse_args(argv)
+
+
+def export_data(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        query = ExportQuery(
+            table=args.table,
+            format=args.format,
+            from_date=args.from_date,
+            to_date=args.to_date,
+            id_vehicle_fk=args.id_vehicle_fk
+        )
+    except ValidationError as e:
+        print(f"Invalid arguments: {e.errors()[0]['msg']}", file=sys.stderr)
+        return 2
+    path = args.output or f"{args.table}.{EXTENSIONS[args.format]}"
+
+    db = SessionLocal()
+    try:
+        result = ExportService(ExportRepository(db)).export(query, path, chunk_size=args.chunk_size)
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    rate = result.rows / result.seconds if result.seconds else 0
+    print(f"{result.rows} rows -> {result.path} ({result.bytes / 2**20:.1f} MiB) in {result.seconds:.1f}s, {rate:.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(export_data())
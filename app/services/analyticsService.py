@@ -0,0 +1,38 @@
+from typing import Optional
+from app.schemas.analyticsSchema import FleetKpiQuery, FleetKpiOut
+from app.repositories.analyticsRepository import AnalyticsRepository
+
+
+class AnalyticsService:
+    def __init__(self, analytics_repo: AnalyticsRepository) -> None:
+        self.repo = analytics_repo
+
+    def _rate(self, count: int, total: int) -> Optional[float]:
+        return round(count / total, 4) if total else None
+
+    async def get_fleet_kpis(self, query: FleetKpiQuery) -> list[FleetKpiOut]:
+        """
+        KPIs de rutas finalizadas agrupados por vehículo, conductor, marca, modelo o periodo.
+
+        Siempre se agrega sobre Route (índices de end_time, id_vehicle_fk e id_user_fk):
+        así el resultado no depende de qué filtros se pidan ni de que las tablas de
+        resumen ya reflejen las últimas ediciones.
+        """
+        rows = await self.repo.get_route_kpis(
+            query.group_by, query.from_date, query.to_date, query.id_vehicle_fk, query.id_user_fk
+        )
+
+        return [
+            FleetKpiOut(
+                group=str(row.group),
+                label=row.label,
+                routes_completed=row.routes_completed,
+                km=row.km or 0,
+                liters_consumed=row.liters_consumed or 0,
+                total_duration=row.total_duration or 0,
+                routes_evaluated=row.routes_evaluated or 0,
+                on_time_rate=self._rate(row.on_time_routes, row.routes_evaluated),
+                on_distance_rate=self._rate(row.on_distance_routes, row.routes_evaluated)
+            )
+            for row in rows
+        ]
@@ -1,38 +1,62 @@
 from typing import Optional
-from app.schemas.brandsSchema import BrandCreate, BrandOut
+from app.schemas.brandsSchema import BrandCreate, BrandOut, CatalogBrand, CatalogModel, CatalogDescription
 from app.repositories.brandRepository import BrandRepository
 from app.models.brandsModel import Brand
+from app.utils.catalogCacheUtil import catalog_cache
 
 class BrandService:
   def __init__(self, brand_repo: BrandRepository) -> None:
     self.repo = brand_repo
     
-  def create_brand(self, brand: BrandCreate) -> BrandOut:
+  async def create_brand(self, brand: BrandCreate) -> BrandOut:
     db_brand = Brand(name=brand.name)
-    created_brand = self.repo.create_brand(db_brand)
+    created_brand = await self.repo.create_brand(db_brand)
+    await catalog_cache.invalidate("brands")
     return BrandOut(id_brand=created_brand.id_brand, name=created_brand.name)
   
-  def get_brand_by_id(self, brand_id: int) -> Optional[BrandOut]:
-    db_brand = self.repo.get_brand_by_id(brand_id)
+  async def get_brand_by_id(self, brand_id: int) -> Optional[BrandOut]:
+    db_brand = await self.repo.get_brand_by_id(brand_id)
     if db_brand is not None:
       return BrandOut(id_brand=db_brand.id_brand, name=db_brand.name)
     return None
 
-  def get_all_brands(self) -> list[BrandOut]:
-    db_brands = self.repo.get_all_brands()
+  async def get_all_brands(self) -> list[BrandOut]:
+    db_brands = await self.repo.get_all_brands()
     return [BrandOut(id_brand=brand.id_brand, name=brand.name) for brand in db_brands]
+
+  async def get_catalog_tree(self) -> list[CatalogBrand]:
+    db_brands = await self.repo.get_catalog_tree()
+    return [
+      CatalogBrand(
+        id_brand=brand.id_brand,
+        name=brand.name,
+        models=[
+          CatalogModel(
+            id_model=model.id_model,
+            name=model.name,
+            descriptions=[
+              CatalogDescription(id_description=description.id_description, name=description.name)
+              for description in sorted(model.descriptions, key=lambda d: d.id_description)
+            ]
+          ) for model in sorted(brand.models, key=lambda m: m.id_model)
+        ]
+      ) for brand in db_brands
+    ]
   
-  def update_brand(self, id_brand: int, brand: BrandCreate) -> Optional[BrandOut]:
-    db_brand = self.repo.get_brand_by_id(id_brand)
+  async def update_brand(self, id_brand: int, brand: BrandCreate) -> Optional[BrandOut]:
+    db_brand = await self.repo.get_brand_by_id(id_brand)
     if db_brand is not None:
       db_brand.name = brand.name
-      updated_brand = self.repo.update_brand(db_brand)
+      updated_brand = await self.repo.update_brand(db_brand)
+      await catalog_cache.invalidate("brands")
       return BrandOut(id_brand=updated_brand.id_brand, name=updated_brand.name)
     return None
 
-  def delete_brand(self, id_brand: int) -> bool:
-    db_brand = self.repo.get_brand_by_id(id_brand)
+  async def delete_brand(self, id_brand: int) -> bool:
+    db_brand = await self.repo.get_brand_by_id(id_brand)
     if db_brand is not None:
-      return self.repo.delete_brand(db_brand)
+      deleted = await self.repo.delete_brand(db_brand)
+      await catalog_cache.invalidate("brands")
+      return deleted
     return False
     
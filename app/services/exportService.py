@@ -0,0 +1,33 @@
+import os
+import time
+from app.schemas.exportSchema import ExportQuery, ExportResult
+from app.repositories.exportRepository import ExportRepository
+from app.utils.exportUtil import write_export
+from app.config import EXPORT_CHUNK_SIZE
+
+
+class ExportService:
+    def __init__(self, export_repo: ExportRepository) -> None:
+        self.repo = export_repo
+
+    def export(self, query: ExportQuery, path: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> ExportResult:
+        """
+        Exporta la tabla de rutas o de paradas de combustible (filtrada por fechas y
+        vehículo) a CSV, Parquet o Arrow IPC, leyendo y escribiendo por bloques.
+        """
+        filters = dict(from_date=query.from_date, to_date=query.to_date, id_vehicle_fk=query.id_vehicle_fk, chunk_size=chunk_size)
+        if query.table == "routes":
+            columns, chunks = self.repo.route_columns(), self.repo.iter_routes(**filters)
+        else:
+            columns, chunks = self.repo.fuel_stop_columns(), self.repo.iter_fuel_stops(**filters)
+
+        started = time.perf_counter()
+        rows = write_export(query.format, path, columns, chunks)
+        return ExportResult(
+            table=query.table,
+            format=query.format,
+            path=path,
+            rows=rows,
+            bytes=os.path.getsize(path),
+            seconds=round(time.perf_counter() - started, 3)
+        )
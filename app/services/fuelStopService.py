@@ -1,143 +1,170 @@
-from typing import Optional, Union
+from typing import Optional
 from app.schemas.fuelStopSchema import (
     FuelStopCreate, FuelStopOut, FuelStopStartSchema, 
-    FuelStopStartResponse, FuelStopFinishSchema, FuelStopFinishResponse
+    FuelStopStartResponse, FuelStopFinishSchema, FuelStopFinishResponse, FuelStopFilter
 )
+from app.schemas.geoSchema import RadiusQuery, BoundingBoxQuery, MAX_GEO_RESULTS
+from app.utils.geoUtil import haversine_km, bounding_box
+from app.utils.paginationUtil import split_page
+from app.utils.retryUtil import retry_on_conflict
+from app.utils.dtoUtil import OutMapper
 from app.repositories.fuelStopRepository import FuelStopRepository
 from app.repositories.vehicleRepository import VehicleRepository
 from app.repositories.routeRepository import RouteRepository
+from app.repositories.fleetStatsRepository import FleetStatsRepository, refuel_contribution
 from app.models.fuelStopsModel import FuelStop
 from app.models.vehicleRoute import vehicleRoute
 from fastapi import HTTPException
+from app.config import LIST_STREAM_CHUNK_SIZE
+from app.database import AsyncSessionLocal
+
+
+# Las columnas de coordenadas del modelo empiezan con mayúscula; liters_added es DECIMAL
+fuel_stop_out = OutMapper(
+    FuelStopOut,
+    renames={
+        "latitude_stop": "Latitude_stop",
+        "longitude_stop": "Longitude_stop",
+        "latitude_start": "Latitude_start",
+        "longitude_start": "Longitude_start"
+    },
+    converters={"liters_added": float},
+    computed={"route_name": lambda fuel_stop: fuel_stop.route.description if fuel_stop.route else None}
+)
+
+
+async def stream_fuel_stops(filters: FuelStopFilter, chunk_size: int = LIST_STREAM_CHUNK_SIZE):
+    """
+    Bloques de filas de FuelStopOut para GET /fuel-stops/?stream=...
+
+    Con su propia sesión, igual que routeService.stream_routes.
+    """
+    async with AsyncSessionLocal() as db:
+        async for rows in FuelStopRepository(db).stream_fuel_stops(**filters.model_dump(exclude={"stream"}), chunk_size=chunk_size):
+            yield fuel_stop_out.from_rows(rows)
+
+
+def new_fuel_stop(fuel_stop_data: FuelStopStartSchema) -> FuelStop:
+    """Parada recién iniciada, con valores por defecto para los campos que se llenan al finalizar la carga."""
+    return FuelStop(
+        id_route_fk=fuel_stop_data.id_route_fk,
+        Latitude_stop=fuel_stop_data.latitude_stop,
+        Longitude_stop=fuel_stop_data.longitude_stop,
+        stop_time=fuel_stop_data.stop_time,
+        resume_time=None,
+        start_time=None,
+        Latitude_start=None,
+        Longitude_start=None,
+        liters_added=0.0  # Valor por defecto que se actualizará al finalizar la carga
+    )
+
+
+def finish_fuel_stop(fuel_stop: FuelStop, fuel_stop_data: FuelStopFinishSchema) -> None:
+    fuel_stop.resume_time = fuel_stop_data.resume_time
+    fuel_stop.start_time = fuel_stop_data.start_time
+    fuel_stop.Latitude_start = fuel_stop_data.latitude_start
+    fuel_stop.Longitude_start = fuel_stop_data.longitude_start
+    fuel_stop.liters_added = fuel_stop_data.liters_added
+    fuel_stop.current_km = fuel_stop_data.current_km
+    fuel_stop.image_km = fuel_stop_data.image_km
+
 
 class FuelStopService:
-    def __init__(self, fuel_stop_repo: FuelStopRepository, vehicle_repo: VehicleRepository = None, route_repo: RouteRepository = None) -> None:
+    def __init__(self, fuel_stop_repo: FuelStopRepository, vehicle_repo: VehicleRepository = None, route_repo: RouteRepository = None, stats_repo: FleetStatsRepository = None) -> None:
         self.repo = fuel_stop_repo
         self.vehicle_repo = vehicle_repo
         self.route_repo = route_repo
+        self.stats_repo = stats_repo
         
-    def _to_str(self, value: Union[str, float]) -> str:
-        """Convierte valores numéricos a cadenas."""
-        if isinstance(value, str):
-            return value
-        return str(value)
-
-    def create_fuel_stop(self, fuel_stop: FuelStopCreate) -> FuelStopOut:
+    async def create_fuel_stop(self, fuel_stop: FuelStopCreate) -> FuelStopOut:
         db_fuel_stop = FuelStop(
             id_route_fk=fuel_stop.id_route_fk,
-            Latitude_stop=self._to_str(fuel_stop.latitude_stop),
-            Longitude_stop=self._to_str(fuel_stop.longitude_stop),
+            Latitude_stop=fuel_stop.latitude_stop,
+            Longitude_stop=fuel_stop.longitude_stop,
             stop_time=fuel_stop.stop_time,
             resume_time=fuel_stop.resume_time,
             start_time=fuel_stop.start_time,
-            Latitude_start=self._to_str(fuel_stop.latitude_start) if fuel_stop.latitude_start else None,
-            Longitude_start=self._to_str(fuel_stop.longitude_start) if fuel_stop.longitude_start else None,
+            Latitude_start=fuel_stop.latitude_start,
+            Longitude_start=fuel_stop.longitude_start,
             liters_added=fuel_stop.liters_added
         )
-        created_fuel_stop = self.repo.create_fuel_stop(db_fuel_stop)
-        return FuelStopOut(
-            id_fuel_stop=created_fuel_stop.id_fuel_stop,
-            id_route_fk=created_fuel_stop.id_route_fk,
-            latitude_stop=created_fuel_stop.Latitude_stop,
-            longitude_stop=created_fuel_stop.Longitude_stop,
-            stop_time=created_fuel_stop.stop_time,
-            resume_time=created_fuel_stop.resume_time,
-            start_time=created_fuel_stop.start_time,
-            latitude_start=created_fuel_stop.Latitude_start,
-            longitude_start=created_fuel_stop.Longitude_start,
-            liters_added=created_fuel_stop.liters_added,
-            route_name=created_fuel_stop.route.description if created_fuel_stop.route else None
-        )
+        if self.stats_repo:
+            route = await self.route_repo.get_route_by_id(db_fuel_stop.id_route_fk)
+            await self.stats_repo.record_change(None, refuel_contribution(db_fuel_stop, route))
+        created_fuel_stop = await self.repo.create_fuel_stop(db_fuel_stop)
+        return fuel_stop_out(created_fuel_stop)
 
-    def get_fuel_stop_by_id(self, fuel_stop_id: int) -> Optional[FuelStopOut]:
-        db_fuel_stop = self.repo.get_fuel_stop_by_id(fuel_stop_id)
+    async def get_fuel_stop_by_id(self, fuel_stop_id: int) -> Optional[FuelStopOut]:
+        db_fuel_stop = await self.repo.get_fuel_stop_row(fuel_stop_id)
         if db_fuel_stop is not None:
-            return FuelStopOut(
-                id_fuel_stop=db_fuel_stop.id_fuel_stop,
-                id_route_fk=db_fuel_stop.id_route_fk,
-                latitude_stop=db_fuel_stop.Latitude_stop,
-                longitude_stop=db_fuel_stop.Longitude_stop,
-                stop_time=db_fuel_stop.stop_time,
-                resume_time=db_fuel_stop.resume_time,
-                start_time=db_fuel_stop.start_time,
-                latitude_start=db_fuel_stop.Latitude_start,
-                longitude_start=db_fuel_stop.Longitude_start,
-                liters_added=db_fuel_stop.liters_added,
-                route_name=db_fuel_stop.route.description if db_fuel_stop.route else None
-            )
+            return fuel_stop_out.construct(fuel_stop_out.from_row(db_fuel_stop))
         return None
     
-    def get_fuel_stops_by_route_id(self, route_id: int) -> list[FuelStopOut]:
-        db_fuel_stops = self.repo.get_fuel_stops_by_route_id(route_id)
-        return [
-            FuelStopOut(
-                id_fuel_stop=fuel_stop.id_fuel_stop,
-                id_route_fk=fuel_stop.id_route_fk,
-                latitude_stop=fuel_stop.Latitude_stop,
-                longitude_stop=fuel_stop.Longitude_stop,
-                stop_time=fuel_stop.stop_time,
-                resume_time=fuel_stop.resume_time,
-                start_time=fuel_stop.start_time,
-                latitude_start=fuel_stop.Latitude_start,
-                longitude_start=fuel_stop.Longitude_start,
-                liters_added=fuel_stop.liters_added,
-                route_name=fuel_stop.route.description if fuel_stop.route else None
-            ) for fuel_stop in db_fuel_stops
-        ]
+    async def get_fuel_stops_by_route_id(self, route_id: int) -> list[dict]:
+        db_fuel_stops = await self.repo.get_fuel_stops_by_route_id(route_id)
+        return fuel_stop_out.from_rows(db_fuel_stops)
     
-    def get_all_fuel_stops(self) -> list[FuelStopOut]:  
-        db_fuel_stops = self.repo.get_all_fuel_stops()
+    async def get_all_fuel_stops(self, filters: FuelStopFilter) -> tuple[list[dict], Optional[int]]:  
+        db_fuel_stops, next_cursor = split_page(
+            await self.repo.get_all_fuel_stops(**filters.model_dump(exclude={"stream"})),
+            filters.limit, "id_fuel_stop"
+        )
+        return fuel_stop_out.from_rows(db_fuel_stops), next_cursor
+        
+    async def get_fuel_stops_within(self, query: BoundingBoxQuery) -> list[dict]:
+        db_fuel_stops = await self.repo.get_fuel_stops_in_box(
+            query.min_latitude, query.max_latitude, query.min_longitude, query.max_longitude,
+            limit=query.limit or MAX_GEO_RESULTS
+        )
+        return fuel_stop_out.from_rows(db_fuel_stops)
+    
+    async def get_fuel_stops_nearby(self, query: RadiusQuery) -> list[dict]:
+        """Paradas a menos de radius_km del punto dado, ordenadas por distancia."""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(query.latitude, query.longitude, query.radius_km)
+        db_fuel_stops = await self.repo.get_fuel_stops_in_box(min_lat, max_lat, min_lon, max_lon)
+        nearby = []
+        for fuel_stop in db_fuel_stops:
+            distance = haversine_km(query.latitude, query.longitude, fuel_stop.latitude_stop, fuel_stop.longitude_stop)
+            if distance <= query.radius_km:
+                nearby.append((distance, fuel_stop))
+        nearby.sort(key=lambda item: item[0])
         return [
-            FuelStopOut(
-                id_fuel_stop=fuel_stop.id_fuel_stop,
-                id_route_fk=fuel_stop.id_route_fk,
-                latitude_stop=fuel_stop.Latitude_stop,
-                longitude_stop=fuel_stop.Longitude_stop,
-                stop_time=fuel_stop.stop_time,
-                resume_time=fuel_stop.resume_time,
-                start_time=fuel_stop.start_time,
-                latitude_start=fuel_stop.Latitude_start,
-                longitude_start=fuel_stop.Longitude_start,
-                liters_added=fuel_stop.liters_added,
-                route_name=fuel_stop.route.description if fuel_stop.route else None
-            ) for fuel_stop in db_fuel_stops
+            {**fuel_stop_out.from_row(fuel_stop), "distance_km": round(distance, 3)}
+            for distance, fuel_stop in nearby[:query.limit or MAX_GEO_RESULTS]
         ]
         
-    def update_fuel_stop(self, fuel_stop_id: int, fuel_stop: FuelStopCreate) -> Optional[FuelStopOut]:
-        db_fuel_stop = self.repo.get_fuel_stop_by_id(fuel_stop_id)
+    async def update_fuel_stop(self, fuel_stop_id: int, fuel_stop: FuelStopCreate) -> Optional[FuelStopOut]:
+        db_fuel_stop = await self.repo.get_fuel_stop_by_id(fuel_stop_id)
         if db_fuel_stop is not None:
+            old_contribution = refuel_contribution(db_fuel_stop, db_fuel_stop.route)
             db_fuel_stop.id_route_fk = fuel_stop.id_route_fk
-            db_fuel_stop.Latitude_stop = self._to_str(fuel_stop.latitude_stop)
-            db_fuel_stop.Longitude_stop = self._to_str(fuel_stop.longitude_stop)
+            db_fuel_stop.Latitude_stop = fuel_stop.latitude_stop
+            db_fuel_stop.Longitude_stop = fuel_stop.longitude_stop
             db_fuel_stop.stop_time = fuel_stop.stop_time
             db_fuel_stop.resume_time = fuel_stop.resume_time
             db_fuel_stop.start_time = fuel_stop.start_time
-            db_fuel_stop.Latitude_start = self._to_str(fuel_stop.latitude_start) if fuel_stop.latitude_start else None
-            db_fuel_stop.Longitude_start = self._to_str(fuel_stop.longitude_start) if fuel_stop.longitude_start else None
+            db_fuel_stop.Latitude_start = fuel_stop.latitude_start
+            db_fuel_stop.Longitude_start = fuel_stop.longitude_start
             db_fuel_stop.liters_added = fuel_stop.liters_added
-            updated_fuel_stop = self.repo.update_fuel_stop(db_fuel_stop)
-            return FuelStopOut(
-                id_fuel_stop=updated_fuel_stop.id_fuel_stop,
-                id_route_fk=updated_fuel_stop.id_route_fk,
-                latitude_stop=updated_fuel_stop.Latitude_stop,
-                longitude_stop=updated_fuel_stop.Longitude_stop,
-                stop_time=updated_fuel_stop.stop_time,
-                resume_time=updated_fuel_stop.resume_time,
-                start_time=updated_fuel_stop.start_time,
-                latitude_start=updated_fuel_stop.Latitude_start,
-                longitude_start=updated_fuel_stop.Longitude_start,
-                liters_added=updated_fuel_stop.liters_added,
-                route_name=updated_fuel_stop.route.description if updated_fuel_stop.route else None
-            )
+            # Los litros pueden pasar a otro día o, con otra ruta, a otro vehículo/conductor
+            if self.stats_repo:
+                route = db_fuel_stop.route
+                if route is None or route.id_route != db_fuel_stop.id_route_fk:
+                    route = await self.route_repo.get_route_by_id(db_fuel_stop.id_route_fk)
+                await self.stats_repo.record_change(old_contribution, refuel_contribution(db_fuel_stop, route))
+            updated_fuel_stop = await self.repo.update_fuel_stop(db_fuel_stop)
+            return fuel_stop_out(updated_fuel_stop)
         return None
     
-    def delete_fuel_stop(self, fuel_stop_id: int) -> bool:
-        db_fuel_stop = self.repo.get_fuel_stop_by_id(fuel_stop_id)
+    async def delete_fuel_stop(self, fuel_stop_id: int) -> bool:
+        db_fuel_stop = await self.repo.get_fuel_stop_by_id(fuel_stop_id)
         if db_fuel_stop is not None:
-            return self.repo.delete_fuel_stop(db_fuel_stop)
+            if self.stats_repo:
+                await self.stats_repo.record_change(refuel_contribution(db_fuel_stop, db_fuel_stop.route), None)
+            return await self.repo.delete_fuel_stop(db_fuel_stop)
         return False
     
-    def start_refueling(self, fuel_stop_data: FuelStopStartSchema) -> FuelStopStartResponse:
+    async def start_refueling(self, fuel_stop_data: FuelStopStartSchema) -> FuelStopStartResponse:
         """
         Inicia una parada para reabastecimiento de combustible y cambia el estado del vehículo a REFUELING
         
@@ -147,37 +174,27 @@ class FuelStopService:
         Returns:
             FuelStopStartResponse con la información de la parada creada
         """
+        return await retry_on_conflict(lambda: self._start_refueling(fuel_stop_data), self.repo.rollback)
+
+    async def _start_refueling(self, fuel_stop_data: FuelStopStartSchema) -> FuelStopStartResponse:
+        # Una sola transacción; el UPDATE del vehículo compara su versión (optimista)
+        route = await self.route_repo.get_route_by_id(fuel_stop_data.id_route_fk)
+        if not route:
+            raise HTTPException(status_code=404, detail="Route not found")
+        vehicle = await self.vehicle_repo.get_vehicle_for_transition(route.id_vehicle_fk)
+        if not vehicle:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        # Verificar que el vehículo esté en estado ON_ROUTE
+        if vehicle.route_status != vehicleRoute.ON_ROUTE:
+            raise HTTPException(status_code=400, detail="Vehicle is not in ON_ROUTE state")
+
+        # Actualizar el estado del vehículo a REFUELING (mismo commit que la parada); el
+        # UPDATE se envía antes del INSERT de la parada
+        vehicle.route_status = vehicleRoute.REFUELING
+        await self.vehicle_repo.flush_transition()
         # Creamos la parada de combustible con valores por defecto para campos requeridos
-        db_fuel_stop = FuelStop(
-            id_route_fk=fuel_stop_data.id_route_fk,
-            Latitude_stop=self._to_str(fuel_stop_data.latitude_stop),
-            Longitude_stop=self._to_str(fuel_stop_data.longitude_stop),
-            stop_time=fuel_stop_data.stop_time,
-            resume_time=None,
-            start_time=None,
-            Latitude_start=None,
-            Longitude_start=None,
-            liters_added=0.0  # Valor por defecto que se actualizará al finalizar la carga
-        )
-        
-        created_fuel_stop = self.repo.create_fuel_stop(db_fuel_stop)
-        
-        # Cambiar el estado del vehículo a REFUELING si tenemos acceso al repositorio de vehículos
-        vehicle_status = ""
-        if self.vehicle_repo and self.route_repo and created_fuel_stop:
-            # Obtener la ruta para saber qué vehículo está involucrado
-            route = self.route_repo.get_route_by_id(fuel_stop_data.id_route_fk)
-            if route:
-                vehicle = self.vehicle_repo.get_vehicle_by_id(route.id_vehicle_fk)
-                if vehicle:
-                    # Verificar que el vehículo esté en estado ON_ROUTE
-                    if vehicle.route_status != vehicleRoute.ON_ROUTE:
-                        raise HTTPException(status_code=400, detail="Vehicle is not in ON_ROUTE state")
-                    
-                    # Actualizar el estado del vehículo a REFUELING
-                    vehicle.route_status = vehicleRoute.REFUELING
-                    self.vehicle_repo.update_vehicle(vehicle)
-                    vehicle_status = vehicleRoute.REFUELING.value
+        created_fuel_stop = await self.repo.add_fuel_stop(new_fuel_stop(fuel_stop_data))
+        await self.repo.commit()
         
         return FuelStopStartResponse(
             id_fuel_stop=created_fuel_stop.id_fuel_stop,
@@ -185,11 +202,11 @@ class FuelStopService:
             latitude_stop=created_fuel_stop.Latitude_stop,
             longitude_stop=created_fuel_stop.Longitude_stop,
             stop_time=created_fuel_stop.stop_time,
-            route_name=created_fuel_stop.route.description if created_fuel_stop.route else None,
-            vehicle_status=vehicle_status
+            route_name=route.description,
+            vehicle_status=vehicle.route_status.value
         )
         
-    def finish_refueling(self, fuel_stop_data: FuelStopFinishSchema) -> FuelStopFinishResponse:
+    async def finish_refueling(self, fuel_stop_data: FuelStopFinishSchema) -> FuelStopFinishResponse:
         """
         Finaliza una parada de reabastecimiento de combustible y cambia el estado del vehículo de vuelta a ON_ROUTE
         
@@ -199,40 +216,37 @@ class FuelStopService:
         Returns:
             FuelStopFinishResponse con la información completa de la parada
         """
+        return await retry_on_conflict(lambda: self._finish_refueling(fuel_stop_data), self.repo.rollback)
+
+    async def _finish_refueling(self, fuel_stop_data: FuelStopFinishSchema) -> FuelStopFinishResponse:
         # Obtener la parada de combustible existente
-        db_fuel_stop = self.repo.get_fuel_stop_by_id(fuel_stop_data.id_fuel_stop)
+        db_fuel_stop = await self.repo.get_fuel_stop_by_id(fuel_stop_data.id_fuel_stop)
         if not db_fuel_stop:
             raise HTTPException(status_code=404, detail="Fuel stop not found")
         
+        # Obtener la ruta para saber qué vehículo está involucrado (con su versión actual)
+        route = db_fuel_stop.route
+        vehicle = await self.vehicle_repo.get_vehicle_for_transition(route.id_vehicle_fk)
+        if not vehicle:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        # Verificar que el vehículo esté en estado REFUELING
+        if vehicle.route_status != vehicleRoute.REFUELING:
+            raise HTTPException(status_code=400, detail="Vehicle is not in REFUELING state")
+
         # Actualizar datos de la parada de combustible
-        db_fuel_stop.resume_time = fuel_stop_data.resume_time
-        db_fuel_stop.start_time = fuel_stop_data.start_time
-        db_fuel_stop.Latitude_start = self._to_str(fuel_stop_data.latitude_start)
-        db_fuel_stop.Longitude_start = self._to_str(fuel_stop_data.longitude_start)
-        db_fuel_stop.liters_added = fuel_stop_data.liters_added
-        db_fuel_stop.current_km = fuel_stop_data.current_km
-        db_fuel_stop.image_km = fuel_stop_data.image_km
-        
-        updated_fuel_stop = self.repo.update_fuel_stop(db_fuel_stop)
-        
-        # Cambiar el estado del vehículo de vuelta a ON_ROUTE
-        vehicle_status = ""
-        if self.vehicle_repo and self.route_repo and updated_fuel_stop:
-            # Obtener la ruta para saber qué vehículo está involucrado
-            route = self.route_repo.get_route_by_id(updated_fuel_stop.id_route_fk)
-            if route:
-                vehicle = self.vehicle_repo.get_vehicle_by_id(route.id_vehicle_fk)
-                if vehicle:
-                    # Verificar que el vehículo esté en estado REFUELING
-                    if vehicle.route_status != vehicleRoute.REFUELING:
-                        raise HTTPException(status_code=400, detail="Vehicle is not in REFUELING state")
-                    
-                    # Actualizar el estado del vehículo a ON_ROUTE
-                    vehicle.route_status = vehicleRoute.ON_ROUTE
-                    # Actualizar el kilometraje del vehículo
-                    vehicle.km = fuel_stop_data.current_km
-                    self.vehicle_repo.update_vehicle(vehicle)
-                    vehicle_status = vehicleRoute.ON_ROUTE.value
+        old_contribution = refuel_contribution(db_fuel_stop, route)
+        finish_fuel_stop(db_fuel_stop, fuel_stop_data)
+        updated_fuel_stop = db_fuel_stop
+
+        # Cambiar el estado del vehículo de vuelta a ON_ROUTE y actualizar su kilometraje
+        vehicle.route_status = vehicleRoute.ON_ROUTE
+        vehicle.km = fuel_stop_data.current_km
+        await self.vehicle_repo.flush_transition()
+        # Litros cargados en las tablas de resumen (reemplazan los de un finish anterior)
+        if self.stats_repo:
+            await self.stats_repo.record_change(old_contribution, refuel_contribution(updated_fuel_stop, route))
+        # Parada, vehículo y resúmenes en un solo commit
+        await self.repo.commit()
         
         return FuelStopFinishResponse(
             id_fuel_stop=updated_fuel_stop.id_fuel_stop,
@@ -247,8 +261,8 @@ class FuelStopService:
             liters_added=updated_fuel_stop.liters_added,
             current_km=updated_fuel_stop.current_km,
             image_km=updated_fuel_stop.image_km,
-            route_name=updated_fuel_stop.route.description if updated_fuel_stop.route else None,
-            vehicle_status=vehicle_status
+            route_name=route.description,
+            vehicle_status=vehicle.route_status.value
         )
         
     
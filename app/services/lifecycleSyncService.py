@@ -0,0 +1,163 @@
+from fastapi import HTTPException
+from app.schemas.syncSchema import (
+    LifecycleBatch, LifecycleBatchResponse, LifecycleEventResult,
+    RouteStartEvent, RouteEndEvent, FuelStopStartEvent, FuelStopFinishEvent
+)
+from app.repositories.lifecycleSyncRepository import LifecycleSyncRepository
+from app.repositories.fleetStatsRepository import FleetStatsRepository, route_contribution, refuel_contribution
+from app.models.vehicleRoute import vehicleRoute
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
+from app.services.routeService import new_started_route, close_route
+from app.services.fuelStopService import new_fuel_stop, finish_fuel_stop
+from app.services.routeEnrichmentService import route_enrichment_worker
+from app.utils.retryUtil import retry_on_conflict
+
+
+class LifecycleSyncService:
+    def __init__(self, sync_repo: LifecycleSyncRepository, stats_repo: FleetStatsRepository = None) -> None:
+        self.repo = sync_repo
+        self.stats_repo = stats_repo
+
+    async def apply_events(self, batch: LifecycleBatch) -> LifecycleBatchResponse:
+        """
+        Aplica en orden un lote de eventos de ruta y recarga guardados sin conexión.
+
+        Las rutas, paradas y vehículos que referencian los eventos se cargan con una
+        consulta por tabla, las transiciones de `vehicleRoute` se validan en memoria con
+        las mismas reglas que /routes/start, /routes/finish y /fuel-stops/*-refueling, y
+        todo se guarda en una sola transacción: si un evento no es válido no se guarda
+        ninguno y la respuesta indica su posición.
+
+        Las estimaciones de OpenRouteService de las rutas finalizadas siempre se calculan
+        en segundo plano (Pending) para no hacer una llamada HTTP por ruta del lote.
+
+        Si otro request cambia uno de los vehículos antes del commit (Vehicle.version) el
+        lote completo se vuelve a validar contra el estado nuevo.
+        """
+        return await retry_on_conflict(lambda: self._apply_events(batch), self.repo.rollback)
+
+    async def _apply_events(self, batch: LifecycleBatch) -> LifecycleBatchResponse:
+        events = batch.events
+
+        fuel_stops = {
+            fuel_stop.id_fuel_stop: fuel_stop
+            for fuel_stop in await self.repo.get_fuel_stops(
+                e.id_fuel_stop for e in events if isinstance(e, FuelStopFinishEvent) and e.id_fuel_stop is not None
+            )
+        }
+        route_ids = {e.id_route for e in events if isinstance(e, RouteEndEvent) and e.id_route is not None}
+        route_ids |= {e.id_route_fk for e in events if isinstance(e, FuelStopStartEvent) and e.id_route_fk is not None}
+        route_ids |= {fuel_stop.id_route_fk for fuel_stop in fuel_stops.values()}
+        routes = {route.id_route: route for route in await self.repo.get_routes(route_ids)}
+        vehicle_ids = {e.id_vehicle_fk for e in events if isinstance(e, (RouteStartEvent, RouteEndEvent))}
+        vehicle_ids |= {route.id_vehicle_fk for route in routes.values()}
+        vehicles = {vehicle.id_vehicle: vehicle for vehicle in await self.repo.get_vehicles(vehicle_ids)}
+
+        # Rutas y paradas creadas en este lote, por el `ref` que les dio el dispositivo
+        new_routes = {}
+        new_fuel_stops = {}
+        new_objects = []
+        finished_routes = []
+        refuels = []
+        steps = []
+
+        def fail(index: int, status_code: int, detail: str):
+            return HTTPException(status_code=status_code, detail=f"Event {index}: {detail}")
+
+        def get_route(index: int, route_id, route_ref):
+            route = routes.get(route_id) if route_ref is None else new_routes.get(route_ref)
+            if route is None:
+                raise fail(index, 404, "Route not found")
+            return route
+
+        def get_vehicle(index: int, vehicle_id: int):
+            vehicle = vehicles.get(vehicle_id)
+            if vehicle is None:
+                raise fail(index, 404, "Vehicle not found")
+            return vehicle
+
+        for index, event in enumerate(events):
+            route = fuel_stop = None
+
+            if isinstance(event, RouteStartEvent):
+                vehicle = get_vehicle(index, event.id_vehicle_fk)
+                if vehicle.route_status in (vehicleRoute.ON_ROUTE, vehicleRoute.REFUELING):
+                    raise fail(index, 400, "Vehicle is already on route")
+                # Un ref repetido haría que los eventos siguientes apunten a otra ruta
+                if event.ref is not None and event.ref in new_routes:
+                    raise fail(index, 400, "Duplicate ref")
+                route = new_started_route(event)
+                new_objects.append(route)
+                if event.ref is not None:
+                    new_routes[event.ref] = route
+                vehicle.route_status = vehicleRoute.ON_ROUTE
+
+            elif isinstance(event, RouteEndEvent):
+                route = get_route(index, event.id_route, event.route_ref)
+                vehicle = get_vehicle(index, event.id_vehicle_fk)
+                if route.id_vehicle_fk != vehicle.id_vehicle:
+                    raise fail(index, 400, "Vehicle does not match route")
+                if vehicle.route_status != vehicleRoute.ON_ROUTE:
+                    raise fail(index, 400, "Vehicle not on route")
+                if route.is_completed:
+                    raise fail(index, 400, "Route already completed")
+                close_route(route, event, vehicle)
+                route.enrichment_status = RouteEnrichmentStatus.PENDING
+                finished_routes.append(route)
+                vehicle.route_status = vehicleRoute.OFF_ROUTE
+
+            elif isinstance(event, FuelStopStartEvent):
+                route = get_route(index, event.id_route_fk, event.route_ref)
+                vehicle = get_vehicle(index, route.id_vehicle_fk)
+                if vehicle.route_status != vehicleRoute.ON_ROUTE:
+                    raise fail(index, 400, "Vehicle is not in ON_ROUTE state")
+                if event.ref is not None and event.ref in new_fuel_stops:
+                    raise fail(index, 400, "Duplicate ref")
+                fuel_stop = new_fuel_stop(event)
+                if event.route_ref is not None:
+                    fuel_stop.route = route
+                new_objects.append(fuel_stop)
+                if event.ref is not None:
+                    new_fuel_stops[event.ref] = (fuel_stop, route)
+                vehicle.route_status = vehicleRoute.REFUELING
+
+            else:
+                if event.fuel_stop_ref is None:
+                    fuel_stop = fuel_stops.get(event.id_fuel_stop)
+                    route = routes.get(fuel_stop.id_route_fk) if fuel_stop is not None else None
+                else:
+                    fuel_stop, route = new_fuel_stops.get(event.fuel_stop_ref, (None, None))
+                if fuel_stop is None or route is None:
+                    raise fail(index, 404, "Fuel stop not found")
+                vehicle = get_vehicle(index, route.id_vehicle_fk)
+                if vehicle.route_status != vehicleRoute.REFUELING:
+                    raise fail(index, 400, "Vehicle is not in REFUELING state")
+                old_contribution = refuel_contribution(fuel_stop, route)
+                finish_fuel_stop(fuel_stop, event)
+                vehicle.km = event.current_km
+                refuels.append((old_contribution, route, fuel_stop))
+                vehicle.route_status = vehicleRoute.ON_ROUTE
+
+            steps.append((index, event, route, fuel_stop, vehicle.route_status))
+
+        await self.repo.add_all(new_objects)
+        if self.stats_repo:
+            await self.stats_repo.record_changes(
+                [(None, route_contribution(route)) for route in finished_routes]
+                + [(old, refuel_contribution(fuel_stop, route)) for old, route, fuel_stop in refuels]
+            )
+        await self.repo.commit()
+
+        for route in finished_routes:
+            route_enrichment_worker.enqueue(route.id_route)
+
+        return LifecycleBatchResponse(results=[
+            LifecycleEventResult(
+                index=index,
+                event=event.event,
+                ref=getattr(event, "ref", None),
+                id_route=route.id_route if route is not None else None,
+                id_fuel_stop=fuel_stop.id_fuel_stop if fuel_stop is not None else None,
+                vehicle_status=status.value
+            ) for index, event, route, fuel_stop, status in steps
+        ])
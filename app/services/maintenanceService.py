@@ -1,13 +1,18 @@
 from typing import List, Optional
-from app.schemas.maintenanceSchema import MaintenanceCreate, MaintenanceOut, MaintenanceUpdate
+from app.schemas.maintenanceSchema import MaintenanceCreate, MaintenanceOut, MaintenanceUpdate, MaintenanceFilter, MaintenanceStatus
+from app.utils.paginationUtil import split_page
+from app.utils.dtoUtil import OutMapper
 from app.repositories.maintenanceRepository import MaintenanceRepository
 from app.models.MaintenanceModel import Maintenance
 
+# El modelo usa su propio enum de estado; se pasa al del esquema
+maintenance_out = OutMapper(MaintenanceOut, converters={"status": MaintenanceStatus})
+
 class MaintenanceService:
   def __init__(self, maintenance_repo: MaintenanceRepository) -> None:
     self.repo = maintenance_repo
       
-  def create_maintenance(self, maintenance: MaintenanceCreate) -> MaintenanceOut:
+  async def create_maintenance(self, maintenance: MaintenanceCreate) -> MaintenanceOut:
     db_maintenance = Maintenance(
       id_vehicle_fk=maintenance.id_vehicle_fk,
       description=maintenance.description,
@@ -16,46 +21,23 @@ class MaintenanceService:
       end_time=maintenance.end_time,
       status=maintenance.status
     )
-    created_maintenance = self.repo.create_maintenance(db_maintenance)
-    return MaintenanceOut(
-      id_maintenance=created_maintenance.id_maintenance,
-      id_vehicle_fk=created_maintenance.id_vehicle_fk,
-      description=created_maintenance.description,
-      start_time=created_maintenance.start_time,
-      estimated_time=created_maintenance.estimated_time,
-      end_time=created_maintenance.end_time,
-      status=created_maintenance.status
-    )
+    created_maintenance = await self.repo.create_maintenance(db_maintenance)
+    return maintenance_out(created_maintenance)
   
-  def get_maintenance_by_id(self, maintenance_id: int) -> Optional[MaintenanceOut]:
-    db_maintenance = self.repo.get_maintenance_by_id(maintenance_id)
+  async def get_maintenance_by_id(self, maintenance_id: int) -> Optional[MaintenanceOut]:
+    db_maintenance = await self.repo.get_maintenance_by_id(maintenance_id)
     if db_maintenance:
-      return MaintenanceOut(
-        id_maintenance=db_maintenance.id_maintenance,
-        id_vehicle_fk=db_maintenance.id_vehicle_fk,
-        description=db_maintenance.description,
-        start_time=db_maintenance.start_time,
-        estimated_time=db_maintenance.estimated_time,
-        end_time=db_maintenance.end_time,
-        status=db_maintenance.status
-      )
+      return maintenance_out(db_maintenance)
   
-  def get_all_maintenances(self) -> List[MaintenanceOut]:
-    db_maintenances = self.repo.get_all_maintenances()
-    return [
-      MaintenanceOut(
-        id_maintenance=m.id_maintenance,
-        id_vehicle_fk=m.id_vehicle_fk,
-        description=m.description,
-        start_time=m.start_time,
-        estimated_time=m.estimated_time,
-        end_time=m.end_time,
-        status=m.status
-      ) for m in db_maintenances
-    ]
+  async def get_all_maintenances(self, filters: MaintenanceFilter) -> tuple[List[dict], Optional[int]]:
+    db_maintenances, next_cursor = split_page(
+      await self.repo.get_all_maintenances(**filters.model_dump()),
+      filters.limit, "id_maintenance"
+    )
+    return maintenance_out.rows(db_maintenances), next_cursor
   
-  def update_maintenance(self, maintenance_id: int, maintenance: MaintenanceUpdate) -> Optional[MaintenanceOut]:
-    db_maintenance = self.repo.get_maintenance_by_id(maintenance_id)
+  async def update_maintenance(self, maintenance_id: int, maintenance: MaintenanceUpdate) -> Optional[MaintenanceOut]:
+    db_maintenance = await self.repo.get_maintenance_by_id(maintenance_id)
     if db_maintenance:
       if maintenance.description is not None:
         db_maintenance.description = maintenance.description
@@ -68,47 +50,19 @@ class MaintenanceService:
       if maintenance.id_vehicle_fk is not None:
         db_maintenance.id_vehicle_fk = maintenance.id_vehicle_fk
           
-      updated_maintenance = self.repo.update_maintenance(db_maintenance)
-      return MaintenanceOut(
-        id_maintenance=updated_maintenance.id_maintenance,
-        id_vehicle_fk=updated_maintenance.id_vehicle_fk,
-        description=updated_maintenance.description,
-        start_time=updated_maintenance.start_time,
-        estimated_time=updated_maintenance.estimated_time,
-        end_time=updated_maintenance.end_time,
-        status=updated_maintenance.status
-      )
+      updated_maintenance = await self.repo.update_maintenance(db_maintenance)
+      return maintenance_out(updated_maintenance)
   
-  def delete_maintenance(self, maintenance_id: int) -> bool:
-    db_maintenance = self.repo.get_maintenance_by_id(maintenance_id)
+  async def delete_maintenance(self, maintenance_id: int) -> bool:
+    db_maintenance = await self.repo.get_maintenance_by_id(maintenance_id)
     if db_maintenance:
-      return self.repo.delete_maintenance(db_maintenance)
+      return await self.repo.delete_maintenance(db_maintenance)
     return False
   
-  def get_maintenances_by_status(self, status: str) -> List[MaintenanceOut]:
-    db_maintenances = self.repo.get_maintenances_by_status(status)
-    return [
-      MaintenanceOut(
-        id_maintenance=m.id_maintenance,
-        id_vehicle_fk=m.id_vehicle_fk,
-        description=m.description,
-        start_time=m.start_time,
-        estimated_time=m.estimated_time,
-        end_time=m.end_time,
-        status=m.status
-      ) for m in db_maintenances
-    ]
+  async def get_maintenances_by_status(self, status: str) -> List[dict]:
+    db_maintenances = await self.repo.get_maintenances_by_status(status)
+    return maintenance_out.rows(db_maintenances)
   
-  def get_all_maintenances_by_vehicle(self, vehicle_id: int) -> List[MaintenanceOut]:
-    db_maintenances = self.repo.get_all_maintenances_by_vehicle(vehicle_id)
-    return [
-      MaintenanceOut(
-        id_maintenance=m.id_maintenance,
-        id_vehicle_fk=m.id_vehicle_fk,
-        description=m.description,
-        start_time=m.start_time,
-        estimated_time=m.estimated_time,
-        end_time=m.end_time,
-        status=m.status
-      ) for m in db_maintenances
-    ]
\ No newline at end of file
+  async def get_all_maintenances_by_vehicle(self, vehicle_id: int) -> List[dict]:
+    db_maintenances = await self.repo.get_all_maintenances_by_vehicle(vehicle_id)
+    return maintenance_out.rows(db_maintenances)
\ No newline at end of file
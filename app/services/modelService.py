@@ -2,14 +2,16 @@ from typing import Optional
 from app.schemas.modelsSchema import ModelCreate, ModelOut
 from app.repositories.modelRepository import ModelRepository
 from app.models.modelsModel import Model
+from app.utils.catalogCacheUtil import catalog_cache
 
 class ModelService:
   def __init__(self, model_repo: ModelRepository) -> None:
     self.repo = model_repo
     
-  def create_model(self, model: ModelCreate) -> ModelOut:
+  async def create_model(self, model: ModelCreate) -> ModelOut:
     db_model = Model(name=model.name, id_brand_fk=model.id_brand_fk)
-    created_model = self.repo.create_model(db_model)
+    created_model = await self.repo.create_model(db_model)
+    await catalog_cache.invalidate("models")
     return ModelOut(
       id_model=created_model.id_model, 
       name=created_model.name, 
@@ -17,8 +19,8 @@ class ModelService:
       name_brand=created_model.brand.name if created_model.brand else None
     )
   
-  def get_model_by_id(self, model_id: int) -> Optional[ModelOut]:
-    db_model = self.repo.get_model_by_id(model_id)
+  async def get_model_by_id(self, model_id: int) -> Optional[ModelOut]:
+    db_model = await self.repo.get_model_by_id(model_id)
     if db_model is not None:
       return ModelOut(
         id_model=db_model.id_model, 
@@ -28,8 +30,8 @@ class ModelService:
       )
     return None
   
-  def get_all_models(self) -> list[ModelOut]:
-    db_models = self.repo.get_all_models()
+  async def get_all_models(self) -> list[ModelOut]:
+    db_models = await self.repo.get_all_models()
     return [
       ModelOut(
         id_model=model.id_model, 
@@ -39,12 +41,13 @@ class ModelService:
       ) for model in db_models
     ]
   
-  def update_model(self, id_model: int, model: ModelCreate) -> Optional[ModelOut]:
-    db_model = self.repo.get_model_by_id(id_model)
+  async def update_model(self, id_model: int, model: ModelCreate) -> Optional[ModelOut]:
+    db_model = await self.repo.get_model_by_id(id_model)
     if db_model is not None:
       db_model.name = model.name
       db_model.id_brand_fk = model.id_brand_fk
-      updated_model = self.repo.update_model(db_model)
+      updated_model = await self.repo.update_model(db_model)
+      await catalog_cache.invalidate("models")
       return ModelOut(
         id_model=updated_model.id_model, 
         name=updated_model.name, 
@@ -53,10 +56,12 @@ class ModelService:
       )
     return None
 
-  def delete_model(self, id_model: int) -> bool:
-    db_model = self.repo.get_model_by_id(id_model)
+  async def delete_model(self, id_model: int) -> bool:
+    db_model = await self.repo.get_model_by_id(id_model)
     if db_model is not None:
-      return self.repo.delete_model(db_model)
+      deleted = await self.repo.delete_model(db_model)
+      await catalog_cache.invalidate("models")
+      return deleted
     return False
 
 
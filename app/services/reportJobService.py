@@ -0,0 +1,390 @@
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from app.repositories.vehicleRepository import VehicleRepository
+from app.services.vehicleService import VehicleService
+from app.schemas.reportJobSchema import ReportJobOut, ReportJobStatus
+from app.database import AsyncSessionLocal
+from app.config import REPORT_JOB_WORKERS, REPORT_JOB_MAX_QUEUE, REPORT_JOB_HISTORY, REPORT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+FINISHED = (ReportJobStatus.DONE, ReportJobStatus.FAILED)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ReportJob:
+    def __init__(self, vehicle_id: int, watermark: str, path: str) -> None:
+        self.id_job = uuid.uuid4().hex
+        self.vehicle_id = vehicle_id
+        self.watermark = watermark
+        self.path = path
+        self.status = ReportJobStatus.QUEUED
+        self.cached = False
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        # Proceso que tiene el trabajo en su cola
+        self.owner = os.getpid()
+
+    @property
+    def abandoned(self) -> bool:
+        """El proceso dueño terminó (reinicio o caída de un worker) sin acabar el trabajo."""
+        return self.status not in FINISHED and self.owner != os.getpid() and not _process_alive(self.owner)
+
+    def to_dict(self) -> dict:
+        return {
+            "id_job": self.id_job,
+            "vehicle_id": self.vehicle_id,
+            "watermark": self.watermark,
+            "path": self.path,
+            "status": self.status.value,
+            "cached": self.cached,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "owner": self.owner,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReportJob":
+        job = cls.__new__(cls)
+        job.id_job = data["id_job"]
+        job.vehicle_id = data["vehicle_id"]
+        job.watermark = data["watermark"]
+        job.path = data["path"]
+        job.status = ReportJobStatus(data["status"])
+        job.cached = data["cached"]
+        job.created_at = datetime.fromisoformat(data["created_at"])
+        job.finished_at = datetime.fromisoformat(data["finished_at"]) if data["finished_at"] else None
+        job.error = data["error"]
+        job.owner = data["owner"]
+        return job
+
+    def to_out(self) -> ReportJobOut:
+        status, error = self.status, self.error
+        if self.abandoned:
+            status, error = ReportJobStatus.FAILED, "Report worker stopped before finishing, request the report again"
+        return ReportJobOut(
+            id_job=self.id_job,
+            vehicle_id=self.vehicle_id,
+            status=status,
+            watermark=self.watermark,
+            cached=self.cached,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            error=error,
+            download_url=f"/vehicles/{self.vehicle_id}/reports/{self.id_job}/download" if status == ReportJobStatus.DONE else None
+        )
+
+
+class ReportJobStore:
+    """
+    Estado de los trabajos en la carpeta de reportes, compartido por todos los procesos
+    de la API en el mismo host (uvicorn/gunicorn con varios workers).
+
+    - jobs/<id>.json: estado de cada trabajo, reemplazado de forma atómica.
+    - jobs/pending_<vehículo>_<sello>: id del trabajo en curso para ese reporte; se crea
+      con os.link, que falla si ya existe, así solo un proceso encola cada reporte.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        self.jobs_dir = os.path.join(cache_dir, "jobs")
+
+    def setup(self) -> None:
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _pending_path(self, vehicle_id: int, watermark: str) -> str:
+        return os.path.join(self.jobs_dir, f"pending_{vehicle_id}_{watermark}")
+
+    def _write(self, path: str, content: str) -> str:
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        return tmp_path
+
+    def save(self, job: ReportJob) -> None:
+        path = self._job_path(job.id_job)
+        os.replace(self._write(path, json.dumps(job.to_dict())), path)
+
+    def delete(self, job: ReportJob) -> None:
+        self._remove(self._job_path(job.id_job))
+
+    def load(self, job_id: str) -> Optional[ReportJob]:
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._job_path(job_id)) as f:
+                return ReportJob.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def claim(self, job: ReportJob) -> Optional[ReportJob]:
+        """
+        Registra `job` como el trabajo en curso de su reporte. Si otro trabajo vivo ya lo
+        tiene, lo devuelve (y `job` no se usa); si su proceso terminó, lo reemplaza.
+        """
+        pending_path = self._pending_path(job.vehicle_id, job.watermark)
+        for _ in range(2):
+            tmp_path = self._write(pending_path, job.id_job)
+            try:
+                os.link(tmp_path, pending_path)
+                return None
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+            try:
+                with open(pending_path) as f:
+                    current = self.load(f.read())
+            except FileNotFoundError:
+                continue
+            if current is not None and current.status not in FINISHED and not current.abandoned:
+                return current
+            self._remove(pending_path)
+        raise HTTPException(status_code=503, detail="Could not register the report job, try again later")
+
+    def release(self, job: ReportJob) -> None:
+        pending_path = self._pending_path(job.vehicle_id, job.watermark)
+        try:
+            with open(pending_path) as f:
+                owned = f.read() == job.id_job
+        except FileNotFoundError:
+            return
+        if owned:
+            self._remove(pending_path)
+
+    def prune(self, history: int) -> None:
+        # Solo se guardan los últimos `history` trabajos terminados
+        paths = sorted(glob.glob(os.path.join(self.jobs_dir, "*.json")), key=self._mtime, reverse=True)
+        for path in paths[history:]:
+            job = self.load(os.path.basename(path)[:-len(".json")])
+            if job is None or job.status in FINISHED or job.abandoned:
+                self._remove(path)
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ReportJobWorker:
+    """
+    Pool de tareas asyncio que genera los reportes Excel de vehículos fuera del request.
+
+    Cada reporte se guarda en `cache_dir` con el vehículo y el sello de sus datos en el
+    nombre (vehicle_<id>_<sello>.xlsx): mientras el sello no cambie, pedir el reporte otra
+    vez devuelve el archivo existente, y las peticiones simultáneas del mismo reporte
+    comparten un solo trabajo aunque lleguen a procesos distintos. Al guardar un reporte
+    nuevo se borran los anteriores del vehículo.
+
+    La cola es de cada proceso, pero el estado de los trabajos vive en la misma carpeta
+    (ReportJobStore), así que cualquier proceso del host puede responder la consulta o la
+    descarga. `cache_dir` debe ser local al host o un volumen compartido por todos los
+    procesos que atienden la API.
+    """
+
+    def __init__(self, workers: int, cache_dir: str, max_queue: int, history: int) -> None:
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.max_queue = max_queue
+        self.history = history
+        self.store = ReportJobStore(cache_dir)
+        self.queue: asyncio.Queue = None
+        self._tasks = []
+
+    async def start(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.store.setup()
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Los trabajos que quedaron en la cola se marcan como fallidos para que otro
+        # proceso pueda volver a encolar esos reportes
+        while self.queue is not None and not self.queue.empty():
+            await self._finish(self.queue.get_nowait(), ReportJobStatus.FAILED, "Server stopped before the report was generated")
+
+    def report_path(self, vehicle_id: int, watermark: str) -> str:
+        return os.path.join(self.cache_dir, f"vehicle_{vehicle_id}_{watermark}.xlsx")
+
+    async def submit(self, vehicle_id: int, watermark: str) -> ReportJob:
+        """
+        Crea el trabajo del reporte de un vehículo, o reutiliza el archivo o el trabajo
+        existente para el mismo sello de datos.
+
+        Raises:
+            HTTPException 503 si la cola está llena o el worker no está corriendo
+        """
+        job = ReportJob(vehicle_id, watermark, self.report_path(vehicle_id, watermark))
+        if await run_in_threadpool(self._reuse_file, job):
+            return job
+
+        if self.queue is None:
+            raise HTTPException(status_code=503, detail="Report worker is not running")
+        if self.queue.full():
+            raise HTTPException(status_code=503, detail="Too many pending reports, try again later")
+        current = await run_in_threadpool(self._register, job)
+        if current is not None:
+            return current
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            # Otro request llenó la cola mientras se registraba el trabajo
+            await self._finish(job, ReportJobStatus.FAILED, "Too many pending reports, try again later")
+            raise HTTPException(status_code=503, detail="Too many pending reports, try again later")
+        return job
+
+    def _reuse_file(self, job: ReportJob) -> bool:
+        """Marca `job` como terminado si ya existe el archivo de su sello."""
+        if not os.path.exists(job.path):
+            return False
+        # Mismo id para todas las peticiones que reutilizan este archivo
+        job.id_job = hashlib.sha1(f"cached_{job.vehicle_id}_{job.watermark}".encode()).hexdigest()[:32]
+        job.status = ReportJobStatus.DONE
+        job.cached = True
+        job.finished_at = job.created_at
+        self.store.save(job)
+        return True
+
+    def _register(self, job: ReportJob) -> Optional[ReportJob]:
+        """Guarda `job` y lo reclama; devuelve el trabajo en curso del mismo reporte si lo hay."""
+        self.store.save(job)
+        current = self.store.claim(job)
+        if current is not None:
+            self.store.delete(job)
+        return current
+
+    async def get(self, vehicle_id: int, job_id: str) -> Optional[ReportJob]:
+        job = await run_in_threadpool(self.store.load, job_id)
+        if job is None or job.vehicle_id != vehicle_id:
+            return None
+        return job
+
+    async def _run(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                job.status = ReportJobStatus.RUNNING
+                await run_in_threadpool(self.store.save, job)
+                async with AsyncSessionLocal() as db:
+                    report_file = await VehicleService(VehicleRepository(db)).generate_vehicle_excel_report_streaming(job.vehicle_id)
+                await run_in_threadpool(self._store_file, report_file, job)
+                await self._finish(job, ReportJobStatus.DONE)
+            except Exception as e:
+                logger.exception("Report for vehicle %s failed", job.vehicle_id)
+                await self._finish(job, ReportJobStatus.FAILED, e.detail if isinstance(e, HTTPException) else str(e))
+            finally:
+                self.queue.task_done()
+
+    async def _finish(self, job: ReportJob, status: ReportJobStatus, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = datetime.now()
+        # Guardar, liberar y podar el historial leen y escriben archivos: fuera del event loop
+        await run_in_threadpool(self._store_finished, job)
+
+    def _store_finished(self, job: ReportJob) -> None:
+        self.store.save(job)
+        self.store.release(job)
+        self.store.prune(self.history)
+
+    def _store_file(self, report_file, job: ReportJob) -> None:
+        # Se escribe a un archivo temporal del mismo directorio y se renombra, así nunca
+        # se sirve un reporte a medio escribir
+        tmp_path = f"{job.path}.{job.id_job}.tmp"
+        try:
+            with report_file, open(tmp_path, "wb") as output:
+                shutil.copyfileobj(report_file, output)
+            os.replace(tmp_path, job.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        for old_path in glob.glob(os.path.join(self.cache_dir, f"vehicle_{job.vehicle_id}_*.xlsx")):
+            if old_path != job.path:
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+
+
+report_job_worker = ReportJobWorker(REPORT_JOB_WORKERS, REPORT_CACHE_DIR, REPORT_JOB_MAX_QUEUE, REPORT_JOB_HISTORY)
+
+
+class ReportJobService:
+    def __init__(self, vehicle_repo: VehicleRepository, worker: ReportJobWorker = report_job_worker) -> None:
+        self.repo = vehicle_repo
+        self.worker = worker
+
+    async def request_report(self, vehicle_id: int) -> ReportJobOut:
+        """
+        Encola el reporte Excel de un vehículo, o devuelve el archivo o el trabajo ya
+        existente si los datos del vehículo no cambiaron.
+
+        Raises:
+            HTTPException 404 si el vehículo no existe, 503 si la cola está llena
+        """
+        watermark = await self.repo.get_report_watermark(vehicle_id)
+        if watermark is None:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        job = await self.worker.submit(vehicle_id, watermark)
+        return job.to_out()
+
+    async def get_report(self, vehicle_id: int, job_id: str) -> Optional[ReportJobOut]:
+        job = await self.worker.get(vehicle_id, job_id)
+        return job.to_out() if job is not None else None
+
+    async def get_report_file(self, vehicle_id: int, job_id: str) -> str:
+        """
+        Ruta del archivo de un trabajo terminado.
+
+        Raises:
+            HTTPException 404 si el trabajo no existe o su archivo ya fue reemplazado,
+            409 si el reporte todavía no está listo
+        """
+        job = await self.get_report(vehicle_id, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Report job not found")
+        if job.status != ReportJobStatus.DONE:
+            raise HTTPException(status_code=409, detail=f"Report is {job.status.value}")
+        path = self.worker.report_path(vehicle_id, job.watermark)
+        if not await run_in_threadpool(os.path.exists, path):
+            raise HTTPException(status_code=404, detail="Report file is no longer available, request a new report")
+        return path
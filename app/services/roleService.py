@@ -2,33 +2,38 @@ from typing import Optional
 from app.schemas.rolesSchema import RoleCreate, RoleOut
 from app.repositories.roleRepository import RoleRepository
 from app.models.rolesModel import Role
+from app.utils.catalogCacheUtil import catalog_cache
 
 class RoleService:
   def __init__(self, role_repo: RoleRepository) -> None:
     self.repo = role_repo
     
-  def create_role(self, role: RoleCreate) -> RoleOut:
+  async def create_role(self, role: RoleCreate) -> RoleOut:
     db_role = Role(name=role.name)
-    created_role = self.repo.create_role(db_role)
+    created_role = await self.repo.create_role(db_role)
+    await catalog_cache.invalidate("roles")
     return RoleOut(id_role=created_role.id_role, name=created_role.name)
   
-  def get_role_by_id(self, role_id: int) -> Optional[RoleOut]:
-    db_role = self.repo.get_role_by_id(role_id)
+  async def get_role_by_id(self, role_id: int) -> Optional[RoleOut]:
+    db_role = await self.repo.get_role_by_id(role_id)
     if db_role is not None:
       return RoleOut(id_role=db_role.id_role, name=db_role.name)
   
-  def get_all_roles(self) -> list[RoleOut]:
-    db_roles = self.repo.get_all_roles()
+  async def get_all_roles(self) -> list[RoleOut]:
+    db_roles = await self.repo.get_all_roles()
     return [RoleOut(id_role=role.id_role, name=role.name) for role in db_roles]
   
-  def update_role(self, id_role: int, role: RoleCreate) -> Optional[RoleOut]:
-    db_role = self.repo.get_role_by_id(id_role)
+  async def update_role(self, id_role: int, role: RoleCreate) -> Optional[RoleOut]:
+    db_role = await self.repo.get_role_by_id(id_role)
     if db_role is not None:
       db_role.name = role.name
-      updated_role = self.repo.update_role(db_role)
+      updated_role = await self.repo.update_role(db_role)
+      await catalog_cache.invalidate("roles")
       return RoleOut(id_role=updated_role.id_role, name=updated_role.name)
     
-  def delete_role(self, id_role: int) -> bool:
-    db_role = self.repo.get_role_by_id(id_role)
+  async def delete_role(self, id_role: int) -> bool:
+    db_role = await self.repo.get_role_by_id(id_role)
     if db_role is not None:
-      return self.repo.delete_role(db_role)
\ No newline at end of file
+      deleted = await self.repo.delete_role(db_role)
+      await catalog_cache.invalidate("roles")
+      return deleted
\ No newline at end of file
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from app.repositories.routeRepository import RouteRepository
+from app.repositories.fleetStatsRepository import FleetStatsRepository
+from app.models.routesModel import Route
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
+from app.utils.distanceUtil import calculate_distance
+from app.database import AsyncSessionLocal
+from app.config import ROUTE_ENRICHMENT_WORKERS, ROUTE_ENRICHMENT_LEASE, ROUTE_ENRICHMENT_RESCAN_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def apply_route_estimates(route: Route, distance_approx: float, estimated_time: float) -> None:
+    """Guarda las estimaciones de OpenRouteService en la ruta y recalcula on_time/on_distance."""
+    route.estimated_time = estimated_time
+    route.estimated_km = round(distance_approx)  # columna entera (MySQL también redondea)
+    route.on_time = route.total_duration <= estimated_time * 1.2  # 20% tolerance
+    route.on_distance = (route.end_km - route.start_km) <= (distance_approx + 5)
+
+
+class RouteEnrichmentService:
+    def __init__(self, route_repo: RouteRepository, stats_repo: FleetStatsRepository = None) -> None:
+        self.repo = route_repo
+        self.stats_repo = stats_repo
+
+    async def enrich_route(self, route_id: int) -> Optional[Route]:
+        """
+        Calcula las estimaciones de una ruta finalizada en modo diferido
+
+        Args:
+            route_id: ID de la ruta a enriquecer
+
+        Returns:
+            La ruta actualizada, o None si no existe o ya fue procesada
+        """
+        # Compare-and-set Pending -> Running: con varios procesos solo uno la procesa
+        if not await self.repo.claim_route_for_enrichment(route_id, ROUTE_ENRICHMENT_LEASE):
+            return None
+        route = await self.repo.get_route_by_id(route_id)
+        if not route:
+            return None
+
+        try:
+            distance_approx, estimated_time = await run_in_threadpool(
+                calculate_distance,
+                route.latitude_start,
+                route.longitude_start,
+                route.latitude_end,
+                route.longitude_end
+            )
+            apply_route_estimates(route, distance_approx, estimated_time)
+            route.enrichment_status = RouteEnrichmentStatus.DONE
+            if self.stats_repo:
+                await self.stats_repo.record_route_evaluated(route)
+            return await self.repo.update_route(route)
+        except Exception:
+            logger.exception("Route %s enrichment failed", route_id)
+
+        # Si falló un INSERT de los resúmenes o el commit la transacción quedó inválida:
+        # se descarta (junto con las estimaciones a medias) y Failed va en una nueva
+        await self.repo.rollback()
+        route = await self.repo.get_route_by_id(route_id)
+        if not route:
+            return None
+        route.enrichment_status = RouteEnrichmentStatus.FAILED
+        return await self.repo.update_route(route)
+
+
+class RouteEnrichmentWorker:
+    """
+    Pool de tareas asyncio que procesa las rutas pendientes de enriquecimiento.
+
+    La cola vive en memoria, pero el estado Pending queda guardado en la tabla
+    Route: al arrancar y luego cada `rescan_interval` segundos se vuelven a encolar las
+    rutas que quedaron sin procesar (y las que quedaron en Running más allá del lease,
+    p. ej. porque murió el proceso que las tomó). Cada proceso encola todas, pero
+    enrich_route las reclama con un UPDATE condicionado, así que cada una se procesa
+    una sola vez.
+    """
+
+    def __init__(self, workers: int, rescan_interval: float) -> None:
+        self.workers = workers
+        self.rescan_interval = rescan_interval
+        self.queue: asyncio.Queue = None
+        self._queued = set()
+        self._tasks = []
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self._queued = set()
+        await self.rescan()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._rescan_periodically()))
+
+    async def rescan(self) -> None:
+        """Encola las rutas en Pending o en Running con el lease vencido."""
+        async with AsyncSessionLocal() as db:
+            for route_id in await RouteRepository(db).get_route_ids_to_enrich(ROUTE_ENRICHMENT_LEASE):
+                self.enqueue(route_id)
+
+    async def _rescan_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.rescan_interval)
+            try:
+                await self.rescan()
+            except Exception:
+                logger.exception("Route enrichment rescan failed")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, route_id: int) -> None:
+        # Una ruta que ya espera en la cola no se agrega otra vez en cada rescan
+        if self.queue is not None and route_id not in self._queued:
+            self._queued.add(route_id)
+            self.queue.put_nowait(route_id)
+
+    async def _run(self) -> None:
+        while True:
+            route_id = await self.queue.get()
+            self._queued.discard(route_id)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await RouteEnrichmentService(RouteRepository(db), FleetStatsRepository(db)).enrich_route(route_id)
+            except Exception:
+                logger.exception("Route %s enrichment failed", route_id)
+            finally:
+                self.queue.task_done()
+
+
+route_enrichment_worker = RouteEnrichmentWorker(ROUTE_ENRICHMENT_WORKERS, ROUTE_ENRICHMENT_RESCAN_INTERVAL)
@@ -1,18 +1,99 @@
 from typing import Optional, Union
-from app.schemas.routesSchema import RouteCreate, RouteOut, RouteStartSchema, RouteStartResponse, RouteEndSchema, RouteEndResponse
+from app.schemas.routesSchema import RouteCreate, RouteOut, RouteStartSchema, RouteStartResponse, RouteEndSchema, RouteEndResponse, RouteEnrichmentOut, RouteFilter, RouteRadiusQuery, RouteBoundingBoxQuery
+from app.schemas.geoSchema import MAX_GEO_RESULTS
+from app.utils.geoUtil import haversine_km, bounding_box
+from app.utils.paginationUtil import split_page
+from app.utils.retryUtil import retry_on_conflict
+from app.utils.dtoUtil import OutMapper
 from app.repositories.routeRepository import RouteRepository
 from app.repositories.vehicleRepository import VehicleRepository
+from app.repositories.fleetStatsRepository import FleetStatsRepository, route_contribution
 from app.models.routesModel import Route
+from app.models.vehiclesModel import Vehicle
 from app.models.vehicleRoute import vehicleRoute
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app.utils.distanceUtil import calculate_distance
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
+from app.services.routeEnrichmentService import apply_route_estimates, route_enrichment_worker
+from app.config import DEFERRED_ROUTE_ENRICHMENT, LIST_STREAM_CHUNK_SIZE
+from app.database import AsyncSessionLocal
 from datetime import datetime, timezone
 
+
+route_out = OutMapper(RouteOut, computed={
+    "name_vehicle": lambda route: route.vehicle.number_plate if route.vehicle else None,
+    "name_user": lambda route: route.user.first_name if route.user else None
+})
+
+
+async def stream_routes(filters: RouteFilter, chunk_size: int = LIST_STREAM_CHUNK_SIZE):
+    """
+    Bloques de filas de RouteOut para GET /routes/?stream=...
+
+    Abre su propia sesión: FastAPI cierra la de get_db antes de empezar a enviar una
+    StreamingResponse, y el cursor tiene que seguir abierto mientras se envían las filas.
+    """
+    async with AsyncSessionLocal() as db:
+        async for rows in RouteRepository(db).stream_routes(**filters.model_dump(exclude={"stream"}), chunk_size=chunk_size):
+            yield route_out.from_rows(rows)
+
+
+def to_coordinate(value: Union[str, float]) -> float:
+    """Convierte coordenadas recibidas como texto a grados decimales."""
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid coordinate: {value}")
+    return value
+
+
+def new_started_route(route_start: RouteStartSchema) -> Route:
+    """Ruta recién iniciada: los datos de cierre quedan en sus valores por defecto hasta end_route."""
+    return Route(
+        id_vehicle_fk=route_start.id_vehicle_fk,
+        id_user_fk=route_start.id_user_fk,
+        description=route_start.description,
+        latitude_start=to_coordinate(route_start.latitude_start),
+        longitude_start=to_coordinate(route_start.longitude_start),
+        latitude_end=0.0,  # Default value
+        longitude_end=0.0,  # Default value
+        start_time=route_start.start_time,
+        end_time=route_start.start_time + timedelta(hours=8),  # Default end time (8 hours later)
+        estimated_time=0.0,  # Default value
+        total_duration=0.0,  # Default value
+        on_time=False,  # Default value
+        start_km=route_start.start_km,
+        end_km=0,  # Default value
+        estimated_km=0,  # Default value
+        image_start_km=route_start.image_start_km,
+        image_end_km="",  # Default value
+        on_distance=False,  # Default value
+        liters_consumed=0.0  # Default value
+    )
+
+
+def close_route(route_db: Route, route_end: RouteEndSchema, vehicle: Vehicle) -> None:
+    """Datos de cierre de la ruta (sin las estimaciones de OpenRouteService)."""
+    start_time = route_db.start_time.replace(tzinfo=timezone.utc)
+    end_time = route_end.end_time.astimezone(timezone.utc)
+    route_db.description = route_end.description
+    route_db.latitude_end = to_coordinate(route_end.latitude_end)
+    route_db.longitude_end = to_coordinate(route_end.longitude_end)
+    route_db.end_time = end_time
+    route_db.total_duration = (end_time - start_time).total_seconds() / 3600  # in hours
+    route_db.end_km = route_end.end_km
+    route_db.image_end_km = route_end.image_end_km
+    route_db.liters_consumed = vehicle.km_per_litre * (route_end.end_km - route_db.start_km)
+
+
 class RouteService:
-    def __init__(self, route_repo: RouteRepository, vehicle_repo: VehicleRepository = None) -> None:
+    def __init__(self, route_repo: RouteRepository, vehicle_repo: VehicleRepository = None, stats_repo: FleetStatsRepository = None) -> None:
         self.repo = route_repo
         self.vehicle_repo = vehicle_repo
+        self.stats_repo = stats_repo
 
     def _to_bool(self, value: Union[bool, int]) -> bool:
         """Convierte valores enteros a booleanos (0 = False, cualquier otro número = True)."""
@@ -20,21 +101,18 @@ class RouteService:
             return value
         return bool(value)
     
-    def _to_str(self, value: Union[str, float]) -> str:
-        """Convierte valores numéricos a cadenas."""
-        if isinstance(value, str):
-            return value
-        return str(value)
+    def _to_float(self, value: Union[str, float]) -> float:
+        return to_coordinate(value)
 
-    def create_route(self, route: RouteCreate) -> RouteOut:
+    async def create_route(self, route: RouteCreate) -> RouteOut:
         db_route = Route(
             id_vehicle_fk=route.id_vehicle_fk,
             id_user_fk=route.id_user_fk,
             description=route.description,
-            latitude_start=self._to_str(route.latitude_start),
-            longitude_start=self._to_str(route.longitude_start),
-            latitude_end=self._to_str(route.latitude_end),
-            longitude_end=self._to_str(route.longitude_end),
+            latitude_start=self._to_float(route.latitude_start),
+            longitude_start=self._to_float(route.longitude_start),
+            latitude_end=self._to_float(route.latitude_end),
+            longitude_end=self._to_float(route.longitude_end),
             start_time=route.start_time,
             end_time=route.end_time,
             estimated_time=route.estimated_time,
@@ -46,102 +124,67 @@ class RouteService:
             image_start_km=route.image_start_km,
             image_end_km=route.image_end_km,
             on_distance=self._to_bool(route.on_distance),
-            liters_consumed=route.liters_consumed
-        )
-        created_route = self.repo.create_route(db_route)
-        return RouteOut(
-            id_route=created_route.id_route,
-            id_vehicle_fk=created_route.id_vehicle_fk,
-            id_user_fk=created_route.id_user_fk,
-            description=created_route.description,
-            latitude_start=created_route.latitude_start,
-            longitude_start=created_route.longitude_start,
-            latitude_end=created_route.latitude_end,
-            longitude_end=created_route.longitude_end,
-            start_time=created_route.start_time,
-            end_time=created_route.end_time,
-            estimated_time=created_route.estimated_time,
-            total_duration=created_route.total_duration,
-            on_time=created_route.on_time,
-            start_km=created_route.start_km,
-            end_km=created_route.end_km,
-            estimated_km=created_route.estimated_km,
-            image_start_km=created_route.image_start_km,
-            image_end_km=created_route.image_end_km,
-            on_distance=created_route.on_distance,
-            liters_consumed=created_route.liters_consumed,
-            name_vehicle=created_route.vehicle.number_plate if created_route.vehicle else None,
-            name_user=created_route.user.first_name if created_route.user else None
+            liters_consumed=route.liters_consumed,
+            # Una ruta cargada ya finalizada trae sus propias estimaciones
+            enrichment_status=RouteEnrichmentStatus.DONE if route.image_end_km else None
         )
+        if self.stats_repo:
+            await self.stats_repo.record_change(None, route_contribution(db_route))
+        created_route = await self.repo.create_route(db_route)
+        return route_out(created_route)
 
-    def get_route_by_id(self, route_id: int) -> Optional[RouteOut]:
-        db_route = self.repo.get_route_by_id(route_id)
+    async def get_route_by_id(self, route_id: int) -> Optional[RouteOut]:
+        db_route = await self.repo.get_route_row(route_id)
         if db_route is not None:
-            return RouteOut(
-                id_route=db_route.id_route,
-                id_vehicle_fk=db_route.id_vehicle_fk,
-                id_user_fk=db_route.id_user_fk,
-                description=db_route.description,
-                latitude_start=db_route.latitude_start,
-                longitude_start=db_route.longitude_start,
-                latitude_end=db_route.latitude_end,
-                longitude_end=db_route.longitude_end,
-                start_time=db_route.start_time,
-                end_time=db_route.end_time,
-                estimated_time=db_route.estimated_time,
-                total_duration=db_route.total_duration,
-                on_time=db_route.on_time,
-                start_km=db_route.start_km,
-                end_km=db_route.end_km,
-                estimated_km=db_route.estimated_km,
-                image_start_km=db_route.image_start_km,
-                image_end_km=db_route.image_end_km,
-                on_distance=db_route.on_distance,
-                liters_consumed=db_route.liters_consumed,
-                name_vehicle=db_route.vehicle.number_plate if db_route.vehicle else None,
-                name_user=db_route.user.first_name if db_route.user else None
-            )
+            return route_out.construct(route_out.from_row(db_route))
         return None
     
-    def get_all_routes(self) -> list[RouteOut]:
-        db_routes = self.repo.get_all_routes()
+    async def get_all_routes(self, filters: RouteFilter) -> tuple[list[dict], Optional[int]]:
+        db_routes, next_cursor = split_page(
+            await self.repo.get_all_routes(**filters.model_dump(exclude={"stream"})),
+            filters.limit, "id_route"
+        )
+        return route_out.from_rows(db_routes), next_cursor
+    
+    async def get_routes_within(self, query: RouteBoundingBoxQuery) -> list[dict]:
+        db_routes = await self.repo.get_routes_in_box(
+            query.min_latitude, query.max_latitude, query.min_longitude, query.max_longitude,
+            point=query.point, limit=query.limit or MAX_GEO_RESULTS
+        )
+        return route_out.from_rows(db_routes)
+    
+    async def get_routes_nearby(self, query: RouteRadiusQuery) -> list[dict]:
+        """
+        Rutas cuyo punto de inicio/fin está a menos de radius_km, ordenadas por distancia
+        
+        La base filtra por la caja que contiene el círculo (índice de coordenadas) y aquí
+        se descartan las esquinas con la distancia haversine exacta.
+        """
+        min_lat, max_lat, min_lon, max_lon = bounding_box(query.latitude, query.longitude, query.radius_km)
+        db_routes = await self.repo.get_routes_in_box(min_lat, max_lat, min_lon, max_lon, point=query.point)
+        nearby = []
+        for route in db_routes:
+            latitude, longitude = (route.latitude_start, route.longitude_start) if query.point == "start" else (route.latitude_end, route.longitude_end)
+            distance = haversine_km(query.latitude, query.longitude, latitude, longitude)
+            if distance <= query.radius_km:
+                nearby.append((distance, route))
+        nearby.sort(key=lambda item: item[0])
         return [
-            RouteOut(
-                id_route=route.id_route,
-                id_vehicle_fk=route.id_vehicle_fk,
-                id_user_fk=route.id_user_fk,
-                description=route.description,
-                latitude_start=route.latitude_start,
-                longitude_start=route.longitude_start,
-                latitude_end=route.latitude_end,
-                longitude_end=route.longitude_end,
-                start_time=route.start_time,
-                end_time=route.end_time,
-                estimated_time=route.estimated_time,
-                total_duration=route.total_duration,
-                on_time=route.on_time,
-                start_km=route.start_km,
-                end_km=route.end_km,
-                estimated_km=route.estimated_km,
-                image_start_km=route.image_start_km,
-                image_end_km=route.image_end_km,
-                on_distance=route.on_distance,
-                liters_consumed=route.liters_consumed,
-                name_vehicle=route.vehicle.number_plate if route.vehicle else None,
-                name_user=route.user.first_name if route.user else None
-            ) for route in db_routes
+            {**route_out.from_row(route), "distance_km": round(distance, 3)}
+            for distance, route in nearby[:query.limit or MAX_GEO_RESULTS]
         ]
     
-    def update_route(self, route_id: int, route: RouteCreate) -> Optional[RouteOut]:
-        db_route = self.repo.get_route_by_id(route_id)
+    async def update_route(self, route_id: int, route: RouteCreate) -> Optional[RouteOut]:
+        db_route = await self.repo.get_route_by_id(route_id)
         if db_route is not None:
+            old_contribution = route_contribution(db_route)
             db_route.id_vehicle_fk = route.id_vehicle_fk
             db_route.id_user_fk = route.id_user_fk
             db_route.description = route.description
-            db_route.latitude_start = self._to_str(route.latitude_start)
-            db_route.longitude_start = self._to_str(route.longitude_start)
-            db_route.latitude_end = self._to_str(route.latitude_end)
-            db_route.longitude_end = self._to_str(route.longitude_end)
+            db_route.latitude_start = self._to_float(route.latitude_start)
+            db_route.longitude_start = self._to_float(route.longitude_start)
+            db_route.latitude_end = self._to_float(route.latitude_end)
+            db_route.longitude_end = self._to_float(route.longitude_end)
             db_route.start_time = route.start_time
             db_route.end_time = route.end_time
             db_route.estimated_time = route.estimated_time
@@ -154,40 +197,22 @@ class RouteService:
             db_route.image_end_km = route.image_end_km
             db_route.on_distance = self._to_bool(route.on_distance)
             db_route.liters_consumed = route.liters_consumed
-            updated_route = self.repo.update_route(db_route)
-            return RouteOut(
-                id_route=updated_route.id_route,
-                id_vehicle_fk=updated_route.id_vehicle_fk,
-                id_user_fk=updated_route.id_user_fk,
-                description=updated_route.description,
-                latitude_start=updated_route.latitude_start,
-                longitude_start=updated_route.longitude_start,
-                latitude_end=updated_route.latitude_end,
-                longitude_end=updated_route.longitude_end,
-                start_time=updated_route.start_time,
-                end_time=updated_route.end_time,
-                estimated_time=updated_route.estimated_time,
-                total_duration=updated_route.total_duration,
-                on_time=updated_route.on_time,
-                start_km=updated_route.start_km,
-                end_km=updated_route.end_km,
-                estimated_km=updated_route.estimated_km,
-                image_start_km=updated_route.image_start_km,
-                image_end_km=updated_route.image_end_km,
-                on_distance=updated_route.on_distance,
-                liters_consumed=updated_route.liters_consumed,  
-                name_vehicle=updated_route.vehicle.number_plate if updated_route.vehicle else None,
-                name_user=updated_route.user.first_name if updated_route.user else None
-            )
+            # Los resúmenes cambian en el mismo commit que la ruta
+            if self.stats_repo:
+                await self.stats_repo.record_change(old_contribution, route_contribution(db_route))
+            updated_route = await self.repo.update_route(db_route)
+            return route_out(updated_route)
         return None
     
-    def delete_route(self, route_id: int) -> bool:
-        db_route = self.repo.get_route_by_id(route_id)
+    async def delete_route(self, route_id: int) -> bool:
+        db_route = await self.repo.get_route_by_id(route_id)
         if db_route is not None:
-            return self.repo.delete_route(db_route)
+            if self.stats_repo:
+                await self.stats_repo.record_change(route_contribution(db_route), None)
+            return await self.repo.delete_route(db_route)
         return False
     
-    def start_route(self, route_start: RouteStartSchema) -> RouteStartResponse:
+    async def start_route(self, route_start: RouteStartSchema) -> RouteStartResponse:
         """
         Start a new route with minimal information and set vehicle status to ON_ROUTE
         
@@ -197,44 +222,22 @@ class RouteService:
         Returns:
             A RouteStartResponse with the created route information
         """
-        # Create a new route with default values for required fields
-        estimated_time = 0.0  # Default value
-        end_time = route_start.start_time + timedelta(hours=8)  # Default end time (8 hours later)
-        
-        vehicle = self.vehicle_repo.get_vehicle_by_id(route_start.id_vehicle_fk)
-        if vehicle.route_status == vehicleRoute.ON_ROUTE:
+        return await retry_on_conflict(lambda: self._start_route(route_start), self.repo.rollback)
+
+    async def _start_route(self, route_start: RouteStartSchema) -> RouteStartResponse:
+        # Una sola transacción; el UPDATE del vehículo compara su versión (optimista)
+        vehicle = await self.vehicle_repo.get_vehicle_for_transition(route_start.id_vehicle_fk)
+        if not vehicle:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        if vehicle.route_status in (vehicleRoute.ON_ROUTE, vehicleRoute.REFUELING):
             raise HTTPException(status_code=400, detail="Vehicle is already on route")
         
-        db_route = Route(
-            id_vehicle_fk=route_start.id_vehicle_fk,
-            id_user_fk=route_start.id_user_fk,
-            description=route_start.description,
-            latitude_start=self._to_str(route_start.latitude_start),
-            longitude_start=self._to_str(route_start.longitude_start),
-            latitude_end="0",  # Default value
-            longitude_end="0",  # Default value
-            start_time=route_start.start_time,
-            end_time=end_time,
-            estimated_time=estimated_time,
-            total_duration=0.0,  # Default value
-            on_time=False,  # Default value
-            start_km=route_start.start_km,
-            end_km=0,  # Default value
-            estimated_km=0,  # Default value 
-            image_start_km=route_start.image_start_km,
-            image_end_km="",  # Default value
-            on_distance=False,  # Default value
-            liters_consumed=0.0  # Default value
-        )
-        
-        created_route = self.repo.create_route(db_route)
-        
-        # Update vehicle status to ON_ROUTE if vehicle_repo is provided
-        if self.vehicle_repo and created_route:
-            vehicle = self.vehicle_repo.get_vehicle_by_id(route_start.id_vehicle_fk)
-            if vehicle:
-                vehicle.route_status = vehicleRoute.ON_ROUTE
-                self.vehicle_repo.update_vehicle(vehicle)
+        # Primero el UPDATE del vehículo (compara la versión) y después el INSERT de la ruta
+        vehicle.route_status = vehicleRoute.ON_ROUTE
+        await self.vehicle_repo.flush_transition()
+        # Create a new route with default values for required fields
+        created_route = await self.repo.add_route(new_started_route(route_start))
+        await self.repo.commit()
         
         return RouteStartResponse(
             id_route=created_route.id_route,
@@ -246,11 +249,11 @@ class RouteService:
             start_time=created_route.start_time,
             start_km=created_route.start_km,
             image_start_km=created_route.image_start_km,
-            name_vehicle=created_route.vehicle.number_plate if created_route.vehicle else None,
+            name_vehicle=vehicle.number_plate,
             name_user=created_route.user.first_name if created_route.user else None
         )
     
-    def end_route(self, route_end: RouteEndSchema) -> RouteEndResponse:
+    async def end_route(self, route_end: RouteEndSchema) -> RouteEndResponse:
         # """
         # Start a new route with minimal information and set vehicle status to ON_ROUTE
         
@@ -330,50 +333,57 @@ class RouteService:
         Returns:
             A RouteEndResponse with the completed route information
         """
-        route_db = self.repo.get_route_by_id(route_end.id_route)
+        return await retry_on_conflict(lambda: self._end_route(route_end), self.repo.rollback)
+
+    async def _end_route(self, route_end: RouteEndSchema) -> RouteEndResponse:
+        route_db = await self.repo.get_route_by_id(route_end.id_route)
         if not route_db:
             raise HTTPException(status_code=404, detail="Route not found")
+        if route_db.is_completed:
+            raise HTTPException(status_code=400, detail="Route already completed")
 
-        # Calculate route metrics
-        distance_approx, estimated_time = calculate_distance(
-            float(route_db.latitude_start), 
-            float(route_db.longitude_start), 
-            float(route_end.latitude_end), 
-            float(route_end.longitude_end)
-        )
-        
-        # Calculate duration
-        start_time = route_db.start_time.replace(tzinfo=timezone.utc)
-        end_time = route_end.end_time.astimezone(timezone.utc)
-        total_duration = (end_time - start_time).total_seconds() / 3600  # in hours
+        if not DEFERRED_ROUTE_ENRICHMENT:
+            # Calculate route metrics antes de leer el vehículo: la llamada HTTP es bloqueante
+            # (la sacamos del event loop) y así la ventana entre la lectura y el UPDATE es corta
+            distance_approx, estimated_time = await run_in_threadpool(
+                calculate_distance,
+                route_db.latitude_start, 
+                route_db.longitude_start, 
+                to_coordinate(route_end.latitude_end), 
+                to_coordinate(route_end.longitude_end)
+            )
         
-        # Get vehicle info
-        vehicle = self.vehicle_repo.get_vehicle_by_id(route_end.id_vehicle_fk)
+        # Get vehicle info (con su versión actual)
+        vehicle = await self.vehicle_repo.get_vehicle_for_transition(route_end.id_vehicle_fk)
         if not vehicle:
             raise HTTPException(status_code=404, detail="Vehicle not found")
         if vehicle.route_status != vehicleRoute.ON_ROUTE:
             raise HTTPException(status_code=400, detail="Vehicle not on route")
 
-        # Update the existing route object
-        route_db.description = route_end.description
-        route_db.latitude_end = self._to_str(route_end.latitude_end)
-        route_db.longitude_end = self._to_str(route_end.longitude_end)
-        route_db.end_time = end_time
-        route_db.estimated_time = estimated_time
-        route_db.total_duration = total_duration
-        route_db.on_time = total_duration <= estimated_time * 1.2  # 20% tolerance
-        route_db.end_km = route_end.end_km
-        route_db.estimated_km = distance_approx
-        route_db.image_end_km = route_end.image_end_km
-        route_db.on_distance = (route_end.end_km - route_db.start_km) <= (distance_approx + 5)
-        route_db.liters_consumed = vehicle.km_per_litre * (route_end.end_km - route_db.start_km)
-
-        # Update vehicle status
+        # Update vehicle status; se envía antes que los resúmenes (FK al vehículo)
         vehicle.route_status = vehicleRoute.OFF_ROUTE
-        self.vehicle_repo.update_vehicle(vehicle)
+        await self.vehicle_repo.flush_transition()
 
-        # Save changes
-        updated_route = self.repo.update_route(route_db)
+        # Update the existing route object (duration, end point, liters)
+        close_route(route_db, route_end, vehicle)
+
+        if DEFERRED_ROUTE_ENRICHMENT:
+            # estimated_km/estimated_time/on_time/on_distance los calcula el worker en segundo plano
+            route_db.enrichment_status = RouteEnrichmentStatus.PENDING
+        else:
+            apply_route_estimates(route_db, distance_approx, estimated_time)
+            route_db.enrichment_status = RouteEnrichmentStatus.DONE
+
+        # Tablas de resumen: se guardan en el mismo commit que el vehículo
+        if self.stats_repo:
+            await self.stats_repo.record_change(None, route_contribution(route_db))
+
+        # Ruta, vehículo y resúmenes en un solo commit
+        await self.repo.commit()
+        updated_route = route_db
+        
+        if DEFERRED_ROUTE_ENRICHMENT:
+            route_enrichment_worker.enqueue(updated_route.id_route)
         
         return RouteEndResponse(
             id_route=updated_route.id_route,
@@ -392,5 +402,19 @@ class RouteService:
             end_time=updated_route.end_time,
             end_km=updated_route.end_km,
             image_end_km=updated_route.image_end_km,
-            route_status=vehicleRoute.OFF_ROUTE.value
-        )
\ No newline at end of file
+            route_status=vehicleRoute.OFF_ROUTE.value,
+            enrichment_status=updated_route.enrichment_status.value
+        )
+
+    async def get_route_enrichment(self, route_id: int) -> Optional[RouteEnrichmentOut]:
+        db_route = await self.repo.get_route_by_id(route_id)
+        if db_route is not None:
+            return RouteEnrichmentOut(
+                id_route=db_route.id_route,
+                enrichment_status=db_route.enrichment_status.value if db_route.enrichment_status else None,
+                estimated_km=db_route.estimated_km,
+                estimated_time=db_route.estimated_time,
+                on_time=db_route.on_time,
+                on_distance=db_route.on_distance
+            )
+        return None
\ No newline at end of file
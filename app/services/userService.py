@@ -1,12 +1,14 @@
 from typing import Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from app.schemas.usersSchema import UserCreate, UserOut, TokenData, UserUpdate
+from app.schemas.usersSchema import UserCreate, UserOut, TokenData, UserUpdate, UserFilter
+from app.utils.paginationUtil import split_page
 from app.repositories.userRepository import UserRepository
 from app.models.usersModel import User
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from app.config import SECRET_KEY, ALGORITHM
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -16,8 +18,9 @@ class UserService:
   def __init__(self, user_repo: UserRepository) -> None:
     self.repo = user_repo
         
-  def create_user(self, user: UserCreate) -> UserOut:
-    hashed_password = pwd_context.hash(user.password)
+  async def create_user(self, user: UserCreate) -> UserOut:
+    # bcrypt es costoso en CPU: se ejecuta en el threadpool para no bloquear el event loop
+    hashed_password = await run_in_threadpool(pwd_context.hash, user.password)
     db_user = User(
       first_name=user.first_name,
       last_name=user.last_name,
@@ -25,7 +28,7 @@ class UserService:
       password=hashed_password,
       id_role_fk=2
     )
-    created_user = self.repo.create_user(db_user)
+    created_user = await self.repo.create_user(db_user)
     return UserOut(
       id_usuario=created_user.id_usuario,
       first_name=created_user.first_name,
@@ -36,8 +39,8 @@ class UserService:
     
     )
     
-  def get_user_by_id(self, user_id: int) -> Optional[UserOut]:
-    db_user = self.repo.get_user_by_id(user_id)
+  async def get_user_by_id(self, user_id: int) -> Optional[UserOut]:
+    db_user = await self.repo.get_user_by_id(user_id)
     if db_user:
       return UserOut(
         id_usuario=db_user.id_usuario,
@@ -48,8 +51,11 @@ class UserService:
         id_vehicle_fk=db_user.id_vehicle_fk
       )
   
-  def get_all_users(self) -> list[UserOut]:
-    db_users = self.repo.get_all_users()
+  async def get_all_users(self, filters: UserFilter) -> tuple[list[UserOut], Optional[int]]:
+    db_users, next_cursor = split_page(
+      await self.repo.get_all_users(**filters.model_dump()),
+      filters.limit, "id_usuario"
+    )
     return [
       UserOut(
         id_usuario=user.id_usuario,
@@ -59,10 +65,10 @@ class UserService:
         id_role_fk=user.id_role_fk,
         id_vehicle_fk=user.id_vehicle_fk
       ) for user in db_users
-    ]
+    ], next_cursor
   
-  def update_user(self, user_id: int, user: UserUpdate) -> Optional[UserOut]:
-    db_user = self.repo.get_user_by_id(user_id)
+  async def update_user(self, user_id: int, user: UserUpdate) -> Optional[UserOut]:
+    db_user = await self.repo.get_user_by_id(user_id)
     if db_user:
       if user.first_name is not None:
         db_user.first_name = user.first_name
@@ -71,12 +77,12 @@ class UserService:
       if user.email is not None:
         db_user.email = user.email
       if user.password is not None:
-        db_user.password = pwd_context.hash(user.password)
+        db_user.password = await run_in_threadpool(pwd_context.hash, user.password)
       if user.id_role_fk is not None:
         db_user.id_role_fk = user.id_role_fk
       if user.id_vehicle_fk is not None:
         db_user.id_vehicle_fk = user.id_vehicle_fk
-      updated_user = self.repo.update_user(db_user)
+      updated_user = await self.repo.update_user(db_user)
       return UserOut(
         id_usuario=updated_user.id_usuario,
         first_name=updated_user.first_name,
@@ -86,15 +92,15 @@ class UserService:
         id_vehicle_fk=updated_user.id_vehicle_fk
       )
   
-  def delete_user(self, user_id: int) -> bool:
-    db_user = self.repo.get_user_by_id(user_id)
+  async def delete_user(self, user_id: int) -> bool:
+    db_user = await self.repo.get_user_by_id(user_id)
     if db_user:
-      return self.repo.delete_user(db_user)
+      return await self.repo.delete_user(db_user)
     return False
   
-  def authenticate_user(self, email: str, password: str) -> Optional[User]:
-        user = self.repo.get_user_by_email(email)
-        if not user or not pwd_context.verify(password, user.password):
+  async def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        user = await self.repo.get_user_by_email(email)
+        if not user or not await run_in_threadpool(pwd_context.verify, password, user.password):
             return None
         return user
       
@@ -108,7 +114,7 @@ class UserService:
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
     
-  def get_current_user(self, token: str = Depends(oauth2_scheme)):
+  async def get_current_user(self, token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
       status_code=status.HTTP_401_UNAUTHORIZED,
       detail="Could not validate credentials",
@@ -124,7 +130,7 @@ class UserService:
     except JWTError:
       raise credentials_exception
     
-    user = self.repo.get_user_by_id(token_data.user_id)
+    user = await self.repo.get_user_by_id(token_data.user_id)
     if user is None:
       raise credentials_exception
     return user
\ No newline at end of file
@@ -0,0 +1,50 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+  """Caché LRU en memoria con expiración por entrada y contadores de hits/misses."""
+
+  def __init__(self, max_size: int, ttl: float) -> None:
+    self.max_size = max_size
+    self.ttl = ttl
+    self._data = OrderedDict()
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key):
+    with self._lock:
+      entry = self._data.get(key)
+      if entry is None or entry[0] < time.monotonic():
+        if entry is not None:
+          del self._data[key]
+        self.misses += 1
+        return None
+      self._data.move_to_end(key)
+      self.hits += 1
+      return entry[1]
+
+  def set(self, key, value) -> None:
+    with self._lock:
+      self._data[key] = (time.monotonic() + self.ttl, value)
+      self._data.move_to_end(key)
+      while len(self._data) > self.max_size:
+        self._data.popitem(last=False)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._data.clear()
+
+  def stats(self) -> dict:
+    with self._lock:
+      total = self.hits + self.misses
+      return {
+        "size": len(self._data),
+        "max_size": self.max_size,
+        "ttl_seconds": self.ttl,
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+      }
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import re
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Iterable
+import pydantic_core
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from app.config import CATALOG_CACHE_BACKEND, CATALOG_CACHE_PATH, CATALOG_CACHE_TTL
+
+# Qué listados quedan desactualizados al escribir en cada catálogo: /models incluye
+# el nombre de la marca, /descriptions el del modelo y /brands/catalog los tres.
+CATALOG_DEPENDENCIES = {
+  "brands": ("brands", "models", "catalog"),
+  "models": ("models", "descriptions", "catalog"),
+  "descriptions": ("descriptions", "catalog"),
+  "roles": ("roles",),
+}
+
+# Una etiqueta de entidad de If-None-Match: `*`, "opaca" o W/"opaca" (RFC 9110 8.8.3)
+ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+  """
+  Comparación débil de If-None-Match: alguna etiqueta de la lista es `*` o tiene la misma
+  parte opaca que `etag`, con o sin el prefijo W/.
+  """
+  opaque = etag.removeprefix("W/")
+  return any(tag == "*" or tag.removeprefix("W/") == opaque for tag in ENTITY_TAG.findall(if_none_match))
+
+
+class CacheBackend(ABC):
+  """
+  Dónde vive la versión de cada catálogo. Cada proceso guarda sus propias respuestas
+  serializadas; solo la versión tiene que ser compartida para que una escritura en un
+  worker de uvicorn invalide la caché de los demás.
+  """
+
+  name: str
+  # True si las operaciones hacen I/O bloqueante: CatalogCache las manda al threadpool
+  blocking: bool = False
+
+  @abstractmethod
+  def version(self, namespace: str) -> int:
+    """Versión actual del catálogo (0 si nunca se escribió)."""
+
+  @abstractmethod
+  def bump(self, namespaces: Iterable[str]) -> None:
+    """Incrementa la versión de cada catálogo para invalidar sus respuestas en caché."""
+
+
+class MemoryCacheBackend(CacheBackend):
+  """Versiones en memoria: suficiente con un solo worker."""
+
+  name = "memory"
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._versions = {}
+
+  def version(self, namespace: str) -> int:
+    with self._lock:
+      return self._versions.get(namespace, 0)
+
+  def bump(self, namespaces: Iterable[str]) -> None:
+    with self._lock:
+      for namespace in namespaces:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+
+class SQLiteCacheBackend(CacheBackend):
+  """
+  Versiones en un archivo SQLite local compartido por todos los workers del host.
+  Leer la versión es una consulta por llave primaria sobre un archivo en caché del SO.
+  """
+
+  name = "sqlite"
+  blocking = True
+
+  def __init__(self, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute("CREATE TABLE IF NOT EXISTS cache_version (namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+  def version(self, namespace: str) -> int:
+    with self._lock:
+      row = self._conn.execute("SELECT version FROM cache_version WHERE namespace = ?", (namespace,)).fetchone()
+    return row[0] if row else 0
+
+  def bump(self, namespaces: Iterable[str]) -> None:
+    with self._lock:
+      self._conn.executemany(
+        "INSERT INTO cache_version (namespace, version) VALUES (?, 1) "
+        "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+        [(namespace,) for namespace in namespaces]
+      )
+
+
+def create_backend(name: str) -> CacheBackend:
+  if name == "memory":
+    return MemoryCacheBackend()
+  if name == "sqlite":
+    return SQLiteCacheBackend(CATALOG_CACHE_PATH)
+  raise ValueError(f"Unknown CATALOG_CACHE_BACKEND: {name}")
+
+
+class CatalogCache:
+  """
+  Caché read-through de los listados de catálogos, ya serializados a JSON.
+
+  Cada entrada guarda la versión del catálogo con la que se generó; si la versión
+  cambió (escritura en este u otro worker) o pasó el TTL se vuelve a consultar la BD.
+  El ETag es el hash del cuerpo, así que un cliente con If-None-Match recibe 304
+  mientras el contenido no cambie aunque la entrada se haya regenerado.
+  """
+
+  def __init__(self, backend: CacheBackend, ttl: float) -> None:
+    self.backend = backend
+    self.ttl = ttl
+    self._lock = threading.Lock()
+    self._entries = {}
+    self.hits = 0
+    self.misses = 0
+    self.not_modified = 0
+
+  async def _call_backend(self, method: Callable, *args):
+    # El backend en memoria solo toma un lock; el de SQLite puede esperar al disco o al
+    # lock de escritura de otro worker y no debe bloquear el event loop
+    if self.backend.blocking:
+      return await run_in_threadpool(method, *args)
+    return method(*args)
+
+  async def _get_or_load(self, namespace: str, key: str, loader: Callable[[], Awaitable]) -> tuple:
+    version = await self._call_backend(self.backend.version, namespace)
+    with self._lock:
+      entry = self._entries.get((namespace, key))
+    if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+      self.hits += 1
+      return entry[2], entry[3]
+
+    self.misses += 1
+    body = pydantic_core.to_json(await loader())
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    # Se guarda con la versión leída antes de consultar: si alguien escribió mientras
+    # tanto, la siguiente lectura verá una versión nueva y volverá a cargar
+    with self._lock:
+      self._entries[(namespace, key)] = (version, time.monotonic() + self.ttl, body, etag)
+    return body, etag
+
+  async def respond(self, request: Request, namespace: str, loader: Callable[[], Awaitable], key: str = "") -> Response:
+    body, etag = await self._get_or_load(namespace, key, loader)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+      self.not_modified += 1
+      return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+  async def invalidate(self, catalog: str) -> None:
+    await self._call_backend(self.backend.bump, CATALOG_DEPENDENCIES.get(catalog, (catalog,)))
+
+  def stats(self) -> dict:
+    with self._lock:
+      size = len(self._entries)
+    return {
+      "backend": self.backend.name,
+      "size": size,
+      "ttl_seconds": self.ttl,
+      "hits": self.hits,
+      "misses": self.misses,
+      "not_modified": self.not_modified,
+    }
+
+
+catalog_cache = CatalogCache(create_backend(CATALOG_CACHE_BACKEND), CATALOG_CACHE_TTL)
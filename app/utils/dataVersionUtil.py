@@ -0,0 +1,73 @@
+import re
+import threading
+from itertools import chain
+from typing import Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class DataVersions:
+  """
+  Número de versión por tabla, incrementado cada vez que se confirma una escritura.
+
+  Sirve como sello para cachés derivadas de la BD: una entrada guardada con el sello
+  (versión de Route, versión de Vehicle, ...) deja de coincidir en cuanto cambia una de
+  esas tablas. Solo ve las escrituras hechas por este proceso a través del ORM.
+  """
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._versions = {}
+
+  def bump(self, tables: Iterable[str]) -> None:
+    with self._lock:
+      for table in tables:
+        self._versions[table] = self._versions.get(table, 0) + 1
+
+  def stamp(self, tables: Iterable[str]) -> tuple:
+    with self._lock:
+      return tuple((table, self._versions.get(table, 0)) for table in sorted(tables))
+
+  def snapshot(self) -> dict:
+    with self._lock:
+      return dict(self._versions)
+
+
+data_versions = DataVersions()
+
+
+def tables_in_sql(sql: str, known_tables: Iterable[str]) -> set:
+  """Tablas conocidas que aparecen como palabra en una consulta SQL."""
+  return {table for table in known_tables if re.search(rf"\b{re.escape(table)}\b", sql, flags=re.IGNORECASE)}
+
+
+# Las tablas escritas se acumulan en session.info y se publican solo al hacer commit:
+# así una consulta concurrente nunca guarda datos previos al commit con el sello nuevo.
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context):
+  written = session.info.setdefault("written_tables", set())
+  for obj in chain(session.new, session.dirty, session.deleted):
+    table = getattr(obj, "__table__", None)
+    if table is not None:
+      written.add(table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(orm_execute_state):
+  # update()/delete()/insert() ejecutados directamente, sin pasar por el flush
+  if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None:
+      orm_execute_state.session.info.setdefault("written_tables", set()).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_written_tables(session):
+  written = session.info.pop("written_tables", None)
+  if written:
+    data_versions.bump(written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+  session.info.pop("written_tables", None)
@@ -1,12 +1,54 @@
-import requests
-from app.config import TOKEN_API_MAP
+import httpx
+from app.utils.geoUtil import haversine_km
+from app.utils.cacheUtil import TTLCache
+from app.config import (
+  TOKEN_API_MAP, ORS_URL, ORS_TIMEOUT,
+  DISTANCE_CACHE_SIZE, DISTANCE_CACHE_TTL, DISTANCE_CACHE_PRECISION
+)
+
+# Estimación cuando ORS no responde: distancia en línea recta corregida por un
+# factor de carretera y una velocidad promedio urbana/carretera.
+ROAD_FACTOR = 1.3
+AVERAGE_SPEED_KMH = 50.0
+
+# (distancia, duración) por par origen/destino redondeado
+distance_cache = TTLCache(DISTANCE_CACHE_SIZE, DISTANCE_CACHE_TTL)
+
+# Cliente compartido: reutiliza las conexiones TLS con OpenRouteService entre requests
+# (las pruebas lo reemplazan por uno con httpx.MockTransport)
+_client = httpx.Client(timeout=ORS_TIMEOUT, limits=httpx.Limits(max_connections=20))
+
+
+def haversine_estimate(lat1: float, lon1: float, lat2: float, lon2: float) -> tuple[float, float]:
+  """Estima (km, minutos) a partir de la distancia en línea recta entre dos puntos."""
+  distancia = haversine_km(lat1, lon1, lat2, lon2) * ROAD_FACTOR
+  duracion = distancia / AVERAGE_SPEED_KMH * 60
+  return distancia, duracion
+
+
+def _cache_key(lat1: float, lon1: float, lat2: float, lon2: float) -> tuple:
+  return tuple(round(c, DISTANCE_CACHE_PRECISION) for c in (lat1, lon1, lat2, lon2))
+
+
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> tuple[float, float]:
-  origen = (lat1, lon1)
-  destino = (lat2, lon2)
-  coords = f"{origen[1]},{origen[0]};{destino[1]},{destino[0]}"
-  url = f"https://api.openrouteservice.org/v2/directions/driving-car?api_key={TOKEN_API_MAP}&start={coords.split(';')[0]}&end={coords.split(';')[1]}"
-  response = requests.get(url).json()
-  distancia_ruta = response["features"][0]["properties"]["summary"]["distance"] / 1000  # km
-  duracion = response["features"][0]["properties"]["summary"]["duration"] / 60 # min
+  key = _cache_key(lat1, lon1, lat2, lon2)
+  cached = distance_cache.get(key)
+  if cached is not None:
+    return cached
+
+  try:
+    response = _client.get(
+      ORS_URL,
+      params={"api_key": TOKEN_API_MAP, "start": f"{lon1},{lat1}", "end": f"{lon2},{lat2}"},
+    )
+    response.raise_for_status()
+    summary = response.json()["features"][0]["properties"]["summary"]
+  except (httpx.HTTPError, ValueError, KeyError, IndexError):
+    # ORS lento o caído: no bloqueamos el cierre de la ruta, usamos la estimación
+    # y no la guardamos en caché para reintentar con ORS la próxima vez
+    return haversine_estimate(lat1, lon1, lat2, lon2)
+
+  distancia_ruta = summary["distance"] / 1000  # km
+  duracion = summary["duration"] / 60  # min
+  distance_cache.set(key, (distancia_ruta, duracion))
   return distancia_ruta, duracion
-  
\ No newline at end of file
@@ -0,0 +1,145 @@
+from operator import attrgetter, itemgetter
+from typing import AsyncIterator, Callable, Dict, Generic, Iterable, List, Optional, Type, TypeVar
+import pydantic_core
+from fastapi import Response
+from pydantic import BaseModel
+
+S = TypeVar("S", bound=BaseModel)
+
+
+def _tuple_getter(getter, names) -> Callable:
+  """itemgetter/attrgetter que siempre devuelve una tupla (con un solo nombre devuelven el valor)."""
+  if len(names) == 1:
+    get = getter(names[0])
+    return lambda obj: (get(obj),)
+  if not names:
+    return lambda obj: ()
+  return getter(*names)
+
+
+class OutMapper(Generic[S]):
+  """
+  Convierte objetos del ORM al esquema *Out sin listar los campos a mano.
+
+  Los nombres de los campos se leen una sola vez de `schema.model_fields` y se juntan
+  en un solo `itemgetter` sobre el `__dict__` de la instancia, donde SQLAlchemy deja las
+  columnas cargadas: así cada fila es una llamada en C más un dict, sin pasar por el
+  descriptor de cada atributo. Si falta alguna columna (expirada o diferida) se usa el
+  acceso normal, que la carga. Los valores vienen de columnas ya tipadas por
+  SQLAlchemy, por eso no se vuelven a validar.
+
+  - renames: campo del esquema -> atributo del modelo (p. ej. latitude_stop -> Latitude_stop)
+  - converters: campo -> función aplicada al valor leído (p. ej. Decimal -> float)
+  - computed: campo -> función que recibe el objeto completo (nombres de relaciones)
+
+  Las consultas de solo columnas (select con joins, sin entidades) se convierten con
+  `from_row`/`from_rows`: ahí las columnas ya vienen etiquetadas con los nombres del
+  esquema, incluidos los calculados, y solo se aplican los converters.
+  """
+
+  def __init__(
+    self,
+    schema: Type[S],
+    renames: Optional[Dict[str, str]] = None,
+    converters: Optional[Dict[str, Callable]] = None,
+    computed: Optional[Dict[str, Callable]] = None
+  ) -> None:
+    renames = renames or {}
+    computed = computed or {}
+    self.schema = schema
+    self.converters = tuple((converters or {}).items())
+    self.computed = tuple(computed.items())
+    self.fields = tuple(name for name in schema.model_fields if name not in computed)
+    sources = [renames.get(name, name) for name in self.fields]
+    self._get_loaded = _tuple_getter(itemgetter, sources)
+    self._get = _tuple_getter(attrgetter, sources)
+    self._fields_set = set(schema.model_fields)
+    self._names = tuple(schema.model_fields)
+    # Solo hace falta reordenar si los campos calculados no son los últimos del esquema
+    self._order = None if self._names == self.fields + tuple(computed) else self._names
+    self._get_projected = _tuple_getter(itemgetter, self._names)
+
+  def row(self, obj) -> dict:
+    """Dict listo para serializar a JSON, en el orden de los campos del esquema."""
+    try:
+      loaded = self._get_loaded(obj.__dict__)
+    except KeyError:
+      loaded = self._get(obj)
+    values = self._convert(dict(zip(self.fields, loaded)))
+    for name, compute in self.computed:
+      values[name] = compute(obj)
+    if self._order is not None:
+      return {name: values[name] for name in self._order}
+    return values
+
+  def rows(self, objs: Iterable) -> List[dict]:
+    row = self.row
+    return [row(obj) for obj in objs]
+
+  def from_row(self, row) -> dict:
+    """Dict de una fila (sqlalchemy Row) cuyas columnas tienen los nombres del esquema."""
+    return self._convert(dict(zip(self._names, self._get_projected(row._mapping))))
+
+  def from_rows(self, rows: Iterable) -> List[dict]:
+    from_row = self.from_row
+    return [from_row(row) for row in rows]
+
+  def construct(self, values: dict) -> S:
+    return self.schema.model_construct(self._fields_set, **values)
+
+  def __call__(self, obj) -> S:
+    return self.construct(self.row(obj))
+
+  def _convert(self, values: dict) -> dict:
+    for name, convert in self.converters:
+      value = values[name]
+      if value is not None:
+        values[name] = convert(value)
+    return values
+
+
+def json_response(content, headers: Optional[dict] = None, status_code: int = 200) -> Response:
+  """
+  Respuesta JSON ya serializada. FastAPI no aplica `response_model` a un Response, así que
+  los listados construidos con OutMapper no se validan por segunda vez; el
+  `response_model` del decorador sigue sirviendo para la documentación.
+  """
+  return Response(
+    content=pydantic_core.to_json(content),
+    media_type="application/json",
+    headers=headers,
+    status_code=status_code
+  )
+
+
+STREAM_MEDIA_TYPES = {
+  "ndjson": "application/x-ndjson",
+  "json": "application/json",
+}
+
+
+async def stream_json(chunks: AsyncIterator[List[dict]], fmt: str) -> AsyncIterator[bytes]:
+  """
+  Serializa por bloques las filas que llegan de un cursor del servidor.
+
+  - ndjson: un objeto por línea.
+  - json: un arreglo normal; cada bloque se serializa de una vez y se le quitan los
+    corchetes para unirlo con los anteriores.
+
+  En memoria solo queda el bloque actual, sin importar cuántas filas tenga la consulta.
+  """
+  if fmt == "ndjson":
+    async for rows in chunks:
+      if rows:
+        yield b"".join([pydantic_core.to_json(row) + b"\n" for row in rows])
+    return
+
+  yield b"["
+  first = True
+  async for rows in chunks:
+    if not rows:
+      continue
+    body = pydantic_core.to_json(rows)[1:-1]
+    yield body if first else b"," + body
+    first = False
+  yield b"]"
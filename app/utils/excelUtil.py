@@ -1,6 +1,9 @@
 import pandas as pd
+import tempfile
 from io import BytesIO
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Iterator, BinaryIO
+from openpyxl import Workbook
+from fastapi.concurrency import run_in_threadpool
 from app.models.routesModel import Route
 from app.models.fuelStopsModel import FuelStop
 from app.models.vehiclesModel import Vehicle
@@ -101,7 +104,7 @@ class ExcelGenerator:
                                 "Liters Added": stop.liters_added if hasattr(stop, 'liters_added') else 0,
                                 "KM Reading": stop.current_km if hasattr(stop, 'current_km') else 0,
                                 "Location Stop (Lat, Long)": f"{stop.Latitude_stop}, {stop.Longitude_stop}" if hasattr(stop, 'Latitude_stop') and hasattr(stop, 'Longitude_stop') else "",
-                                "Location Start (Lat, Long)": f"{stop.Latitude_start}, {stop.Longitude_start}" if hasattr(stop, 'Latitude_start') and hasattr(stop, 'Longitude_start') and stop.Latitude_start and stop.Longitude_start else ""
+                                "Location Start (Lat, Long)": f"{stop.Latitude_start}, {stop.Longitude_start}" if hasattr(stop, 'Latitude_start') and hasattr(stop, 'Longitude_start') and stop.Latitude_start is not None and stop.Longitude_start is not None else ""
                             }
                             fuel_stops_data.append(stop_data)
                         
@@ -110,4 +113,106 @@ class ExcelGenerator:
         
         # Return to beginning of file
         output.seek(0)
-        return output 
\ No newline at end of file
+        return output
+
+    ROUTE_COLUMNS = [
+        "ID", "Description", "Driver", "Start Time", "End Time", "Start KM", "End KM",
+        "Distance (KM)", "Duration (hours)", "Estimated KM", "Estimated Time",
+        "On Time", "On Distance", "Liters Consumed"
+    ]
+    
+    FUEL_STOP_COLUMNS = [
+        "Route ID", "ID", "Stop Time", "Resume Time", "Start Time", "Stop Duration (min)",
+        "Liters Added", "KM Reading", "Location Stop (Lat, Long)", "Location Start (Lat, Long)"
+    ]
+
+    @staticmethod
+    def _vehicle_row(vehicle: Vehicle) -> list:
+        return [
+            vehicle.id_vehicle, vehicle.number_plate, vehicle.serial_number,
+            vehicle.brand.name if vehicle.brand else "",
+            vehicle.model.name if vehicle.model else "",
+            vehicle.description.name if vehicle.description else "",
+            vehicle.year, vehicle.color, vehicle.km, vehicle.km_per_litre,
+            vehicle.route_status.value, vehicle.assignment_status.value
+        ]
+
+    @staticmethod
+    def _route_row(row) -> list:
+        distance = row.end_km - row.start_km if row.start_km is not None and row.end_km is not None else 0
+        driver_name = f"{row.first_name} {row.last_name}" if row.first_name else ""
+        return [
+            row.id_route, row.description or "", driver_name, row.start_time, row.end_time,
+            row.start_km or 0, row.end_km or 0, distance, row.total_duration or 0,
+            row.estimated_km or 0, row.estimated_time or 0,
+            "Yes" if row.on_time else "No", "Yes" if row.on_distance else "No",
+            row.liters_consumed or 0
+        ]
+
+    @staticmethod
+    def _fuel_stop_row(row) -> list:
+        stop_duration = 0
+        if row.resume_time and row.stop_time:
+            stop_duration = round((row.resume_time - row.stop_time).total_seconds() / 60)
+        return [
+            row.id_route_fk, row.id_fuel_stop, row.stop_time, row.resume_time, row.start_time,
+            stop_duration, float(row.liters_added) if row.liters_added is not None else 0,
+            row.current_km or 0,
+            f"{row.Latitude_stop}, {row.Longitude_stop}",
+            # 0.0 es una coordenada válida: solo NULL deja la celda vacía
+            f"{row.Latitude_start}, {row.Longitude_start}" if row.Latitude_start is not None and row.Longitude_start is not None else ""
+        ]
+
+    @staticmethod
+    async def generate_vehicle_report_streaming(vehicle: Vehicle, route_chunks: AsyncIterator[list], fuel_stop_chunks: AsyncIterator[list]) -> BinaryIO:
+        """
+        Generate the vehicle report with constant memory usage
+        
+        Rows are consumed chunk by chunk from the database cursors and appended to
+        write-only worksheets, which openpyxl spools to temporary files instead of
+        keeping them in memory. All fuel stops go into a single "Fuel Stops" sheet
+        (with a Route ID column) instead of one sheet per route.
+        
+        Args:
+            vehicle: The vehicle to report on
+            route_chunks: Async iterator yielding lists of route rows
+            fuel_stop_chunks: Async iterator yielding lists of fuel stop rows
+            
+        Returns:
+            Temporary file containing the Excel file, positioned at the beginning
+        """
+        workbook = Workbook(write_only=True)
+        
+        vehicle_sheet = workbook.create_sheet("Vehicle Info")
+        vehicle_sheet.append([
+            "ID", "Number Plate", "Serial Number", "Brand", "Model", "Description",
+            "Year", "Color", "Current KM", "KM per Liter", "Current Route Status", "Assignment Status"
+        ])
+        vehicle_sheet.append(ExcelGenerator._vehicle_row(vehicle))
+        
+        routes_sheet = workbook.create_sheet("Routes")
+        routes_sheet.append(ExcelGenerator.ROUTE_COLUMNS)
+        async for rows in route_chunks:
+            for row in rows:
+                routes_sheet.append(ExcelGenerator._route_row(row))
+        
+        fuel_stops_sheet = workbook.create_sheet("Fuel Stops")
+        fuel_stops_sheet.append(ExcelGenerator.FUEL_STOP_COLUMNS)
+        async for rows in fuel_stop_chunks:
+            for row in rows:
+                fuel_stops_sheet.append(ExcelGenerator._fuel_stop_row(row))
+        
+        # Zipping the spooled sheets is blocking I/O, keep it off the event loop
+        output = tempfile.TemporaryFile()
+        await run_in_threadpool(workbook.save, output)
+        output.seek(0)
+        return output
+
+    @staticmethod
+    def iter_file(file: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Read a file in fixed-size chunks for a StreamingResponse and close it at the end."""
+        try:
+            while chunk := file.read(chunk_size):
+                yield chunk
+        finally:
+            file.close()
@@ -0,0 +1,145 @@
+import csv
+from abc import ABC, abstractmethod
+from typing import Iterable, List
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, String
+
+
+class ExportWriter(ABC):
+  """
+  Escribe bloques de filas (tuplas en el orden de `columns`) a un archivo.
+
+  Cada bloque se escribe en cuanto llega, así la memoria depende del tamaño del bloque
+  y no del de la tabla.
+  """
+
+  def __init__(self, path: str, columns: List) -> None:
+    self.path = path
+    self.columns = columns
+    self.names = [column.name for column in columns]
+
+  @abstractmethod
+  def write(self, rows: List[tuple]) -> None:
+    """Agrega un bloque de filas al archivo."""
+
+  @abstractmethod
+  def close(self) -> None:
+    """Termina el archivo (pie de Parquet/Arrow) y lo cierra."""
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+    self.close()
+
+
+class CsvExportWriter(ExportWriter):
+  """CSV con encabezado; NULL se escribe como campo vacío."""
+
+  def __init__(self, path: str, columns: List) -> None:
+    super().__init__(path, columns)
+    self._file = open(path, "w", newline="", encoding="utf-8")
+    self._writer = csv.writer(self._file)
+    self._writer.writerow(self.names)
+
+  def write(self, rows: List[tuple]) -> None:
+    self._writer.writerows(rows)
+
+  def close(self) -> None:
+    self._file.close()
+
+
+def _pyarrow():
+  # pyarrow solo hace falta para Parquet/Arrow; CSV funciona sin él
+  try:
+    import pyarrow
+    import pyarrow.parquet
+    import pyarrow.ipc
+  except ImportError:
+    raise RuntimeError("Parquet and Arrow exports require pyarrow (pip install pyarrow)")
+  return pyarrow
+
+
+def arrow_type(pa, sql_type):
+  """Tipo de Arrow equivalente al tipo de columna de SQLAlchemy."""
+  if isinstance(sql_type, Boolean):
+    return pa.bool_()
+  if isinstance(sql_type, Integer):
+    return pa.int64()
+  if isinstance(sql_type, Float):
+    return pa.float64()
+  if isinstance(sql_type, Numeric):
+    return pa.decimal128(sql_type.precision or 38, sql_type.scale or 0)
+  if isinstance(sql_type, DateTime):
+    return pa.timestamp("us")
+  if isinstance(sql_type, Date):
+    return pa.date32()
+  if isinstance(sql_type, String):
+    return pa.string()
+  raise ValueError(f"No Arrow type for column type {sql_type!r}")
+
+
+class _ArrowBatchWriter(ExportWriter):
+  """Convierte cada bloque en un RecordBatch con el esquema de la tabla."""
+
+  def __init__(self, path: str, columns: List) -> None:
+    super().__init__(path, columns)
+    self.pa = _pyarrow()
+    self.schema = self.pa.schema([
+      self.pa.field(column.name, arrow_type(self.pa, column.type), nullable=column.nullable)
+      for column in columns
+    ])
+
+  def _batch(self, rows: List[tuple]):
+    # Transponer filas a columnas una vez por bloque; pa.array convierte cada columna en C
+    values = list(zip(*rows))
+    arrays = [self.pa.array(column, type=field.type) for column, field in zip(values, self.schema)]
+    return self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class ParquetExportWriter(_ArrowBatchWriter):
+  """Parquet con compresión zstd; cada bloque queda como un row group."""
+
+  def __init__(self, path: str, columns: List) -> None:
+    super().__init__(path, columns)
+    self._writer = self.pa.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+  def write(self, rows: List[tuple]) -> None:
+    if rows:
+      self._writer.write_batch(self._batch(rows))
+
+  def close(self) -> None:
+    self._writer.close()
+
+
+class ArrowExportWriter(_ArrowBatchWriter):
+  """Archivo Arrow IPC (Feather v2), legible con pyarrow.ipc.open_file o pandas.read_feather."""
+
+  def __init__(self, path: str, columns: List) -> None:
+    super().__init__(path, columns)
+    self._sink = self.pa.OSFile(path, "wb")
+    self._writer = self.pa.ipc.new_file(self._sink, self.schema)
+
+  def write(self, rows: List[tuple]) -> None:
+    if rows:
+      self._writer.write_batch(self._batch(rows))
+
+  def close(self) -> None:
+    self._writer.close()
+    self._sink.close()
+
+
+EXPORT_WRITERS = {
+  "csv": CsvExportWriter,
+  "parquet": ParquetExportWriter,
+  "arrow": ArrowExportWriter,
+}
+
+
+def write_export(fmt: str, path: str, columns: List, chunks: Iterable[List[tuple]]) -> int:
+  """Escribe todos los bloques en `path` con el formato indicado y devuelve el número de filas."""
+  total = 0
+  with EXPORT_WRITERS[fmt](path, columns) as writer:
+    for rows in chunks:
+      writer.write(rows)
+      total += len(rows)
+  return total
@@ -0,0 +1,36 @@
+import math
+from typing import Tuple
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+  """Distancia en línea recta (gran círculo) entre dos puntos, en km."""
+  phi1, phi2 = math.radians(lat1), math.radians(lat2)
+  dphi = math.radians(lat2 - lat1)
+  dlambda = math.radians(lon2 - lon1)
+  a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+  return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+  """
+  Caja (min_lat, max_lat, min_lon, max_lon) que contiene el círculo de radio radius_km.
+
+  Se usa como prefiltro indexable (BETWEEN sobre latitud/longitud); el radio exacto
+  se comprueba después con haversine_km sobre los candidatos. Usa el mismo radio
+  terrestre que haversine_km, así ningún punto dentro del radio queda fuera de la caja.
+  """
+  angular = radius_km / EARTH_RADIUS_KM
+  delta_lat = math.degrees(angular)
+  min_lat, max_lat = lat - delta_lat, lat + delta_lat
+  # El círculo contiene un polo: todas las longitudes
+  if min_lat <= -90.0 or max_lat >= 90.0:
+    return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+  # Mayor separación en longitud del círculo (en la latitud de su punto tangente)
+  delta_lon = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(lat))))
+  min_lon, max_lon = lon - delta_lon, lon + delta_lon
+  # Cruza el antimeridiano: un BETWEEN no da la vuelta, así que se filtra solo por latitud
+  if min_lon < -180.0 or max_lon > 180.0:
+    return min_lat, max_lat, -180.0, 180.0
+  return min_lat, max_lat, min_lon, max_lon
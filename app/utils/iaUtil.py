@@ -1,62 +1,213 @@
-import requests
+import asyncio
 import json
 import re
-import pymysql
-from app.config import MYSQL_USER, MYSQL_PASSWORD, MYSQL_DATABASE
-
-
-def manejar_pregunta(pregunta):
-    def es_sql_seguro(sql):
-        s = sql.lower().strip()
-        if not s.startswith("select"):
-            return False
-        for p in ["drop", "delete", "update", "insert", "--", ";--", "alter"]:
-            if p in s:
-                return False
-        return True
-
-    def extraer_sql(texto):
-        match = re.search(r"<sql>(.*?)</sql>", texto, flags=re.IGNORECASE | re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        match = re.search(r"(select .*?;)", texto, flags=re.IGNORECASE | re.DOTALL)
-        if match:
-            raw = match.group(1)
-            return raw.split(";")[0].strip() + ";"
-        return ""
-
-    def ejecutar_sql(sql):
-        if not es_sql_seguro(sql):
-            raise ValueError("Consulta SQL no permitida")
-
-        try:
-            conn = pymysql.connect(
-                host="aaaimx.org",
-                user= MYSQL_USER,
-                password= MYSQL_PASSWORD,
-                database= MYSQL_DATABASE,
-                charset="utf8mb4",
-                cursorclass=pymysql.cursors.Cursor
-            )
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute(sql)
-                    rows = cur.fetchall()
-                    cols = [desc[0] for desc in cur.description]
-
-            if not rows:
-                return "No se encontraron resultados"
-
-            resultados = []
-            for row in rows:
-                resultados.append(", ".join(f"{col}: {val}" for col, val in zip(cols, row)))
-            return "\n".join(resultados)
-
-        except pymysql.MySQLError as e:
-            raise Exception(f"Error en la base de datos: {str(e)}")
-
-    def describir_bd():
-        return """
+import unicodedata
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Optional
+import httpx
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import readonly_engine, Base
+from app.utils.cacheUtil import TTLCache
+from app.utils.dataVersionUtil import data_versions, tables_in_sql
+from app.config import (
+  OLLAMA_URL, OLLAMA_MODEL,
+  CHATBOT_MAX_CONCURRENCY, CHATBOT_MAX_QUEUE, CHATBOT_QUEUE_TIMEOUT,
+  CHATBOT_SQL_TIMEOUT, CHATBOT_DB_TIMEOUT, CHATBOT_ANSWER_TIMEOUT, CHATBOT_MAX_ROWS,
+  CHATBOT_SQL_CACHE_SIZE, CHATBOT_SQL_CACHE_TTL, CHATBOT_RESULT_CACHE_SIZE, CHATBOT_RESULT_CACHE_TTL,
+  CHATBOT_ANSWER_CACHE_SIZE, CHATBOT_ANSWER_CACHE_TTL
+)
+
+
+class ChatBotBusy(Exception):
+  """La cola del chat-bot está llena o la pregunta esperó demasiado por un turno."""
+
+
+class ChatBotLimiter:
+  """
+  Limita las preguntas que se procesan a la vez (cada una ocupa el LLM y una conexión).
+
+  Hasta max_waiting preguntas esperan turno en cola; las demás se rechazan de inmediato
+  para no acumular requests colgados mientras el LLM está saturado.
+  """
+
+  def __init__(self, max_concurrency: int, max_waiting: int, wait_timeout: float) -> None:
+    self.max_concurrency = max_concurrency
+    self.max_waiting = max_waiting
+    self.wait_timeout = wait_timeout
+    # El semáforo se crea dentro del event loop (en Python 3.9 queda atado al loop de creación)
+    self._semaphore: Optional[asyncio.Semaphore] = None
+    self.active = 0
+    self.waiting = 0
+    self.completed = 0
+    self.rejected = 0
+
+  @asynccontextmanager
+  async def slot(self):
+    if self._semaphore is None:
+      self._semaphore = asyncio.Semaphore(self.max_concurrency)
+    if self.waiting >= self.max_waiting:
+      self.rejected += 1
+      raise ChatBotBusy()
+
+    self.waiting += 1
+    try:
+      await asyncio.wait_for(self._semaphore.acquire(), self.wait_timeout)
+    except asyncio.TimeoutError:
+      self.rejected += 1
+      raise ChatBotBusy()
+    finally:
+      self.waiting -= 1
+
+    self.active += 1
+    try:
+      yield
+    finally:
+      self.active -= 1
+      self.completed += 1
+      self._semaphore.release()
+
+  def stats(self) -> dict:
+    return {
+      "max_concurrency": self.max_concurrency,
+      "max_waiting": self.max_waiting,
+      "active": self.active,
+      "waiting": self.waiting,
+      "completed": self.completed,
+      "rejected": self.rejected,
+    }
+
+
+chat_limiter = ChatBotLimiter(CHATBOT_MAX_CONCURRENCY, CHATBOT_MAX_QUEUE, CHATBOT_QUEUE_TIMEOUT)
+
+# Cliente HTTP compartido con Ollama (keep-alive); se cierra en el lifespan de la app
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+  global _client
+  if _client is None:
+    _client = httpx.AsyncClient(base_url=OLLAMA_URL, limits=httpx.Limits(max_connections=CHATBOT_MAX_CONCURRENCY * 2))
+  return _client
+
+
+async def close_client() -> None:
+  global _client
+  if _client is not None:
+    await _client.aclose()
+    _client = None
+
+
+async def _con_limite(etapa: str, coro, timeout: float):
+  """Ejecuta una etapa del pipeline con su propio tiempo límite."""
+  try:
+    return await asyncio.wait_for(coro, timeout)
+  except asyncio.TimeoutError:
+    raise Exception(f"Tiempo de espera agotado en la etapa: {etapa}")
+
+
+async def _stream_con_limite(etapa: str, agen, timeout: float):
+  """Reenvía los elementos de un generador async mientras no se agote el tiempo total de la etapa."""
+  loop = asyncio.get_running_loop()
+  limite = loop.time() + timeout
+  try:
+    while True:
+      restante = limite - loop.time()
+      if restante <= 0:
+        raise asyncio.TimeoutError()
+      try:
+        item = await asyncio.wait_for(agen.__anext__(), restante)
+      except StopAsyncIteration:
+        return
+      yield item
+  except asyncio.TimeoutError:
+    raise Exception(f"Tiempo de espera agotado en la etapa: {etapa}")
+  finally:
+    await agen.aclose()
+
+
+def es_sql_seguro(sql):
+  s = sql.lower().strip()
+  if not s.startswith("select"):
+    return False
+  for p in ["drop", "delete", "update", "insert", "--", ";--", "alter"]:
+    if p in s:
+      return False
+  return True
+
+
+def extraer_sql(texto):
+  match = re.search(r"<sql>(.*?)</sql>", texto, flags=re.IGNORECASE | re.DOTALL)
+  if match:
+    return match.group(1).strip()
+  match = re.search(r"(select .*?;)", texto, flags=re.IGNORECASE | re.DOTALL)
+  if match:
+    raw = match.group(1)
+    return raw.split(";")[0].strip() + ";"
+  return ""
+
+
+async def ejecutar_sql(sql):
+  if not es_sql_seguro(sql):
+    raise ValueError("Consulta SQL no permitida")
+
+  try:
+    async with readonly_engine.connect() as conn:
+      result = await conn.execute(text(sql))
+      cols = list(result.keys())
+      rows = result.fetchmany(CHATBOT_MAX_ROWS)
+  except SQLAlchemyError as e:
+    raise Exception(f"Error en la base de datos: {str(e)}")
+
+  if not rows:
+    return "No se encontraron resultados"
+
+  resultados = []
+  for row in rows:
+    resultados.append(", ".join(f"{col}: {val}" for col, val in zip(cols, row)))
+  return "\n".join(resultados)
+
+
+async def generar(prompt: str) -> str:
+  response = await _get_client().post(
+    "/api/generate",
+    json={
+      "model": OLLAMA_MODEL,
+      "prompt": prompt,
+      "stream": False,
+      "options": {"num_predict": 200}
+    },
+    timeout=None  # el límite lo pone _con_limite según la etapa
+  )
+  response.raise_for_status()
+  return response.json().get("response", "")
+
+
+async def generar_stream(prompt: str):
+  """Tokens de Ollama a medida que se generan (respuesta NDJSON con "stream": true)."""
+  async with _get_client().stream(
+    "POST",
+    "/api/generate",
+    json={
+      "model": OLLAMA_MODEL,
+      "prompt": prompt,
+      "stream": True,
+      "options": {"num_predict": 200}
+    },
+    timeout=None  # el límite lo pone _stream_con_limite
+  ) as response:
+    response.raise_for_status()
+    async for linea in response.aiter_lines():
+      if not linea.strip():
+        continue
+      data = json.loads(linea)
+      if data.get("response"):
+        yield data["response"]
+      if data.get("done"):
+        break
+
+
+ESQUEMA_BD = """
       CREATE TABLE Brand (
   id_brand int NOT NULL,
   name varchar(50) NOT NULL
@@ -109,10 +260,10 @@ CREATE TABLE Route (
   id_vehicle_fk int NOT NULL,
   id_user_fk int NOT NULL,
   description varchar(255) NOT NULL,
-  latitude_start varchar(50) DEFAULT NULL,
-  longitude_start varchar(50) DEFAULT NULL,
-  latitude_end varchar(50) DEFAULT NULL,
-  longitude_end varchar(50) DEFAULT NULL,
+  latitude_start double DEFAULT NULL,
+  longitude_start double DEFAULT NULL,
+  latitude_end double DEFAULT NULL,
+  longitude_end double DEFAULT NULL,
   start_time datetime DEFAULT NULL,
   end_time datetime DEFAULT NULL,
   estimated_time double DEFAULT NULL,
@@ -131,13 +282,13 @@ CREATE TABLE Route (
 CREATE TABLE FuelStop (
   id_fuel_stop int NOT NULL,
   id_route_fk int NOT NULL,
-  Latitude_stop varchar(255) NOT NULL,
-  Longitude_stop varchar(255) NOT NULL,
+  Latitude_stop double NOT NULL,
+  Longitude_stop double NOT NULL,
   stop_time datetime NOT NULL,
   resume_time datetime DEFAULT NULL,
   start_time datetime DEFAULT NULL,
-  Latitude_start varchar(255) DEFAULT NULL,
-  Longitude_start varchar(255) DEFAULT NULL,
+  Latitude_start double DEFAULT NULL,
+  Longitude_start double DEFAULT NULL,
   current_km int DEFAULT NULL,
   image_km varchar(255) DEFAULT NULL,
   liters_added decimal(5,2) NOT NULL
@@ -152,11 +303,46 @@ CREATE TABLE Maintenance (
   end_time datetime DEFAULT NULL,
   status varchar(11) NOT NULL
 );
-      """  # No modifiqué esta parte, puedes mantener tu contenido tal cual
 
-    try:
-        contexto_db = describir_bd()
-        prompt = f"""{contexto_db}
+-- Resúmenes precalculados: usar estas tablas para preguntas de km, litros,
+-- horas o puntualidad por vehículo/día o por conductor en lugar de sumar Route.
+-- Puntualidad = on_time_routes / routes_evaluated (routes_evaluated puede ser 0).
+CREATE TABLE VehicleDailyStats (
+  id_vehicle_fk int NOT NULL,
+  day date NOT NULL,
+  routes_completed int NOT NULL DEFAULT 0,
+  km int NOT NULL DEFAULT 0,
+  liters_consumed double NOT NULL DEFAULT 0,
+  liters_added double NOT NULL DEFAULT 0,
+  total_duration double NOT NULL DEFAULT 0,
+  routes_evaluated int NOT NULL DEFAULT 0,
+  on_time_routes int NOT NULL DEFAULT 0,
+  on_distance_routes int NOT NULL DEFAULT 0,
+  PRIMARY KEY (id_vehicle_fk, day)
+);
+
+CREATE TABLE DriverStats (
+  id_user_fk int NOT NULL,
+  routes_completed int NOT NULL DEFAULT 0,
+  km int NOT NULL DEFAULT 0,
+  liters_consumed double NOT NULL DEFAULT 0,
+  liters_added double NOT NULL DEFAULT 0,
+  total_duration double NOT NULL DEFAULT 0,
+  routes_evaluated int NOT NULL DEFAULT 0,
+  on_time_routes int NOT NULL DEFAULT 0,
+  on_distance_routes int NOT NULL DEFAULT 0,
+  last_route_at datetime DEFAULT NULL,
+  PRIMARY KEY (id_user_fk)
+);
+      """
+
+
+def describir_bd():
+  return ESQUEMA_BD
+
+
+def prompt_sql(pregunta):
+  return f"""{describir_bd()}
 
 Eres un asistente inteligente.
 - Si el usuario pregunta sobre la base de datos, genera SELECT dentro de <sql>...</sql>.
@@ -167,24 +353,10 @@ Pregunta:
 {pregunta}
 Responde:
 """
-        response = requests.post(
-            "http://ollama:11434/api/generate",
-            json={
-                "model": "gemma:2b",
-                "prompt": prompt,
-                "stream": False,
-                "options": {"num_predict": 200}
-            }
-        )
-        data = response.json()
-        respuesta_completa = data.get("response", "")
-
-        posible_sql = extraer_sql(respuesta_completa)
-
-        if posible_sql:
-            resultado_bd = ejecutar_sql(posible_sql)
-
-            segundo_prompt = f"""
+
+
+def prompt_respuesta(pregunta, resultado_bd):
+  return f"""
 Eres un asistente amable. El usuario preguntó:
 
 {pregunta}
@@ -194,24 +366,126 @@ Resultado desde la base de datos:
 
 Responde de forma clara, sin mencionar SQL ni consultas. Si hay correos o roles, menciónalos.
 """
-            response2 = requests.post(
-                "http://ollama:11434/api/generate",
-                json={
-                    "model": "gemma:2b",
-                    "prompt": segundo_prompt,
-                    "stream": False,
-                    "options": {"num_predict": 200}
-                }
-            )
-            data2 = response2.json()
-            return data2.get("response", "").replace("\n", " ").replace(" - ", ", ").strip()
 
-        return respuesta_completa.strip()
 
-    except Exception as e:
-        return f"Error: {str(e)}"
+def normalizar_pregunta(pregunta):
+  """Minúsculas, sin acentos ni signos: "¿Cuántos vehículos?" y "cuantos vehiculos" son la misma clave."""
+  texto = unicodedata.normalize("NFKD", pregunta.lower())
+  texto = "".join(c for c in texto if not unicodedata.combining(c))
+  texto = re.sub(r"[^\w\s]", " ", texto)
+  return " ".join(texto.split())
+
+
+# Nivel 1: pregunta normalizada -> ("sql", consulta) o ("texto", respuesta sin consulta)
+sql_cache = TTLCache(CHATBOT_SQL_CACHE_SIZE, CHATBOT_SQL_CACHE_TTL)
+# Nivel 2: (consulta, sello de versión de las tablas que lee) -> resultado de la BD
+result_cache = TTLCache(CHATBOT_RESULT_CACHE_SIZE, CHATBOT_RESULT_CACHE_TTL)
+# (pregunta normalizada, resultado) -> respuesta final; si el resultado no cambió no se vuelve a redactar
+# (la clave incluye el resultado, así que puede vivir más que result_cache)
+answer_cache = TTLCache(CHATBOT_ANSWER_CACHE_SIZE, CHATBOT_ANSWER_CACHE_TTL)
+
+
+def sello_de_datos(sql):
+  return data_versions.stamp(tables_in_sql(sql, Base.metadata.tables.keys()))
+
+
+def cache_stats() -> dict:
+  return {
+    "sql": sql_cache.stats(),
+    "result": result_cache.stats(),
+    "answer": answer_cache.stats(),
+    "data_versions": data_versions.snapshot(),
+  }
+
+
+def limpiar_respuesta(respuesta):
+  return respuesta.replace("\n", " ").replace(" - ", ", ").strip()
+
+
+async def eventos_pregunta(pregunta):
+  """
+  Pipeline del chat-bot como eventos ("progress", etapa), ("token", texto) y al final
+  ("answer", respuesta completa).
+
+  Las etapas: generating_sql, querying_db y generating_answer; los tokens de la
+  respuesta se emiten a medida que Ollama los genera. Lanza ChatBotBusy si no
+  hay turno y Exception con el motivo si falla una etapa.
+  """
+  clave = normalizar_pregunta(pregunta)
+
+  async with AsyncExitStack() as turno:
+    ocupado = False
+
+    async def ocupar_turno():
+      # Solo las etapas que van al LLM o a la BD ocupan turno del limitador;
+      # una pregunta resuelta por completo desde la caché no espera en la cola
+      nonlocal ocupado
+      if not ocupado:
+        await turno.enter_async_context(chat_limiter.slot())
+        ocupado = True
+
+    generado = sql_cache.get(clave)
+    sql_nuevo = generado is None
+    if sql_nuevo:
+      await ocupar_turno()
+      yield "progress", "generating_sql"
+      respuesta_completa = await _con_limite("generación de SQL", generar(prompt_sql(pregunta)), CHATBOT_SQL_TIMEOUT)
+      posible_sql = extraer_sql(respuesta_completa)
+      generado = ("sql", posible_sql) if posible_sql else ("texto", respuesta_completa.strip())
+      if not posible_sql:
+        sql_cache.set(clave, generado)
+
+    tipo, contenido = generado
+    if tipo == "texto":
+      yield "token", contenido
+      yield "answer", contenido
+      return
+
+    # El sello se toma antes de consultar: si hay una escritura a la mitad, el
+    # resultado queda guardado con el sello viejo y ya no se vuelve a usar
+    clave_resultado = (contenido, sello_de_datos(contenido))
+    resultado_bd = result_cache.get(clave_resultado)
+    if resultado_bd is None:
+      await ocupar_turno()
+      yield "progress", "querying_db"
+      resultado_bd = await _con_limite("consulta a la base de datos", ejecutar_sql(contenido), CHATBOT_DB_TIMEOUT)
+      result_cache.set(clave_resultado, resultado_bd)
+    if sql_nuevo:
+      # El SQL generado solo se reutiliza si se pudo ejecutar
+      sql_cache.set(clave, generado)
+
+    respuesta = answer_cache.get((clave, resultado_bd))
+    if respuesta is not None:
+      yield "token", respuesta
+      yield "answer", respuesta
+      return
+
+    await ocupar_turno()
+    yield "progress", "generating_answer"
+    partes = []
+    tokens = generar_stream(prompt_respuesta(pregunta, resultado_bd))
+    async for token in _stream_con_limite("generación de respuesta", tokens, CHATBOT_ANSWER_TIMEOUT):
+      partes.append(token)
+      yield "token", token
+    respuesta = limpiar_respuesta("".join(partes))
+    answer_cache.set((clave, resultado_bd), respuesta)
+    yield "answer", respuesta
+
+
+async def manejar_pregunta(pregunta):
+  try:
+    respuesta = ""
+    async for evento, texto in eventos_pregunta(pregunta):
+      if evento == "answer":
+        respuesta = texto
+    return respuesta
+  except ChatBotBusy:
+    # El router responde 503 en lugar de encolar sin límite
+    raise
+  except Exception as e:
+    return f"Error: {str(e)}"
 
 
 # if __name__ == "__main__":
-#     respuesta = manejar_pregunta("¿Cuántos usuarios hay en el sistema?")
+#     respuesta = asyncio.run(manejar_pregunta("¿Cuántos usuarios hay en el sistema?"))
 #     print(respuesta)
@@ -0,0 +1,23 @@
+from typing import Optional, Tuple, Any
+
+
+def apply_keyset(stmt, id_column, after: Optional[int] = None, limit: Optional[int] = None):
+  """
+  Paginación por keyset (seek): WHERE id > after ORDER BY id LIMIT limit + 1.
+
+  Se pide una fila extra para saber si hay una página siguiente sin hacer COUNT(*).
+  """
+  if after is not None:
+    stmt = stmt.filter(id_column > after)
+  stmt = stmt.order_by(id_column)
+  if limit is not None:
+    stmt = stmt.limit(limit + 1)
+  return stmt
+
+
+def split_page(rows: list, limit: Optional[int], key: str) -> Tuple[list, Optional[Any]]:
+  """Recorta la fila extra de apply_keyset y devuelve (página, cursor para `after`)."""
+  if limit is None or len(rows) <= limit:
+    return rows, None
+  page = rows[:limit]
+  return page, getattr(page[-1], key)
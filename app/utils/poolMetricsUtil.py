@@ -0,0 +1,120 @@
+import time
+import threading
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """
+    Contadores del pool de conexiones alimentados por los eventos de SQLAlchemy.
+
+    Los eventos connect/checkout/checkin/close registran altas, préstamos y
+    reciclajes de conexiones; el tiempo de espera lo reporta TimedQueuePool.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._created_at = {}
+        self.pool = None
+        self.checkouts = 0
+        self.checkins = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.invalidated = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_last = 0.0
+
+    def attach(self, pool) -> None:
+        """Registra los listeners sobre un pool (engine.pool o async_engine.sync_engine.pool)."""
+        self.pool = pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "close", self._on_close)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        event.listen(pool, "soft_invalidate", self._on_invalidate)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_last = seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connections_created += 1
+            self._created_at[id(connection_record)] = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        # pool_recycle y pool_pre_ping cierran la conexión vieja antes de abrir otra
+        with self._lock:
+            self.connections_closed += 1
+            self._created_at.pop(id(connection_record), None)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidated += 1
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - created for created in self._created_at.values()]
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "invalidated": self.invalidated,
+                "wait_time": {
+                    "count": self.wait_count,
+                    "total_seconds": round(self.wait_total, 6),
+                    "avg_seconds": round(self.wait_total / self.wait_count, 6) if self.wait_count else 0.0,
+                    "max_seconds": round(self.wait_max, 6),
+                    "last_seconds": round(self.wait_last, 6),
+                    "timeouts": self.timeouts,
+                },
+                "connection_age": {
+                    "open_connections": len(ages),
+                    "oldest_seconds": round(max(ages), 3) if ages else 0.0,
+                    "avg_seconds": round(sum(ages) / len(ages), 3) if ages else 0.0,
+                },
+            }
+        if self.pool is not None and hasattr(self.pool, "checkedout"):
+            data.update({
+                "pool_size": self.pool.size(),
+                "checked_out": self.pool.checkedout(),
+                "checked_in": self.pool.checkedin(),
+                "overflow": self.pool.overflow(),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que mide cuánto espera cada checkout por una conexión libre."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
@@ -0,0 +1,42 @@
+from typing import Awaitable, Callable, TypeVar
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm.exc import StaleDataError
+from app.config import VEHICLE_UPDATE_RETRIES
+
+T = TypeVar("T")
+
+# MySQL/InnoDB: 1213 deadlock, 1205 lock wait timeout. La transacción ya se deshizo y
+# se puede repetir igual que un conflicto de versión.
+RETRYABLE_MYSQL_ERRORS = (1213, 1205)
+
+
+def is_lock_conflict(error: DBAPIError) -> bool:
+  args = getattr(error.orig, "args", None)
+  return bool(args) and args[0] in RETRYABLE_MYSQL_ERRORS
+
+
+async def retry_on_conflict(
+  operation: Callable[[], Awaitable[T]],
+  rollback: Callable[[], Awaitable[None]],
+  retries: int = VEHICLE_UPDATE_RETRIES
+) -> T:
+  """
+  Ejecuta `operation` (leer, validar, escribir y confirmar) y la repite desde cero si el
+  commit falla porque otro request cambió la versión del vehículo mientras tanto, o si
+  MySQL la canceló por un deadlock o por esperar demasiado un bloqueo.
+
+  Al repetir se vuelve a leer el estado ya confirmado, así que una transición que dejó
+  de ser válida (p. ej. dos inicios de ruta simultáneos) termina en el 400 de siempre.
+  Si después de `retries` reintentos sigue habiendo conflicto se responde 409.
+  """
+  for _ in range(retries + 1):
+    try:
+      return await operation()
+    except StaleDataError:
+      await rollback()
+    except DBAPIError as e:
+      if not is_lock_conflict(e):
+        raise
+      await rollback()
+  raise HTTPException(status_code=409, detail="Vehicle was modified concurrently, retry the request")
@@ -0,0 +1,33 @@
+from typing import Iterable, TypeVar
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+T = TypeVar("T")
+
+
+async def commit_changes(db: AsyncSession, instance: T, relationships: Iterable[str] = ()) -> T:
+  """
+  Confirma los cambios de una instancia ya cargada en la sesión.
+
+  El flush emite un solo `UPDATE ... WHERE pk` con las columnas que cambiaron (ninguno si
+  no cambió nada) y, como la sesión no expira al confirmar, la respuesta se arma con los
+  valores en memoria en vez de volver a leer la fila. De `relationships` (many-to-one ya
+  cargadas) solo se recarga la que cambió de llave foránea, con un get por PK que usa el
+  identity map cuando el objeto ya está en la sesión.
+  """
+  state = inspect(instance)
+  stale = []
+  for name in relationships:
+    relationship = state.mapper.relationships[name]
+    keys = [state.mapper.get_property_by_column(column).key for column in relationship.local_columns]
+    if any(state.attrs[key].history.has_changes() for key in keys):
+      stale.append((name, relationship.mapper.class_, keys))
+
+  await db.commit()
+
+  for name, related_class, keys in stale:
+    identity = tuple(getattr(instance, key) for key in keys)
+    related = await db.get(related_class, identity) if None not in identity else None
+    set_committed_value(instance, name, related)
+  return instance
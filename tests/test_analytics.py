@@ -0,0 +1,65 @@
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+
+from app.database import engine
+
+
+def vehicle_km(client, vehicle_id: int, **params) -> int:
+    kpis = client.get("/analytics/kpis", params={"group_by": "vehicle", "id_vehicle_fk": vehicle_id, **params}).json()
+    return sum(kpi["km"] for kpi in kpis)
+
+
+def driver_km(client, user_id: int, **params) -> int:
+    kpis = client.get("/analytics/kpis", params={"group_by": "driver", **params}).json()
+    return sum(kpi["km"] for kpi in kpis if kpi["group"] == str(user_id))
+
+
+def test_kpis_follow_route_edits_and_deletes(client, catalog, create_vehicle, finished_route):
+    vehicle_id = create_vehicle()
+    route_id = finished_route(vehicle_id, end_km=100)
+    assert vehicle_km(client, vehicle_id) == 100
+
+    before = driver_km(client, catalog["id_user"])
+    route = client.get(f"/routes/{route_id}").json()
+    response = client.put(f"/routes/{route_id}", json={**route, "end_km": 500})
+    assert response.status_code == 200, response.text
+
+    # Con o sin rango de fechas la respuesta sale de los mismos datos
+    assert vehicle_km(client, vehicle_id) == 500
+    assert vehicle_km(client, vehicle_id, from_date="2023-01-01") == 500
+    assert driver_km(client, catalog["id_user"]) == before + 400
+    assert driver_km(client, catalog["id_user"], from_date="2000-01-01") == driver_km(client, catalog["id_user"])
+
+    assert client.delete(f"/routes/{route_id}").status_code == 204
+    assert vehicle_km(client, vehicle_id) == 0
+    assert driver_km(client, catalog["id_user"]) == before - 100
+
+
+def test_routes_finished_before_enrichment_status_count_as_evaluated(client, create_vehicle, finished_route, load_migration):
+    vehicle_id = create_vehicle()
+    route_id = finished_route(vehicle_id)
+    # Ruta finalizada antes de 0002: on_time/on_distance calculados, sin enrichment_status
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE Route SET enrichment_status = NULL, on_time = 1 WHERE id_route = :id"), {"id": route_id})
+    kpi = client.get("/analytics/kpis", params={"group_by": "vehicle", "id_vehicle_fk": vehicle_id}).json()[0]
+    assert kpi["routes_evaluated"] == 0
+    assert kpi["on_time_rate"] is None
+
+    migration = load_migration("0011_backfill_route_enrichment_status")
+    with engine.begin() as connection, Operations.context(MigrationContext.configure(connection)):
+        migration.upgrade()
+
+    kpi = client.get("/analytics/kpis", params={"group_by": "vehicle", "id_vehicle_fk": vehicle_id}).json()[0]
+    assert kpi["routes_evaluated"] == 1
+    assert kpi["on_time_rate"] == 1.0
+
+
+def test_week_buckets_are_iso_weeks(client, create_vehicle, finished_route):
+    vehicle_id = create_vehicle()
+    finished_route(vehicle_id)
+    # Las rutas de prueba terminan el domingo 2023-01-01: semana ISO 52 de 2022 (no 2023-W00)
+    kpis = client.get("/analytics/kpis", params={
+        "group_by": "week", "id_vehicle_fk": vehicle_id, "from_date": "2023-01-01", "to_date": "2023-01-01"
+    }).json()
+    assert [kpi["group"] for kpi in kpis] == ["2022-W52"]
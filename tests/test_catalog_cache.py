@@ -0,0 +1,108 @@
+import threading
+import uuid
+
+import pytest
+
+from app.utils.catalogCacheUtil import CatalogCache, SQLiteCacheBackend, etag_matches
+
+ETAG = '"3f2a"'
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"3f2a"', True),
+    ('W/"3f2a"', True),
+    ('"0000", W/"3f2a"', True),
+    ('*', True),
+    ('', False),
+    ('"3f2"', False),
+    ('"3f2a0"', False),
+    ('"x3f2a"', False),
+    ('"0000" , "1111"', False),
+])
+def test_if_none_match_is_parsed_as_entity_tags(header, matches):
+    assert etag_matches(header, ETAG) is matches
+
+
+def test_roles_list_answers_304_for_a_matching_tag(client):
+    first = client.get("/roles/")
+    assert first.status_code == 200, first.text
+    etag = first.headers["ETag"]
+
+    for header in (etag, f'"other", W/{etag}', "*"):
+        assert client.get("/roles/", headers={"If-None-Match": header}).status_code == 304
+    # Un prefijo de la etiqueta ya no cuenta como coincidencia
+    assert client.get("/roles/", headers={"If-None-Match": etag[:-3] + '"'}).status_code == 200
+
+
+def test_sqlite_backend_runs_off_the_event_loop(client, tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "versions.db"))
+    threads = []
+    for method in ("version", "bump"):
+        original = getattr(backend, method)
+
+        def record(*args, original=original):
+            threads.append(threading.get_ident())
+            return original(*args)
+        setattr(backend, method, record)
+    cache = CatalogCache(backend, ttl=60)
+
+    async def load_and_invalidate():
+        async def loader():
+            return [{"id_role": 1}]
+        await cache._get_or_load("roles", "", loader)
+        await cache.invalidate("roles")
+        return threading.get_ident()
+
+    loop_thread = client.portal.call(load_and_invalidate)
+
+    assert len(threads) == 2 and loop_thread not in threads
+    assert backend.version("roles") == 1
+
+
+def add_catalog_entries(client, brands: int) -> list:
+    """Marcas nuevas con dos modelos de dos descripciones cada uno; devuelve los modelos."""
+    models = []
+    for _ in range(brands):
+        brand = client.post("/brands/", json={"name": f"Brand {uuid.uuid4().hex[:8]}"}).json()
+        for _ in range(2):
+            model = client.post("/models/", json={"name": f"Model {uuid.uuid4().hex[:8]}", "id_brand_fk": brand["id_brand"]}).json()
+            descriptions = [
+                client.post("/descriptions/", json={"name": f"Description {uuid.uuid4().hex[:8]}", "id_model_fk": model["id_model"]}).json()
+                for _ in range(2)
+            ]
+            models.append({**model, "descriptions": descriptions})
+    return models
+
+
+def catalog_selects(client, count_queries, headers=None) -> tuple:
+    with count_queries() as queries:
+        response = client.get("/brands/catalog", headers=headers or {})
+    assert response.status_code in (200, 304), response.text
+    return response, [statement for statement in queries.statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+def find_model(catalog: list, model_id: int) -> dict:
+    return next(model for brand in catalog for model in brand["models"] if model["id_model"] == model_id)
+
+
+def test_catalog_tree_is_three_selects_at_any_size(client, count_queries):
+    add_catalog_entries(client, 1)
+    _, small = catalog_selects(client, count_queries)
+    models = add_catalog_entries(client, 5)
+    response, large = catalog_selects(client, count_queries)
+    # Marcas, modelos y descripciones: una consulta por nivel con la caché fría
+    assert len(small) == len(large) == 3, large
+
+    not_modified, cached = catalog_selects(client, count_queries, {"If-None-Match": response.headers["ETag"]})
+    assert not_modified.status_code == 304 and cached == []
+
+    model, description = models[0], models[0]["descriptions"][0]
+    renamed = client.put(f"/models/{model['id_model']}", json={"name": "Renamed model", "id_brand_fk": model["id_brand_fk"]})
+    assert renamed.status_code == 200, renamed.text
+    assert client.delete(f"/descriptions/{description['id_description']}").status_code == 204
+
+    response, selects = catalog_selects(client, count_queries, {"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 200 and len(selects) == 3
+    tree_model = find_model(response.json(), model["id_model"])
+    assert tree_model["name"] == "Renamed model"
+    assert description["id_description"] not in [d["id_description"] for d in tree_model["descriptions"]]
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+import app.utils.iaUtil as iaUtil
+from app.database import readonly_engine
+from app.utils.iaUtil import manejar_pregunta, ejecutar_sql
+from app.routers.chatBotRoutes import chat_bot_stream
+
+
+def test_limiter_caps_concurrent_ollama_calls(client, ollama):
+    ollama.delay = 0.05
+    limit = iaUtil.chat_limiter.max_concurrency
+
+    async def ask_all():
+        # Preguntas distintas: ninguna se resuelve desde la caché
+        return await asyncio.gather(*(manejar_pregunta(f"pregunta {n}") for n in range(limit * 4)))
+
+    answers = client.portal.call(ask_all)
+
+    assert all(not answer.startswith("Error") for answer in answers), answers
+    assert len(ollama.calls) == limit * 4 * 2  # SQL y respuesta por pregunta
+    assert ollama.max_in_flight == limit
+    assert iaUtil.chat_limiter.active == 0 and iaUtil.chat_limiter.waiting == 0
+
+
+def test_readonly_engine_rejects_writes(client):
+    async def write():
+        async with readonly_engine.connect() as connection:
+            await connection.execute(text("INSERT INTO Role (name) VALUES ('chat-bot')"))
+
+    with pytest.raises(SQLAlchemyError, match="readonly|read-only|READ ONLY"):
+        client.portal.call(write)
+
+
+def test_generated_sql_must_be_a_select(client):
+    async def run(sql):
+        return await ejecutar_sql(sql)
+
+    with pytest.raises(ValueError):
+        client.portal.call(run, "UPDATE Vehicle SET km = 0")
+    assert client.portal.call(run, "SELECT 1 AS uno") == "uno: 1"
+
+
+def test_stream_sends_events_before_the_answer_is_generated(client, ollama):
+    ollama.answer = ["Hay ", "tres ", "vehículos ", "registrados."]
+    ollama.token_delay = 0.1
+
+    async def read_stream():
+        # Se recorre el cuerpo de la StreamingResponse en el loop de la app: TestClient
+        # junta la respuesta completa antes de devolverla
+        response = await chat_bot_stream("¿Cuántos vehículos hay?")
+        received = []
+        async for chunk in response.body_iterator:
+            received.append((time.monotonic(), chunk))
+        return response, received
+
+    response, received = client.portal.call(read_stream)
+
+    assert response.media_type == "text/event-stream"
+    events = [chunk.split("\n")[0] for _, chunk in received]
+    assert events[0] == "event: progress"
+    assert events[-1] == "event: done"
+    first_data = received[0][0]
+    first_token = next(at for at, chunk in received if chunk.startswith("event: token"))
+    # El primer evento y el primer token llegan antes de que Ollama termine de generar
+    assert first_data < ollama.finished_at
+    assert first_token < ollama.finished_at - ollama.token_delay
+    assert events.count("event: token") == len(ollama.answer)
+
+
+def test_repeated_question_is_answered_from_the_caches(client, ollama):
+    first = client.post("/chat-bot", params={"message": "¿Cuántos vehículos hay?"}).json()
+    calls = len(ollama.calls)
+    # Misma pregunta normalizada: ni SQL, ni consulta, ni respuesta nuevas
+    again = client.post("/chat-bot", params={"message": "cuantos vehiculos hay"}).json()
+
+    assert again == first
+    assert len(ollama.calls) == calls == 2
+    assert iaUtil.sql_cache.hits >= 1 and iaUtil.answer_cache.hits >= 1
+
+
+def test_writes_invalidate_cached_results(client, ollama, create_vehicle):
+    client.post("/chat-bot", params={"message": "¿Cuántos vehículos hay?"})
+    results = iaUtil.result_cache.stats()
+
+    # Un commit en Vehicle cambia el sello: se vuelve a consultar la BD con el mismo SQL
+    create_vehicle()
+    client.post("/chat-bot", params={"message": "¿Cuántos vehículos hay?"})
+
+    assert iaUtil.result_cache.stats()["misses"] == results["misses"] + 1
+    assert iaUtil.result_cache.stats()["size"] == results["size"] + 1
+    generated = [call for call in ollama.calls if not call["stream"]]
+    assert len(generated) == 1  # el SQL sí sale de la caché
+    # El conteo cambió, así que la respuesta se redacta de nuevo
+    assert len(ollama.calls) == 3
@@ -0,0 +1,50 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import async_engine
+from app.utils.poolMetricsUtil import pool_metrics, TimedQueuePool
+
+
+def test_pool_metrics_under_concurrent_requests(client, create_vehicle):
+    create_vehicle()
+    before = client.get("/metrics/db-pool").json()
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        codes = list(pool.map(lambda _: client.get("/vehicles/").status_code, range(200)))
+    assert set(codes) == {200}
+
+    after = client.get("/metrics/db-pool").json()
+    assert after["checkouts"] - before["checkouts"] >= 200
+    assert after["wait_time"]["count"] - before["wait_time"]["count"] >= 200
+    assert after["wait_time"]["timeouts"] == before["wait_time"]["timeouts"]
+    # Todas las conexiones se devolvieron y el pool nunca pasó de su límite
+    assert after["checked_out"] <= 1
+    assert after["checkouts"] - after["checkins"] == after["checked_out"]
+    assert after["connection_age"]["open_connections"] <= after["config"]["pool_size"] + after["config"]["max_overflow"]
+
+
+@pytest.mark.skipif(async_engine.dialect.name != "sqlite", reason="engine de prueba sobre el mismo SQLite")
+def test_pool_timeout_is_counted():
+    url = async_engine.url
+
+    async def exhaust_pool():
+        engine = create_async_engine(url, poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2)
+        try:
+            async with engine.connect() as held:
+                await held.execute(text("SELECT 1"))
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+        finally:
+            await engine.dispose()
+
+    timeouts = pool_metrics.timeouts
+    asyncio.run(exhaust_pool())
+
+    assert pool_metrics.timeouts == timeouts + 1
+    assert pool_metrics.wait_last >= 0.2
+    assert pool_metrics.wait_max >= 0.2
@@ -0,0 +1,77 @@
+import httpx
+import pytest
+
+import app.utils.distanceUtil as distanceUtil
+from app.utils.distanceUtil import calculate_distance, haversine_estimate
+from app.schemas.routesSchema import RouteOut
+
+START = (21.0, -89.6)
+END = (21.2, -89.4)
+
+
+@pytest.fixture
+def ors(monkeypatch):
+    """OpenRouteService falso: cada prueba define cómo responde con `ors.handler`."""
+
+    class StubServer:
+        def __init__(self) -> None:
+            self.requests = []
+            self.handler = lambda request: httpx.Response(200, json={
+                "features": [{"properties": {"summary": {"distance": 30000, "duration": 1800}}}]
+            })
+
+        def __call__(self, request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return self.handler(request)
+
+    server = StubServer()
+    monkeypatch.setattr(distanceUtil, "_client", httpx.Client(transport=httpx.MockTransport(server)))
+    distanceUtil.distance_cache.clear()
+    yield server
+    distanceUtil.distance_cache.clear()
+
+
+def test_ors_result_is_cached(ors):
+    assert calculate_distance(*START, *END) == (30.0, 30.0)
+    # Coordenadas que redondean al mismo par: no vuelve a llamar a ORS
+    assert calculate_distance(START[0] + 0.0001, START[1], *END) == (30.0, 30.0)
+    assert len(ors.requests) == 1
+    assert ors.requests[0].url.params["start"] == f"{START[1]},{START[0]}"
+
+
+def test_timeout_falls_back_to_haversine(ors):
+    def timeout(request):
+        raise httpx.ReadTimeout("ORS too slow", request=request)
+
+    ors.handler = timeout
+    assert calculate_distance(*START, *END) == haversine_estimate(*START, *END)
+    # La estimación no se guarda: la siguiente llamada vuelve a intentar con ORS
+    calculate_distance(*START, *END)
+    assert len(ors.requests) == 2
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(500, text="Internal Server Error"),
+    httpx.Response(200, text="not json"),
+    httpx.Response(200, json={"features": []}),
+])
+def test_error_responses_fall_back_to_haversine(ors, response):
+    ors.handler = lambda request: response
+    assert calculate_distance(*START, *END) == haversine_estimate(*START, *END)
+    assert distanceUtil.distance_cache.stats()["size"] == 0
+
+
+def test_fallback_estimate_is_stored_as_whole_km(ors, client, create_vehicle, route_start_body, route_end_body):
+    ors.handler = lambda request: httpx.Response(503, text="Service Unavailable")
+    vehicle_id = create_vehicle()
+    route_id = client.post("/routes/start", json=route_start_body(vehicle_id)).json()["id_route"]
+    end = client.post("/routes/finish", json=route_end_body(route_id, vehicle_id))
+    assert end.status_code == 201, end.text
+
+    # La estimación de haversine es un float; estimated_km es una columna entera
+    distance_km, _ = haversine_estimate(21.0, -89.6, 21.2, -89.4)
+    assert distance_km != round(distance_km)
+    response = client.get(f"/routes/{route_id}")
+    assert response.status_code == 200, response.text
+    route = RouteOut.model_validate(response.json())
+    assert route.estimated_km == round(distance_km)
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+from typing import Optional
+
+import pydantic_core
+from pydantic import BaseModel
+
+from app.database import AsyncSessionLocal
+from app.repositories.routeRepository import RouteRepository
+from app.repositories.fuelStopRepository import FuelStopRepository
+from app.repositories.vehicleRepository import VehicleRepository
+from app.schemas.routesSchema import RouteOut
+from app.schemas.fuelStopSchema import FuelStopOut
+from app.schemas.vehiclesSchema import VehicleOut
+from app.services.routeService import route_out
+from app.services.fuelStopService import fuel_stop_out
+from app.services.vehicleService import vehicle_out
+from app.utils.dtoUtil import OutMapper, json_response
+
+
+class OneField(BaseModel):
+    name: str
+
+
+class RenamedField(BaseModel):
+    total: Optional[float] = None
+
+
+def test_single_field_schemas():
+    assert OutMapper(OneField).row(SimpleNamespace(name="abc")) == {"name": "abc"}
+    assert OutMapper(OneField).from_row(SimpleNamespace(_mapping={"name": "abc"})) == {"name": "abc"}
+    mapper = OutMapper(RenamedField, renames={"total": "Total"}, converters={"total": float})
+    assert mapper.row(SimpleNamespace(Total=7)) == {"total": 7.0}
+    assert mapper.row(SimpleNamespace(Total=None)) == {"total": None}
+
+
+def body(rows) -> bytes:
+    return json_response(rows).body
+
+
+def test_mapped_bodies_match_pydantic_serialization(client, create_vehicle, finished_route):
+    vehicle_id = create_vehicle()
+    finished_route(vehicle_id, fuel_stops=2)
+    finished_route(vehicle_id)
+
+    async def load():
+        async with AsyncSessionLocal() as db:
+            routes = await RouteRepository(db).get_all_routes(id_vehicle_fk=vehicle_id)
+            fuel_stops = await FuelStopRepository(db).get_all_fuel_stops(id_vehicle_fk=vehicle_id)
+            entity = await RouteRepository(db).get_route_by_id(routes[0].id_route)
+            vehicles = await VehicleRepository(db).get_all_vehicles()
+            # Los campos calculados de VehicleOut no son atributos de Vehicle: se agregan a mano
+            expected_vehicles = [
+                {
+                    **VehicleOut.model_validate(vehicle, from_attributes=True).model_dump(mode="json"),
+                    "name_model": vehicle.model.name if vehicle.model else None,
+                    "name_description": vehicle.description.name if vehicle.description else None,
+                    "name_brand": vehicle.brand.name if vehicle.brand else None,
+                }
+                for vehicle in vehicles
+            ]
+            return routes, fuel_stops, entity, vehicles, expected_vehicles
+
+    routes, fuel_stops, entity, vehicles, expected_vehicles = client.portal.call(load)
+    assert len(routes) == 2 and len(fuel_stops) == 2
+
+    assert body(route_out.from_rows(routes)) == body([
+        RouteOut.model_validate(route, from_attributes=True).model_dump(mode="json") for route in routes
+    ])
+    # Misma ruta leída como entidad (campos calculados de sus relaciones) y como fila proyectada
+    assert body(route_out.rows([entity])) == body(route_out.from_rows(routes[:1]))
+    # Coordenadas renombradas en la consulta y liters_added DECIMAL -> float (converter)
+    assert body(fuel_stop_out.from_rows(fuel_stops)) == body([
+        FuelStopOut.model_validate(fuel_stop, from_attributes=True).model_dump(mode="json") for fuel_stop in fuel_stops
+    ])
+    assert body(vehicle_out.rows(vehicles)) == body(expected_vehicles)
+    assert pydantic_core.from_json(body(fuel_stop_out.from_rows(fuel_stops)))[0]["liters_added"] == 20.0
@@ -0,0 +1,101 @@
+import csv
+from decimal import Decimal
+
+import pytest
+
+from app.models.routesModel import Route
+from app.models.fuelStopsModel import FuelStop
+from app.scripts.export_data import export_data
+
+pytestmark = pytest.mark.usefixtures("no_openrouteservice")
+
+JANUARY = ["--from-date", "2023-01-01", "--to-date", "2023-01-31"]
+
+
+@pytest.fixture
+def fleet(client, create_vehicle, route_start_body, route_end_body, fuel_stop_start_body, fuel_stop_finish_body):
+    """Dos rutas del vehículo exportado (enero y marzo) y una de otro vehículo, cada una con una parada."""
+    def finished_route_on(vehicle_id: int, day: str) -> tuple:
+        route = client.post("/routes/start", json={**route_start_body(vehicle_id), "start_time": f"{day}T08:00:00Z"})
+        assert route.status_code == 201, route.text
+        route_id = route.json()["id_route"]
+        fuel_stop = client.post("/fuel-stops/start-refueling", json={**fuel_stop_start_body(route_id), "stop_time": f"{day}T09:00:00Z"})
+        assert fuel_stop.status_code == 201, fuel_stop.text
+        fuel_stop_id = fuel_stop.json()["id_fuel_stop"]
+        finished = client.post("/fuel-stops/finish-refueling", json={
+            **fuel_stop_finish_body(fuel_stop_id, liters_added=12.5),
+            "resume_time": f"{day}T09:10:00Z", "start_time": f"{day}T09:12:00Z"
+        })
+        assert finished.status_code == 200, finished.text
+        end = client.post("/routes/finish", json={**route_end_body(route_id, vehicle_id), "end_time": f"{day}T10:00:00Z"})
+        assert end.status_code == 201, end.text
+        return route_id, fuel_stop_id
+
+    vehicle_id = create_vehicle()
+    january = finished_route_on(vehicle_id, "2023-01-15")
+    finished_route_on(vehicle_id, "2023-03-15")
+    finished_route_on(create_vehicle(), "2023-01-15")
+    return vehicle_id, january
+
+
+def read_csv(path) -> list:
+    with open(path, newline="", encoding="utf-8") as file:
+        return list(csv.reader(file))
+
+
+@pytest.mark.parametrize("table, model, key", [("routes", Route, 0), ("fuel_stops", FuelStop, 1)])
+def test_csv_export_round_trip(fleet, tmp_path, table, model, key):
+    vehicle_id, january = fleet
+    path = tmp_path / f"{table}.csv"
+
+    assert export_data([table, "-o", str(path), *JANUARY, "--vehicle", str(vehicle_id), "--chunk-size", "1"]) == 0
+
+    header, *rows = read_csv(path)
+    assert header == [column.name for column in model.__table__.c]
+    assert [int(row[0]) for row in rows] == [january[key]]
+    row = dict(zip(header, rows[0]))
+    if table == "routes":
+        assert row["enrichment_status"] == "DONE"  # el nombre guardado, como texto
+        assert row["start_time"] == "2023-01-15 08:00:00"
+        assert row["enrichment_claimed_at"] == ""  # NULL
+    else:
+        assert row["liters_added"] == "12.50"
+        assert int(row["id_route_fk"]) == january[0]
+
+
+def test_export_with_an_invalid_range_fails(tmp_path, capsys):
+    assert export_data(["routes", "-o", str(tmp_path / "x.csv"), "--from-date", "2023-02-01", "--to-date", "2023-01-01"]) == 2
+    assert "from_date must be before to_date" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_exports_keep_column_types(fleet, tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    vehicle_id, january = fleet
+
+    def read(table: str):
+        path = tmp_path / f"{table}.{fmt}"
+        assert export_data([table, "--format", fmt, "-o", str(path), *JANUARY, "--vehicle", str(vehicle_id)]) == 0
+        if fmt == "parquet":
+            return pyarrow.parquet.read_table(path)
+        with pa.OSFile(str(path), "rb") as source:
+            return pyarrow.ipc.open_file(source).read_all()
+
+    routes = read("routes")
+    assert routes.column_names == [column.name for column in Route.__table__.c]
+    assert routes.schema.field("id_route").type == pa.int64()
+    assert routes.schema.field("start_time").type == pa.timestamp("us")
+    assert routes.schema.field("latitude_start").type == pa.float64()
+    assert routes.schema.field("on_time").type == pa.bool_()
+    assert routes.schema.field("enrichment_status").type == pa.string()
+    assert routes.column("id_route").to_pylist() == [january[0]]
+    assert routes.column("enrichment_status").to_pylist() == ["DONE"]
+
+    fuel_stops = read("fuel_stops")
+    assert fuel_stops.schema.field("liters_added").type == pa.decimal128(5, 2)
+    assert fuel_stops.schema.field("stop_time").type == pa.timestamp("us")
+    assert fuel_stops.column("id_fuel_stop").to_pylist() == [january[1]]
+    assert fuel_stops.column("liters_added").to_pylist() == [Decimal("12.50")]
@@ -0,0 +1,77 @@
+from sqlalchemy import select
+
+from app.database import engine
+from app.models.fleetStatsModel import VehicleDailyStats, DriverStats
+
+
+def vehicle_stats(vehicle_id: int) -> dict:
+    """Suma de VehicleDailyStats del vehículo (todas sus filas por día)."""
+    with engine.connect() as connection:
+        rows = connection.execute(select(VehicleDailyStats).where(VehicleDailyStats.id_vehicle_fk == vehicle_id)).mappings().all()
+    columns = ("routes_completed", "km", "liters_added", "routes_evaluated", "on_time_routes")
+    return {column: sum(row[column] for row in rows) for column in columns}
+
+
+def last_route_at(user_id: int):
+    with engine.connect() as connection:
+        return connection.execute(select(DriverStats.last_route_at).where(DriverStats.id_user_fk == user_id)).scalar()
+
+
+def test_summaries_follow_route_edits_and_deletes(client, create_vehicle, finished_route):
+    vehicle_id = create_vehicle()
+    route_id = finished_route(vehicle_id, end_km=100)
+    assert vehicle_stats(vehicle_id) == {"routes_completed": 1, "km": 100, "liters_added": 0, "routes_evaluated": 1, "on_time_routes": 1}
+
+    route = client.get(f"/routes/{route_id}").json()
+    response = client.put(f"/routes/{route_id}", json={**route, "end_km": 250, "on_time": False})
+    assert response.status_code == 200, response.text
+    assert vehicle_stats(vehicle_id) == {"routes_completed": 1, "km": 250, "liters_added": 0, "routes_evaluated": 1, "on_time_routes": 0}
+
+    assert client.delete(f"/routes/{route_id}").status_code == 204
+    assert vehicle_stats(vehicle_id) == {"routes_completed": 0, "km": 0, "liters_added": 0, "routes_evaluated": 0, "on_time_routes": 0}
+
+
+def test_summaries_follow_fuel_stop_edits_and_deletes(client, create_vehicle, route_start_body, fuel_stop_start_body, fuel_stop_finish_body):
+    vehicle_id = create_vehicle()
+    route_id = client.post("/routes/start", json=route_start_body(vehicle_id)).json()["id_route"]
+    fuel_stop_id = client.post("/fuel-stops/start-refueling", json=fuel_stop_start_body(route_id)).json()["id_fuel_stop"]
+    client.post("/fuel-stops/finish-refueling", json=fuel_stop_finish_body(fuel_stop_id, liters_added=20))
+    assert vehicle_stats(vehicle_id)["liters_added"] == 20
+
+    fuel_stop = client.get(f"/fuel-stops/{fuel_stop_id}").json()
+    response = client.put(f"/fuel-stops/{fuel_stop_id}", json={**fuel_stop, "liters_added": 35})
+    assert response.status_code == 200, response.text
+    assert vehicle_stats(vehicle_id)["liters_added"] == 35
+
+    assert client.delete(f"/fuel-stops/{fuel_stop_id}").status_code == 204
+    assert vehicle_stats(vehicle_id)["liters_added"] == 0
+
+
+def test_finishing_a_route_twice_is_rejected(client, create_vehicle, route_start_body, route_end_body, finished_route):
+    vehicle_id = create_vehicle()
+    route_id = finished_route(vehicle_id)
+    # El vehículo vuelve a estar en ruta, pero la primera ruta ya está cerrada
+    assert client.post("/routes/start", json=route_start_body(vehicle_id)).status_code == 201
+
+    response = client.post("/routes/finish", json=route_end_body(route_id, vehicle_id, end_km=300))
+    assert response.status_code == 400, response.text
+    assert vehicle_stats(vehicle_id)["routes_completed"] == 1
+    assert vehicle_stats(vehicle_id)["km"] == 100
+
+
+def test_last_route_at_never_moves_backwards(client, catalog, create_vehicle, finished_route):
+    vehicle_id = create_vehicle()
+    finished_route(vehicle_id)
+    latest = last_route_at(catalog["id_user"])
+
+    # Una ruta más antigua (p. ej. sincronizada sin conexión) no retrocede la fecha
+    response = client.post("/routes/", json={
+        "id_vehicle_fk": vehicle_id, "id_user_fk": catalog["id_user"], "description": "offline",
+        "latitude_start": 21.0, "longitude_start": -89.6, "latitude_end": 21.2, "longitude_end": -89.4,
+        "start_time": "2020-01-01T08:00:00Z", "end_time": "2020-01-01T10:00:00Z",
+        "estimated_time": 2, "total_duration": 2, "on_time": 1, "start_km": 0, "end_km": 10,
+        "estimated_km": 10, "image_start_km": "start.jpg", "image_end_km": "end.jpg",
+        "on_distance": 1, "liters_consumed": 1
+    })
+    assert response.status_code == 201, response.text
+    assert last_route_at(catalog["id_user"]) == latest
@@ -0,0 +1,140 @@
+import math
+
+import pytest
+
+from app.utils.geoUtil import bounding_box, haversine_km
+
+pytestmark = pytest.mark.usefixtures("no_openrouteservice")
+
+
+def circle(lat: float, lon: float, radius_km: float, steps: int = 360):
+    """Puntos (lat, lon) a radius_km de (lat, lon), cada grado de rumbo."""
+    angular = radius_km / 6371.0
+    phi, lam = math.radians(lat), math.radians(lon)
+    for step in range(steps):
+        bearing = math.radians(step * 360 / steps)
+        phi2 = math.asin(math.sin(phi) * math.cos(angular) + math.cos(phi) * math.sin(angular) * math.cos(bearing))
+        lam2 = lam + math.atan2(math.sin(bearing) * math.sin(angular) * math.cos(phi),
+                                math.cos(angular) - math.sin(phi) * math.sin(phi2))
+        yield math.degrees(phi2), (math.degrees(lam2) + 540) % 360 - 180
+
+
+@pytest.mark.parametrize("lat, lon, radius_km", [
+    (0.0, 0.0, 100), (21.0, -89.6, 50), (60.0, 10.0, 300), (80.0, -45.0, 400), (-75.0, 120.0, 250),
+])
+def test_bounding_box_contains_the_whole_circle(lat, lon, radius_km):
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    # Margen mínimo para el redondeo de coma flotante
+    for point_lat, point_lon in circle(lat, lon, radius_km * 0.999999):
+        assert min_lat <= point_lat <= max_lat
+        assert min_lon <= point_lon <= max_lon
+
+
+def test_bounding_box_around_a_pole_spans_every_longitude():
+    assert bounding_box(89.9, 0.0, 30) == (pytest.approx(89.9 - math.degrees(30 / 6371.0)), 90.0, -180.0, 180.0)
+    assert bounding_box(-89.9, 0.0, 30)[:2] == (-90.0, pytest.approx(-89.9 + math.degrees(30 / 6371.0)))
+
+
+def test_bounding_box_across_the_antimeridian_spans_every_longitude():
+    min_lat, max_lat, min_lon, max_lon = bounding_box(10.0, 179.95, 20)
+    assert (min_lon, max_lon) == (-180.0, 180.0)
+    assert min_lat < 10.0 < max_lat
+    # Sin cruzarlo, la caja sigue siendo estrecha
+    assert bounding_box(10.0, 179.0, 20)[2:] == (pytest.approx(179.0 - 0.1826, abs=1e-3), pytest.approx(179.0 + 0.1826, abs=1e-3))
+
+
+@pytest.fixture
+def route_at(client, create_vehicle, route_start_body, route_end_body):
+    def _route_at(start: tuple, end: tuple = None) -> int:
+        vehicle_id = create_vehicle()
+        route = client.post("/routes/start", json={
+            **route_start_body(vehicle_id), "latitude_start": start[0], "longitude_start": start[1]
+        })
+        assert route.status_code == 201, route.text
+        route_id = route.json()["id_route"]
+        if end is not None:
+            finished = client.post("/routes/finish", json={
+                **route_end_body(route_id, vehicle_id), "latitude_end": end[0], "longitude_end": end[1]
+            })
+            assert finished.status_code == 201, finished.text
+        return route_id
+    return _route_at
+
+
+@pytest.fixture
+def fuel_stop_at(client, create_vehicle, route_start_body, fuel_stop_start_body):
+    def _fuel_stop_at(lat: float, lon: float) -> int:
+        route_id = client.post("/routes/start", json=route_start_body(create_vehicle())).json()["id_route"]
+        fuel_stop = client.post("/fuel-stops/start-refueling", json={
+            **fuel_stop_start_body(route_id), "latitude_stop": lat, "longitude_stop": lon
+        })
+        assert fuel_stop.status_code == 201, fuel_stop.text
+        return fuel_stop.json()["id_fuel_stop"]
+    return _fuel_stop_at
+
+
+def get(client, path: str, **params) -> list:
+    response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_routes_within_box(client, route_at):
+    # Zona propia (40, 3) para no mezclarse con las rutas de otros tests
+    inside = route_at((40.10, 3.10), end=(45.0, 8.0))
+    edge = route_at((40.20, 3.20))
+    outside = route_at((40.30, 3.10))
+    ends_inside = route_at((45.0, 8.0), end=(40.15, 3.15))
+
+    box = {"min_latitude": 40.0, "max_latitude": 40.2, "min_longitude": 3.0, "max_longitude": 3.2}
+    assert [route["id_route"] for route in get(client, "/routes/within", **box)] == [inside, edge]
+    assert [route["id_route"] for route in get(client, "/routes/within", **box, point="end")] == [ends_inside]
+    assert outside not in [route["id_route"] for route in get(client, "/routes/within", **box, point="end")]
+    assert len(get(client, "/routes/within", **box, limit=1)) == 1
+
+
+def test_inverted_box_is_rejected(client):
+    response = client.get("/routes/within", params={"min_latitude": 1.0, "max_latitude": 0.0, "min_longitude": 0.0, "max_longitude": 1.0})
+    assert response.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [["query"]]
+
+
+def test_routes_nearby_filters_by_radius_and_orders_by_distance(client, route_at):
+    center = (-33.0, 151.0)
+    far = route_at((-33.0, 151.08))      # ~7.5 km
+    near = route_at((-33.01, 151.0))     # ~1.1 km
+    corner = route_at((-32.93, 151.08))  # dentro de la caja de 10 km, fuera del radio (~10.6 km)
+    ends_near = route_at((-20.0, 140.0), end=(-33.0, 151.02))
+
+    rows = get(client, "/routes/nearby", latitude=center[0], longitude=center[1], radius_km=10)
+    assert [route["id_route"] for route in rows] == [near, far]
+    assert rows[0]["distance_km"] == round(haversine_km(*center, -33.01, 151.0), 3)
+    assert corner not in [route["id_route"] for route in rows]
+
+    ends = get(client, "/routes/nearby", latitude=center[0], longitude=center[1], radius_km=10, point="end")
+    assert [route["id_route"] for route in ends] == [ends_near]
+
+
+def test_fuel_stops_within_and_nearby(client, fuel_stop_at):
+    near = fuel_stop_at(52.01, 4.0)
+    far = fuel_stop_at(52.05, 4.0)
+    outside = fuel_stop_at(52.5, 4.0)
+
+    box = {"min_latitude": 52.0, "max_latitude": 52.1, "min_longitude": 3.9, "max_longitude": 4.1}
+    assert [stop["id_fuel_stop"] for stop in get(client, "/fuel-stops/within", **box)] == [near, far]
+
+    rows = get(client, "/fuel-stops/nearby", latitude=52.0, longitude=4.0, radius_km=20)
+    assert [stop["id_fuel_stop"] for stop in rows] == [near, far]
+    assert [stop["distance_km"] for stop in rows] == sorted(stop["distance_km"] for stop in rows)
+    assert outside not in [stop["id_fuel_stop"] for stop in rows]
+
+
+@pytest.mark.parametrize("stop, query, radius_km", [
+    ((10.0, 179.95), (10.0, -179.95), 20),  # antimeridiano: ~11 km por el otro lado
+    ((89.9, 0.0), (89.9, 180.0), 30),       # polo norte: ~22 km pasando por el polo
+])
+def test_fuel_stops_nearby_across_the_antimeridian_and_poles(client, fuel_stop_at, stop, query, radius_km):
+    fuel_stop_id = fuel_stop_at(*stop)
+
+    rows = get(client, "/fuel-stops/nearby", latitude=query[0], longitude=query[1], radius_km=radius_km)
+    assert fuel_stop_id in [row["id_fuel_stop"] for row in rows]
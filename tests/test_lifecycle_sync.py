@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import select
+
+import app.services.lifecycleSyncService as lifecycleSyncService
+from app.database import engine
+from app.models.fleetStatsModel import VehicleDailyStats, DriverStats
+
+pytestmark = pytest.mark.usefixtures("no_openrouteservice")
+
+SUMMARY_COLUMNS = ("routes_completed", "km", "liters_consumed", "liters_added", "total_duration")
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    """Rutas que el lote manda al worker de enriquecimiento (sin procesarlas)."""
+    route_ids = []
+    monkeypatch.setattr(lifecycleSyncService.route_enrichment_worker, "enqueue", route_ids.append)
+    return route_ids
+
+
+@pytest.fixture
+def lifecycle_events(route_start_body, route_end_body, fuel_stop_start_body, fuel_stop_finish_body):
+    """Los cuerpos de /routes/start, /fuel-stops/*-refueling y /routes/finish como eventos de /routes/sync."""
+    def _lifecycle_events(vehicle_id: int, user_id: int, ref: str = "r1") -> list:
+        refuel_start = {**fuel_stop_start_body(0), "event": "refuel_start", "ref": f"{ref}-f", "route_ref": ref}
+        del refuel_start["id_route_fk"]
+        refuel_finish = {**fuel_stop_finish_body(0, liters_added=30), "event": "refuel_finish", "fuel_stop_ref": f"{ref}-f"}
+        del refuel_finish["id_fuel_stop"]
+        route_end = {**route_end_body(0, vehicle_id, end_km=180), "event": "route_end", "route_ref": ref, "id_user_fk": user_id}
+        del route_end["id_route"]
+        return [
+            {**route_start_body(vehicle_id), "event": "route_start", "ref": ref, "id_user_fk": user_id},
+            refuel_start, refuel_finish, route_end,
+        ]
+    return _lifecycle_events
+
+
+def summaries(vehicle_id: int, user_id: int) -> tuple:
+    with engine.connect() as connection:
+        daily = connection.execute(select(VehicleDailyStats).where(VehicleDailyStats.id_vehicle_fk == vehicle_id)).mappings().all()
+        driver = connection.execute(select(DriverStats).where(DriverStats.id_user_fk == user_id)).mappings().one()
+    return (
+        [{"day": row["day"], **{column: row[column] for column in SUMMARY_COLUMNS}} for row in daily],
+        {column: driver[column] for column in (*SUMMARY_COLUMNS, "last_route_at")},
+    )
+
+
+def test_sync_matches_the_per_event_endpoints(client, create_vehicle, create_user, lifecycle_events, enqueued):
+    synced_vehicle, synced_driver = create_vehicle(), create_user()
+    response = client.post("/routes/sync", json={"events": lifecycle_events(synced_vehicle, synced_driver)})
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [result["vehicle_status"] for result in results] == ["On Route", "Refueling", "On Route", "Off Route"]
+    route_id = results[0]["id_route"]
+    assert {result["id_route"] for result in results} == {route_id}
+    assert results[1]["id_fuel_stop"] == results[2]["id_fuel_stop"] is not None
+
+    # El mismo recorrido con un request por evento
+    vehicle_id, driver = create_vehicle(), create_user()
+    start, refuel_start, refuel_finish, end = lifecycle_events(vehicle_id, driver)
+    route = client.post("/routes/start", json=start).json()["id_route"]
+    fuel_stop = client.post("/fuel-stops/start-refueling", json={**refuel_start, "id_route_fk": route}).json()["id_fuel_stop"]
+    assert client.post("/fuel-stops/finish-refueling", json={**refuel_finish, "id_fuel_stop": fuel_stop}).status_code == 200
+    assert client.post("/routes/finish", json={**end, "id_route": route}).status_code == 201
+
+    synced, expected = client.get(f"/vehicles/{synced_vehicle}").json(), client.get(f"/vehicles/{vehicle_id}").json()
+    # km es la última lectura de la recarga, igual que en el flujo por evento
+    assert (synced["route_status"], synced["km"]) == (expected["route_status"], expected["km"]) == ("Off Route", 50)
+    assert summaries(synced_vehicle, synced_driver) == summaries(vehicle_id, driver)
+    synced_route, expected_route = client.get(f"/routes/{route_id}").json(), client.get(f"/routes/{route}").json()
+    for field in ("start_km", "end_km", "end_time", "total_duration", "liters_consumed"):
+        assert synced_route[field] == expected_route[field], field
+
+
+def test_an_invalid_event_rejects_the_whole_batch(client, create_vehicle, create_user, lifecycle_events, enqueued):
+    vehicle_id, driver = create_vehicle(), create_user()
+    other_vehicle = create_vehicle()
+    start, refuel_start, refuel_finish, end = lifecycle_events(vehicle_id, driver)
+    # Terminar la ruta desde otro vehículo no es una transición válida
+    events = [start, refuel_start, refuel_finish, {**end, "id_vehicle_fk": other_vehicle}, end]
+
+    response = client.post("/routes/sync", json={"events": events})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Event 3: Vehicle does not match route"
+
+    assert client.get(f"/vehicles/{vehicle_id}/routes").json() == []
+    vehicle = client.get(f"/vehicles/{vehicle_id}").json()
+    assert (vehicle["route_status"], vehicle["km"]) == ("Off Route", 0)
+    with engine.connect() as connection:
+        assert connection.execute(select(VehicleDailyStats).where(VehicleDailyStats.id_vehicle_fk == vehicle_id)).all() == []
+        assert connection.execute(select(DriverStats).where(DriverStats.id_user_fk == driver)).all() == []
+    assert enqueued == []
+
+
+def test_an_unknown_route_ref_is_not_found(client, create_vehicle, create_user, lifecycle_events):
+    start, refuel_start, _, _ = lifecycle_events(create_vehicle(), create_user())
+    response = client.post("/routes/sync", json={"events": [start, {**refuel_start, "route_ref": "missing"}]})
+    assert response.status_code == 404, response.text
+    assert response.json()["detail"] == "Event 1: Route not found"
+
+
+def test_finished_routes_are_enqueued_as_pending(client, create_vehicle, create_user, lifecycle_events, enqueued):
+    first, second = create_vehicle(), create_vehicle()
+    driver = create_user()
+    events = lifecycle_events(first, driver, ref="a") + lifecycle_events(second, driver, ref="b")
+    response = client.post("/routes/sync", json={"events": events})
+    assert response.status_code == 200, response.text
+
+    route_ids = [result["id_route"] for result in response.json()["results"] if result["event"] == "route_end"]
+    assert enqueued == route_ids
+    for route_id in route_ids:
+        assert client.get(f"/routes/{route_id}/enrichment").json()["enrichment_status"] == "Pending"
+
+
+def test_a_repeated_ref_rejects_the_batch(client, create_vehicle, route_start_body, fuel_stop_start_body):
+    first, second = create_vehicle(), create_vehicle()
+    start = lambda vehicle_id: {**route_start_body(vehicle_id), "event": "route_start", "ref": "r1"}
+    response = client.post("/routes/sync", json={"events": [start(first), start(second)]})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Event 1: Duplicate ref"
+
+    refuel = {**fuel_stop_start_body(0), "event": "refuel_start", "ref": "f1"}
+    del refuel["id_route_fk"]
+    response = client.post("/routes/sync", json={"events": [
+        start(first), {**refuel, "route_ref": "r1"},
+        {**start(second), "ref": "r2"}, {**refuel, "route_ref": "r2"},
+    ]})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Event 3: Duplicate ref"
+    # Nada se guardó: los dos vehículos siguen sin ruta
+    assert client.get(f"/vehicles/{first}/routes").json() == []
+    assert client.get(f"/vehicles/{second}/routes").json() == []
@@ -0,0 +1,39 @@
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import event, text
+
+from app.database import engine
+
+
+def test_coordinate_backfill_is_one_update_per_chunk(client, load_migration):
+    migration = load_migration("0004_numeric_coordinates")
+    columns = [("lat", None, True), ("lon", None, False)]
+    values = ["21.5", "", "abc", None, "-89.25"]
+    rows = len(values) * 500  # 2500 filas: 3 bloques de BACKFILL_CHUNK
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE CoordinateBackfill (id INTEGER PRIMARY KEY, lat VARCHAR(50), lon VARCHAR(50), lat_num FLOAT, lon_num FLOAT)"))
+        connection.execute(text("INSERT INTO CoordinateBackfill (id, lat, lon) VALUES (:id, :value, :value)"), [
+            {"id": id, "value": values[id % len(values)]} for id in range(1, rows + 1)
+        ])
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        with engine.begin() as connection, Operations.context(MigrationContext.configure(connection)):
+            event.listen(connection, "before_cursor_execute", before_cursor_execute)
+            migration._copy_columns("CoordinateBackfill", "id", columns, "", "_num", migration._parse)
+        with engine.connect() as connection:
+            copied = connection.execute(text("SELECT id, lat_num, lon_num FROM CoordinateBackfill ORDER BY id")).all()
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE CoordinateBackfill"))
+
+    updates = [statement for statement in statements if statement.startswith("UPDATE")]
+    assert len(updates) == 3
+    # Basura y vacíos: NULL si la columna lo permite, 0 si no
+    expected = {"21.5": (21.5, 21.5), "": (None, 0.0), "abc": (None, 0.0), None: (None, 0.0), "-89.25": (-89.25, -89.25)}
+    assert [(lat, lon) for _, lat, lon in copied] == [expected[values[id % len(values)]] for id, _, _ in copied]
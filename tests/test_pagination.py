@@ -0,0 +1,94 @@
+import pytest
+
+pytestmark = pytest.mark.usefixtures("no_openrouteservice")
+
+
+def read_all(client, path: str, key: str, **params) -> list:
+    """Recorre la lista página a página siguiendo X-Next-Cursor."""
+    rows, after = [], None
+    while True:
+        response = client.get(path, params={**params, **({"after": after} if after is not None else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= params["limit"]
+        rows.extend(page)
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            return rows
+        assert int(after) == page[-1][key]
+
+
+def test_routes_keyset_pages(client, create_vehicle, route_start_body, finished_route):
+    vehicle_id = create_vehicle()
+    finished = [finished_route(vehicle_id) for _ in range(4)]
+    started = client.post("/routes/start", json=route_start_body(vehicle_id)).json()["id_route"]
+
+    first = client.get("/routes/", params={"id_vehicle_fk": vehicle_id, "limit": 2})
+    assert [route["id_route"] for route in first.json()] == finished[:2]
+    assert first.headers["X-Next-Cursor"] == str(finished[1])
+
+    rows = read_all(client, "/routes/", "id_route", id_vehicle_fk=vehicle_id, limit=2)
+    assert [route["id_route"] for route in rows] == finished + [started]
+    # La última página completa no deja cursor
+    last = client.get("/routes/", params={"id_vehicle_fk": vehicle_id, "limit": 5})
+    assert len(last.json()) == 5 and "X-Next-Cursor" not in last.headers
+
+
+def test_route_filters(client, create_vehicle, route_start_body, finished_route):
+    vehicle_id = create_vehicle()
+    done = finished_route(vehicle_id)
+    running = client.post("/routes/start", json=route_start_body(vehicle_id)).json()["id_route"]
+
+    def ids(**params):
+        return [route["id_route"] for route in client.get("/routes/", params={"id_vehicle_fk": vehicle_id, **params}).json()]
+
+    assert ids() == [done, running]
+    assert ids(completed=True) == [done]
+    assert ids(completed=False) == [running]
+    # start_time de las rutas de prueba: 2023-01-01T08:00; start_to es exclusivo
+    assert ids(start_from="2023-01-01T08:00:00", start_to="2023-01-01T08:00:01") == [done, running]
+    assert ids(start_to="2023-01-01T08:00:00") == []
+    assert ids(start_from="2023-01-02T00:00:00") == []
+
+
+def test_routes_stream_honours_filters_and_cursor(client, create_vehicle, route_start_body, finished_route):
+    vehicle_id = create_vehicle()
+    finished = [finished_route(vehicle_id) for _ in range(3)]
+    client.post("/routes/start", json=route_start_body(vehicle_id))
+
+    response = client.get("/routes/", params={
+        "id_vehicle_fk": vehicle_id, "completed": True, "after": finished[0], "stream": "json"
+    })
+    assert response.status_code == 200, response.text
+    assert [route["id_route"] for route in response.json()] == finished[1:]
+
+
+def test_users_keyset_pages(client, create_user):
+    created = [create_user() for _ in range(3)]
+
+    rows = read_all(client, "/users/", "id_usuario", after=created[0] - 1, limit=2)
+    assert [user["id_usuario"] for user in rows][:3] == created
+
+
+def test_user_filters(client, create_vehicle, create_user, route_start_body, route_end_body):
+    driver = create_user()
+    vehicle_id = create_vehicle()
+    route = client.post("/routes/start", json={**route_start_body(vehicle_id), "id_user_fk": driver}).json()["id_route"]
+    end = client.post("/routes/finish", json={**route_end_body(route, vehicle_id), "id_user_fk": driver})
+    assert end.status_code == 201, end.text
+    idle = create_user()
+    assigned = create_user()
+    assigned_vehicle = create_vehicle()
+    assert client.put(f"/users/{assigned}", json={"id_vehicle_fk": assigned_vehicle}).status_code == 200
+
+    def ids(**params):
+        return {user["id_usuario"] for user in client.get("/users/", params=params).json()}
+
+    assert ids(id_vehicle_fk=assigned_vehicle) == {assigned}
+    assert assigned in ids(assigned=True) and idle not in ids(assigned=True)
+    assert idle in ids(assigned=False) and assigned not in ids(assigned=False)
+    # La ruta del conductor termina el 2023-01-01T10:00; route_to es exclusivo
+    in_range = ids(route_from="2023-01-01T00:00:00", route_to="2023-01-02T00:00:00")
+    assert driver in in_range and idle not in in_range
+    assert driver not in ids(route_from="2023-01-01T10:00:01")
+    assert driver not in ids(route_to="2023-01-01T10:00:00")
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.database import engine
+from app.models.routesModel import Route
+from app.models.MaintenanceModel import Maintenance
+from app.models.vehiclesModel import Vehicle
+from app.models.RouteEnrichmentStatus import RouteEnrichmentStatus
+from app.repositories.routeRepository import RouteRepository, select_route_rows
+from app.repositories.fuelStopRepository import FuelStopRepository, select_fuel_stop_rows
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="EXPLAIN QUERY PLAN es de SQLite")
+
+FROM = datetime(2023, 1, 1)
+TO = datetime(2023, 2, 1)
+
+
+def query_plan(stmt) -> str:
+    compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("stmt, index", [
+    # 0003: historial de rutas y paradas (filtros de las listas y reportes)
+    (RouteRepository(None)._filter_routes(select_route_rows(), id_vehicle_fk=1, start_from=FROM, start_to=TO),
+     "ix_Route_id_vehicle_fk_start_time"),
+    (select(Route.id_route).where(Route.start_time >= FROM, Route.start_time < TO), "ix_Route_start_time"),
+    (select(Route.id_route).where(Route.enrichment_status == RouteEnrichmentStatus.PENDING), "ix_Route_enrichment_status"),
+    (FuelStopRepository(None)._filter_fuel_stops(select_fuel_stop_rows(), id_route_fk=1, stop_from=FROM),
+     "ix_FuelStop_id_route_fk_stop_time"),
+    (select(Maintenance).where(Maintenance.id_vehicle_fk == 1).order_by(Maintenance.start_time),
+     "ix_Maintenance_id_vehicle_fk_start_time"),
+    (select(Vehicle).where(Vehicle.id_model_fk == 1), "ix_Vehicle_id_model_fk"),
+    # 0006 y 0010: rangos de end_time de /analytics, globales y por vehículo o conductor
+    (select(Route.id_route).where(Route.end_time >= FROM, Route.end_time < TO), "ix_Route_end_time"),
+    (select(Route.id_route).where(Route.id_vehicle_fk == 1, Route.end_time >= FROM, Route.end_time < TO),
+     "ix_Route_id_vehicle_fk_end_time"),
+    (select(Route.id_route).where(Route.id_user_fk == 1, Route.end_time >= FROM, Route.end_time < TO),
+     "ix_Route_id_user_fk_end_time"),
+    # 0004: prefiltro por caja de /routes/within|nearby y /fuel-stops/within|nearby
+    (RouteRepository(None)._in_box(select_route_rows(), 20.0, 21.0, -90.0, -89.0), "ix_Route_start_point"),
+    (RouteRepository(None)._in_box(select_route_rows(), 20.0, 21.0, -90.0, -89.0, point="end"), "ix_Route_end_point"),
+    (FuelStopRepository(None)._in_box(select_fuel_stop_rows(), 20.0, 21.0, -90.0, -89.0), "ix_FuelStop_stop_point"),
+])
+def test_hot_queries_use_their_index(client, stmt, index):
+    # `client` aplica las migraciones antes de consultar el plan
+    plan = query_plan(stmt)
+    assert f"INDEX {index}" in plan, plan
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.vehicleService import VehicleService
+
+
+def wait_for_report(client, vehicle_id: int, job_id: str, timeout: float = 10) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/vehicles/{vehicle_id}/reports/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Report {job_id} did not finish")
+
+
+def test_simultaneous_report_requests_generate_the_report_once(client, create_vehicle, finished_route, monkeypatch):
+    vehicle_id = create_vehicle()
+    finished_route(vehicle_id, fuel_stops=1)
+
+    generations = []
+    generate = VehicleService.generate_vehicle_excel_report_streaming
+
+    async def slow_generate(self, vehicle_id: int):
+        # Lo bastante lento para que las 50 peticiones lleguen con el trabajo en curso
+        generations.append(vehicle_id)
+        await asyncio.sleep(0.3)
+        return await generate(self, vehicle_id)
+
+    monkeypatch.setattr(VehicleService, "generate_vehicle_excel_report_streaming", slow_generate)
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        responses = list(pool.map(lambda _: client.post(f"/vehicles/{vehicle_id}/reports"), range(50)))
+
+    assert {response.status_code for response in responses} == {202}, [response.text for response in responses]
+    jobs = [response.json() for response in responses]
+    queued = {job["id_job"] for job in jobs if not job["cached"]}
+    # Un solo trabajo; las que llegaron después de terminar reutilizan el archivo
+    assert len(queued) == 1, queued
+
+    finished = wait_for_report(client, vehicle_id, queued.pop())
+    assert finished["status"] == "done", finished
+    assert generations == [vehicle_id]
+    for job in jobs:
+        assert job["watermark"] == finished["watermark"]
+
+    again = client.post(f"/vehicles/{vehicle_id}/reports").json()
+    assert again["cached"] and again["status"] == "done"
+    download = client.get(again["download_url"])
+    assert download.status_code == 200
+    assert generations == [vehicle_id]
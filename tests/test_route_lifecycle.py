@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import app.services.routeEnrichmentService as routeEnrichmentService
+from app.config import ROUTE_ENRICHMENT_LEASE
+from app.database import engine
+
+pytestmark = pytest.mark.usefixtures("no_openrouteservice")
+
+
+def test_each_lifecycle_operation_is_one_transaction(client, create_vehicle, route_start_body, route_end_body, fuel_stop_start_body, fuel_stop_finish_body, count_queries):
+    vehicle_id = create_vehicle()
+    body = route_start_body(vehicle_id)
+
+    # Leer vehículo, UPDATE con versión, INSERT de la ruta y el conductor para la respuesta
+    with count_queries() as queries:
+        route = client.post("/routes/start", json=body)
+    assert route.status_code == 201, route.text
+    assert queries.commits == 1
+    assert queries.count <= 4, queries.statements
+
+    with count_queries() as queries:
+        fuel_stop = client.post("/fuel-stops/start-refueling", json=fuel_stop_start_body(route.json()["id_route"]))
+    assert fuel_stop.status_code == 201, fuel_stop.text
+    assert queries.commits == 1
+    assert queries.count <= 4, queries.statements
+
+    with count_queries() as queries:
+        finished = client.post("/fuel-stops/finish-refueling", json=fuel_stop_finish_body(fuel_stop.json()["id_fuel_stop"]))
+    assert finished.status_code == 200, finished.text
+    assert queries.commits == 1
+    assert queries.count <= 6, queries.statements
+
+    with count_queries() as queries:
+        end = client.post("/routes/finish", json=route_end_body(route.json()["id_route"], vehicle_id))
+    assert end.status_code == 201, end.text
+    assert queries.commits == 1
+    assert queries.count <= 8, queries.statements
+
+
+def test_parallel_starts_on_the_same_vehicle(client, create_vehicle, route_start_body):
+    vehicle_id = create_vehicle()
+    body = route_start_body(vehicle_id)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        responses = list(pool.map(lambda _: client.post("/routes/start", json=body), range(10)))
+
+    codes = sorted(response.status_code for response in responses)
+    assert codes == [201] + [400] * 9, [response.text for response in responses]
+    assert len(client.get(f"/vehicles/{vehicle_id}/routes").json()) == 1
+    assert client.get(f"/vehicles/{vehicle_id}").json()["route_status"] == "On Route"
+
+
+def test_enrichment_endpoint_reports_running(client, create_vehicle, finished_route):
+    route_id = finished_route(create_vehicle())
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE Route SET enrichment_status = 'RUNNING' WHERE id_route = :id"), {"id": route_id})
+
+    response = client.get(f"/routes/{route_id}/enrichment")
+    assert response.status_code == 200, response.text
+    assert response.json()["enrichment_status"] == "Running"
+    schema = client.get("/openapi.json").json()["components"]["schemas"]
+    assert schema["RouteEnrichmentStatus"]["enum"] == ["Pending", "Running", "Done", "Failed"]
+
+
+@pytest.fixture
+def fast_rescan(client):
+    """Reinicia el worker con un rescan cada 0.2 s; al terminar vuelve al intervalo configurado."""
+    worker = routeEnrichmentService.route_enrichment_worker
+    interval = worker.rescan_interval
+
+    def restart(seconds):
+        client.portal.call(worker.stop)
+        worker.rescan_interval = seconds
+        client.portal.call(worker.start)
+
+    restart(0.2)
+    yield
+    restart(interval)
+
+
+@pytest.mark.parametrize("status, claimed_ago", [
+    ("RUNNING", ROUTE_ENRICHMENT_LEASE + 60),  # el proceso que la tomó murió
+    ("PENDING", None),  # guardada justo antes de que se cayera el proceso que la encoló
+])
+def test_stranded_routes_are_enriched_without_a_restart(client, create_vehicle, finished_route, fast_rescan, monkeypatch, status, claimed_ago):
+    # La ruta queda varada después de arrancar el worker: solo el rescan periódico la encuentra
+    monkeypatch.setattr(routeEnrichmentService, "calculate_distance", lambda *args: (90.0, 2.5))
+    route_id = finished_route(create_vehicle())
+    claimed_at = datetime.utcnow() - timedelta(seconds=claimed_ago) if claimed_ago else None
+    with engine.begin() as connection:
+        connection.execute(text(
+            "UPDATE Route SET enrichment_status = :status, enrichment_claimed_at = :claimed_at, estimated_km = NULL WHERE id_route = :id"
+        ), {"status": status, "claimed_at": claimed_at, "id": route_id})
+
+    deadline = time.monotonic() + 5
+    while (enrichment := client.get(f"/routes/{route_id}/enrichment").json())["enrichment_status"] != "Done":
+        assert time.monotonic() < deadline, enrichment
+        time.sleep(0.05)
+    assert enrichment["estimated_km"] == 90
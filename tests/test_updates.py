@@ -0,0 +1,55 @@
+import uuid
+
+import pytest
+
+
+def selects(queries) -> list:
+    return [statement for statement in queries.statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+def updates(queries) -> list:
+    return [statement for statement in queries.statements if statement.lstrip().upper().startswith("UPDATE")]
+
+
+@pytest.fixture
+def create_brand(client):
+    def _create_brand() -> dict:
+        response = client.post("/brands/", json={"name": f"Brand {uuid.uuid4().hex[:8]}"})
+        assert response.status_code == 201, response.text
+        return response.json()
+    return _create_brand
+
+
+def test_vehicle_update_is_one_select_and_one_update(client, create_vehicle, count_queries):
+    vehicle_id = create_vehicle()
+
+    with count_queries() as queries:
+        response = client.put(f"/vehicles/{vehicle_id}", json={"color": "blue", "km": 10})
+    assert response.status_code == 200, response.text
+    assert response.json()["color"] == "blue" and response.json()["km"] == 10
+    assert response.json()["name_model"] is not None
+    # La carga inicial del servicio (con model, brand y description); sin merge ni refresh
+    assert len(selects(queries)) == 1, queries.statements
+    assert len(updates(queries)) == 1 and "version" in updates(queries)[0]
+    assert queries.count == 2 and queries.commits == 1
+
+
+def test_model_update_reloads_brand_only_when_it_changes(client, create_brand, count_queries):
+    old_brand, new_brand = create_brand(), create_brand()
+    model = client.post("/models/", json={"name": f"Model {uuid.uuid4().hex[:8]}", "id_brand_fk": old_brand["id_brand"]}).json()
+
+    with count_queries() as queries:
+        response = client.put(f"/models/{model['id_model']}", json={"name": "Renamed", "id_brand_fk": new_brand["id_brand"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["name_brand"] == new_brand["name"]
+    # Carga inicial + get de la marca nueva
+    assert len(selects(queries)) == 2, queries.statements
+    assert '"Brand"' in selects(queries)[1]
+    assert len(updates(queries)) == 1 and queries.commits == 1
+
+    with count_queries() as queries:
+        response = client.put(f"/models/{model['id_model']}", json={"name": "Renamed again", "id_brand_fk": new_brand["id_brand"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["name_brand"] == new_brand["name"]
+    assert len(selects(queries)) == 1, queries.statements
+    assert len(updates(queries)) == 1 and queries.commits == 1
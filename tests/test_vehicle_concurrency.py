@@ -0,0 +1,86 @@
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.utils.retryUtil import retry_on_conflict
+
+
+def test_stress_parallel_starts_never_double_start(client, create_vehicle, route_start_body):
+    vehicles = [create_vehicle() for _ in range(5)]
+    requests = [vehicle_id for vehicle_id in vehicles for _ in range(20)]
+
+    def start(vehicle_id: int):
+        return vehicle_id, client.post("/routes/start", json=route_start_body(vehicle_id)).status_code
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(start, requests))
+
+    # 409 = reintentos agotados: nunca un segundo inicio ni un 500
+    assert {code for _, code in results} <= {201, 400, 409}
+    started = Counter(vehicle_id for vehicle_id, code in results if code == 201)
+    assert started == Counter(vehicles)
+    for vehicle_id in vehicles:
+        assert len(client.get(f"/vehicles/{vehicle_id}/routes").json()) == 1
+
+
+def test_stress_parallel_refueling_on_the_same_route(client, create_vehicle, route_start_body, fuel_stop_start_body):
+    vehicle_id = create_vehicle()
+    route = client.post("/routes/start", json=route_start_body(vehicle_id)).json()
+    body = fuel_stop_start_body(route["id_route"])
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        codes = list(pool.map(lambda _: client.post("/fuel-stops/start-refueling", json=body).status_code, range(16)))
+
+    assert codes.count(201) == 1, codes
+    assert set(codes) <= {201, 400, 409}
+    assert len(client.get(f"/routes/{route['id_route']}/fuel-stops").json()) == 1
+
+
+def mysql_error(code: int) -> DBAPIError:
+    return DBAPIError("UPDATE Vehicle ...", {}, Exception(code, "MySQL error"))
+
+
+class FlakyOperation:
+    """Falla con `errors` en orden y después devuelve "ok"."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+        self.rollbacks = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+@pytest.mark.parametrize("error", [StaleDataError(), mysql_error(1213), mysql_error(1205)])
+def test_retry_on_conflict_repeats_after_version_conflicts_and_deadlocks(error):
+    operation = FlakyOperation(error)
+    assert asyncio.run(retry_on_conflict(operation, operation.rollback)) == "ok"
+    assert operation.calls == 2
+    assert operation.rollbacks == 1
+
+
+def test_retry_on_conflict_raises_other_database_errors():
+    operation = FlakyOperation(mysql_error(1062))
+    with pytest.raises(DBAPIError):
+        asyncio.run(retry_on_conflict(operation, operation.rollback))
+    assert operation.calls == 1
+
+
+def test_retry_on_conflict_gives_up_with_409():
+    operation = FlakyOperation(*[mysql_error(1213)] * 3)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(retry_on_conflict(operation, operation.rollback, retries=2))
+    assert error.value.status_code == 409
+    assert operation.calls == 3
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from app.utils.excelUtil import ExcelGenerator
+
+
+def export_query_count(client, count_queries, vehicle_id: int) -> int:
+    with count_queries() as queries:
+        response = client.get(f"/vehicles/{vehicle_id}/export-excel")
+    assert response.status_code == 200, response.text
+    return queries.count
+
+
+def test_export_excel_query_count_does_not_grow_with_routes(client, create_vehicle, finished_route, count_queries):
+    small = create_vehicle()
+    finished_route(small, fuel_stops=2)
+    large = create_vehicle()
+    for _ in range(6):
+        finished_route(large, fuel_stops=2)
+
+    # Vehículo, rutas (con conductor) y todas sus paradas en un IN: no una consulta por ruta
+    assert export_query_count(client, count_queries, large) == export_query_count(client, count_queries, small)
+
+
+def test_zero_coordinates_are_kept_in_the_report():
+    row = SimpleNamespace(
+        id_route_fk=1, id_fuel_stop=1, stop_time=None, resume_time=None, start_time=None,
+        liters_added=None, current_km=None, Latitude_stop=0.0, Longitude_stop=0.0,
+        Latitude_start=0.0, Longitude_start=-89.5
+    )
+    assert ExcelGenerator._fuel_stop_row(row)[-1] == "0.0, -89.5"
+    assert ExcelGenerator._fuel_stop_row(SimpleNamespace(**{**vars(row), "Latitude_start": None}))[-1] == ""